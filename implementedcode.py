@@ -1,3 +1,5 @@
+import os
+import sys
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import openai
@@ -7,6 +9,10 @@ import requests
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 
+# Use the main app's shared connection pool implementation
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "majo project", "security-incident-chatbot"))
+from app.pooling import Psycopg2ConnectionPool
+
 # Initialize FastAPI app
 app = FastAPI()
 
@@ -24,10 +30,12 @@ slack_client = WebClient(token=SLACK_BOT_TOKEN)
 # OpenAI Configuration
 openai.api_key = OPENAI_API_KEY
 
-# Database connection
+# Database connection pool (size, overflow, timeout, pre-ping and recycle come from DB_POOL_* env vars)
+db_pool = Psycopg2ConnectionPool(DATABASE_URL, cursor_factory=RealDictCursor)
+
+# Database connection, returned to the pool when the `with` block exits
 def get_db_connection():
-    conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-    return conn
+    return db_pool.connection()
 
 # Models for API requests
 class Alert(BaseModel):
@@ -51,18 +59,17 @@ def process_alert(alert: Alert):
         severity_classification = response.choices[0].text.strip()
 
         # Step 2: Store alert in PostgreSQL database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO alerts (source, severity, message)
-            VALUES (%s, %s, %s) RETURNING id;
-            """,
-            (alert.source, severity_classification, alert.message),
-        )
-        alert_id = cursor.fetchone()["id"]
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO alerts (source, severity, message)
+                VALUES (%s, %s, %s) RETURNING id;
+                """,
+                (alert.source, severity_classification, alert.message),
+            )
+            alert_id = cursor.fetchone()["id"]
+            conn.commit()
 
         # Step 3: Trigger JIRA ticket creation for High or Critical alerts
         if severity_classification in ["High", "Critical"]:
@@ -78,11 +85,10 @@ def process_alert(alert: Alert):
 def create_ticket(alert_id: int):
     try:
         # Fetch alert details from the database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM alerts WHERE id = %s;", (alert_id,))
-        alert = cursor.fetchone()
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM alerts WHERE id = %s;", (alert_id,))
+            alert = cursor.fetchone()
 
         if not alert or alert["severity"] not in ["High", "Critical"]:
             raise HTTPException(status_code=400, detail="Alert not eligible for ticket creation.")
@@ -111,11 +117,10 @@ def create_ticket(alert_id: int):
 def automated_response(alert_id: int):
     try:
         # Fetch alert details from the database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM alerts WHERE id = %s;", (alert_id,))
-        alert = cursor.fetchone()
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM alerts WHERE id = %s;", (alert_id,))
+            alert = cursor.fetchone()
 
         if not alert:
             raise HTTPException(status_code=404, detail="Alert not found.")
@@ -139,11 +144,10 @@ def automated_response(alert_id: int):
 def slack_alert(alert_id: int):
     try:
         # Fetch alert details from the database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM alerts WHERE id = %s;", (alert_id,))
-        alert = cursor.fetchone()
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM alerts WHERE id = %s;", (alert_id,))
+            alert = cursor.fetchone()
 
         if not alert:
             raise HTTPException(status_code=404, detail="Alert not found.")
@@ -162,24 +166,31 @@ def slack_alert(alert_id: int):
 @app.get("/alerts/")
 def fetch_alerts(severity: str = None, source: str = None):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = "SELECT * FROM alerts WHERE TRUE"
-        
-        if severity:
-            query += f" AND severity ILIKE '{severity}'"
-        
-        if source:
-            query += f" AND source ILIKE '{source}'"
-
-        cursor.execute(query)
-        
-        alerts = cursor.fetchall()
-        
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            query = "SELECT * FROM alerts WHERE TRUE"
+            params = []
+            
+            # Values are passed as parameters, never formatted into the SQL
+            if severity:
+                query += " AND severity ILIKE %s"
+                params.append(severity)
+            
+            if source:
+                query += " AND source ILIKE %s"
+                params.append(source)
+
+            cursor.execute(query, params)
+            
+            alerts = cursor.fetchall()
 
         return {"alerts": alerts}
 
     except Exception as e:
        raise HTTPException(status_code=500, detail=str(e))
+
+# Route 6: Connection pool metrics
+@app.get("/pool/metrics")
+def pool_metrics():
+    return db_pool.stats()
\ No newline at end of file
@@ -1,8 +1,16 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
+from app.pooling import (
+    InstrumentedQueuePool,
+    InstrumentedAsyncAdaptedQueuePool,
+    engine_pool_kwargs,
+    engine_pool_metrics
+)
 
 # Load environment variables
 load_dotenv()
@@ -10,19 +18,59 @@ load_dotenv()
 # Get database URL from environment variable
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# The API talks to Postgres through asyncpg so that queries don't block the
+# event loop. Defaults to DATABASE_URL with the driver swapped.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or make_url(DATABASE_URL).set(
+    drivername="postgresql+asyncpg"
+)
+
+# Create SQLAlchemy engine (synchronous, used for schema management and scripts)
+engine = create_engine(DATABASE_URL, poolclass=InstrumentedQueuePool, **engine_pool_kwargs())
+
+# Create async SQLAlchemy engine (used by the API and background workers)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncAdaptedQueuePool, **engine_pool_kwargs()
+)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create AsyncSessionLocal class. Objects stay usable after commit so they can
+# be handed to the JIRA/Slack services without another round trip.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create Base class
 Base = declarative_base()
 
+# Alembic project files live next to the app package
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_migrations():
+    """
+    Upgrade the database schema to the latest Alembic revision
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "migrations"))
+    command.upgrade(config, "head")
+
+def get_pool_metrics() -> dict:
+    """
+    Connection pool state for both engines
+    """
+    return {
+        "async_engine": engine_pool_metrics(async_engine.pool),
+        "sync_engine": engine_pool_metrics(engine.pool),
+    }
+
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
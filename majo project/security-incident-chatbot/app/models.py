@@ -1,9 +1,43 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
-from pydantic import BaseModel
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Boolean, Index, ForeignKey, UniqueConstraint, Computed, LargeBinary
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
+from sqlalchemy.orm import deferred
+from pydantic import AliasChoices, BaseModel, Field, ValidationInfo, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
+import ipaddress
 from app.database import Base
 
+# Text search configuration used for alert messages and search queries
+ALERT_SEARCH_CONFIG = "english"
+
+# Structured alert metadata fields with an expression index each (migration
+# 0010); other metadata keys are stored too and matched through the GIN index
+ALERT_METADATA_FIELDS = ["src_ip", "dst_ip", "host", "user", "rule_id"]
+
+def normalize_metadata_field(field: str, value: Any) -> str:
+    """
+    Canonical form of an indexed metadata value, used both when storing and
+    when filtering so that equal values hit the same index entries:
+    IPs as ipaddress prints them, host names lower case, the rest as text.
+    Raises ValueError for an invalid IP address.
+    """
+    value = str(value).strip()
+    if field in ("src_ip", "dst_ip"):
+        return str(ipaddress.ip_address(value))
+    if field == "host":
+        return value.lower().rstrip(".")
+    return value
+
+def _metadata_index(field: str) -> Index:
+    # (metadata ->> 'field', created_at, id): equality filters read /alerts/
+    # pages newest first straight from the index
+    return Index(
+        f"ix_alerts_metadata_{field}",
+        text(f"(metadata ->> '{field}')"), "created_at", "id",
+        postgresql_where=text(f"(metadata ->> '{field}') IS NOT NULL")
+    )
+
 # SQLAlchemy Model
 class Alert(Base):
     __tablename__ = "alerts"
@@ -14,20 +48,278 @@ class Alert(Base):
     message = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     jira_ticket_id = Column(String(50), nullable=True)
+    
+    # Which classification stage decided the severity: rules, model, cache or llm
+    classified_by = Column(String(20), nullable=True)
+    
+    # Background enrichment (JIRA ticket + Slack notification) job state
+    enrichment_status = Column(String(20), nullable=False, default="skipped")
+    enrichment_attempts = Column(Integer, nullable=False, default=0)
+    enrichment_error = Column(Text, nullable=True)
+    slack_notified = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Deduplication: SHA-256 of source + normalized message. dedup_key holds the
+    # fingerprint while the alert's suppression window is open and is cleared
+    # when it closes, so the next occurrence after the window is a new alert
+    fingerprint = Column(String(64), nullable=True)
+    dedup_key = Column(String(64), nullable=True)
+    occurrence_count = Column(Integer, nullable=False, default=1)
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+    last_seen_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Incident the correlation stage grouped the alert into (None if it hasn't run)
+    incident_id = Column(Integer, ForeignKey("incidents.id", ondelete="SET NULL"), nullable=True)
+    
+    # Structured fields sent with the alert (src_ip, dst_ip, host, user,
+    # rule_id and any other keys). `metadata` is reserved on declarative
+    # models, hence the attribute name.
+    alert_metadata = Column("metadata", JSONB, nullable=True)
+    
+    # Full-text search document, maintained by Postgres. The message is indexed
+    # as parsed (so "10.0.4.22" and "mimikatz.exe" stay whole tokens) plus a
+    # copy split on punctuation (so "mimikatz" and "backup3" match too).
+    # Deferred so regular alert queries don't load it.
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('english'::regconfig, message) || "
+            "to_tsvector('simple'::regconfig, regexp_replace(message, '[[:punct:]]+', ' ', 'g'))",
+            persisted=True
+        )
+    ))
+    
+    # Indexes for the /alerts/ query paths (see migrations/versions)
+    __table_args__ = (
+        Index("ix_alerts_created_at_id", "created_at", "id"),
+        Index("ix_alerts_severity_created_at", "severity", "created_at", "id"),
+        Index("ix_alerts_source_created_at", "source", "created_at", "id"),
+        Index("ix_alerts_created_at_brin", "created_at", postgresql_using="brin"),
+        Index(
+            "ix_alerts_enrichment_pending", "id",
+            postgresql_where=enrichment_status.in_(["queued", "running", "retrying"])
+        ),
+        Index("ix_alerts_dedup_key", "dedup_key", unique=True, postgresql_where=dedup_key.isnot(None)),
+        Index("ix_alerts_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_alerts_incident_id", "incident_id", "id", postgresql_where=incident_id.isnot(None)),
+        Index("ix_alerts_metadata", alert_metadata, postgresql_using="gin", postgresql_ops={"metadata": "jsonb_path_ops"}),
+        *(_metadata_index(field) for field in ALERT_METADATA_FIELDS),
+        # ix_alerts_message_trgm (pg_trgm, optional) is created by migration 0007
+        # when the extension is available; it is not declared here
+    )
+
+class Incident(Base):
+    __tablename__ = "incidents"
+    
+    # Related alerts grouped by the correlation stage (shared IPs, hosts,
+    # users or hashes seen close together in time)
+    id = Column(Integer, primary_key=True)
+    # open while alerts keep arriving, closed once the correlation window passes
+    status = Column(String(20), nullable=False, default="open")
+    # Highest severity of its alerts
+    severity = Column(String(50), nullable=False)
+    # Source and message of the first alert
+    source = Column(String(100), nullable=False)
+    title = Column(Text, nullable=False)
+    lead_alert_id = Column(Integer, nullable=True)
+    # Entity keys ("ip:10.0.0.1", "host:fin-ws-12", ...) used to rebuild the
+    # correlation index after a restart
+    entities = Column(ARRAY(String(255)), nullable=False, default=list)
+    alert_count = Column(Integer, nullable=False, default=1)
+    first_seen_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_seen_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # One JIRA ticket per incident, shared by its alerts
+    jira_ticket_id = Column(String(50), nullable=True)
+    # Highest severity announced on Slack; a more severe alert is announced again
+    slack_severity = Column(String(50), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_incidents_last_seen_at_id", "last_seen_at", "id"),
+        Index("ix_incidents_open", "last_seen_at", postgresql_where=status == "open"),
+    )
+
+class ClassificationCacheEntry(Base):
+    __tablename__ = "classification_cache"
+    
+    # SHA-256 of the normalized alert message
+    fingerprint = Column(String(64), primary_key=True)
+    severity = Column(String(50), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class ResponseRecommendation(Base):
+    __tablename__ = "response_recommendations"
+    
+    id = Column(Integer, primary_key=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id", ondelete="CASCADE"), nullable=False)
+    # Bumped whenever the recommendation prompt changes, so old text is not served
+    prompt_version = Column(String(20), nullable=False)
+    # SHA-256 of severity, source and normalized message, shared by similar alerts
+    fingerprint = Column(String(64), nullable=False)
+    recommendation = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("alert_id", "prompt_version", name="uq_response_recommendations_alert_version"),
+        Index("ix_response_recommendations_fingerprint", "fingerprint", "prompt_version"),
+    )
+
+class AlertStatsRollup(Base):
+    __tablename__ = "alert_stats_rollups"
+    
+    # Alert counts per time bucket, kept up to date as alerts are inserted
+    granularity = Column(String(10), primary_key=True)  # minute, hour or day
+    bucket_start = Column(DateTime, primary_key=True)
+    severity = Column(String(50), primary_key=True)
+    source = Column(String(100), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+class AlertEmbedding(Base):
+    __tablename__ = "alert_embeddings"
+    
+    # One vector per alert and embedding model, so switching providers
+    # doesn't mix vectors from different models in one index
+    model = Column(String(100), primary_key=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id", ondelete="CASCADE"), primary_key=True)
+    # Unit-length float16 vector, 2 bytes per dimension
+    embedding = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 # Pydantic Models for API
 class AlertBase(BaseModel):
     source: str
     message: str
 
+class AlertMetadata(BaseModel):
+    src_ip: Optional[str] = Field(None, max_length=64)
+    dst_ip: Optional[str] = Field(None, max_length=64)
+    host: Optional[str] = Field(None, max_length=255)
+    user: Optional[str] = Field(None, max_length=255)
+    rule_id: Optional[str] = Field(None, max_length=100)
+    
+    class Config:
+        extra = "allow"
+    
+    @field_validator(*ALERT_METADATA_FIELDS, mode="before")
+    @classmethod
+    def normalize(cls, value: Any, info: ValidationInfo) -> Optional[str]:
+        if value is None:
+            return None
+        return normalize_metadata_field(info.field_name, value)
+
 class AlertCreate(AlertBase):
-    pass
+    # Optional structured fields sent alongside the message
+    metadata: Optional[AlertMetadata] = None
 
 class AlertResponse(AlertBase):
     id: int
     severity: str
     created_at: datetime
     jira_ticket_id: Optional[str] = None
+    enrichment_status: Optional[str] = None
+    classified_by: Optional[str] = None
+    occurrence_count: int = 1
+    first_seen_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
+    incident_id: Optional[int] = None
+    # Read from Alert.alert_metadata; Alert.metadata is the SQLAlchemy MetaData
+    metadata: Optional[Dict[str, Any]] = Field(None, validation_alias=AliasChoices("alert_metadata", "metadata"))
+    
+    class Config:
+        orm_mode = True
+
+class ProcessedAlertResponse(AlertResponse):
+    # True when the alert repeated one inside its suppression window and was
+    # folded into it; the fields then describe the original alert
+    deduplicated: bool = False
+
+class AlertSearchHit(AlertResponse):
+    # ts_rank_cd for text search, word similarity for fuzzy search, None for substring
+    rank: Optional[float] = None
+
+class AlertSearchResponse(BaseModel):
+    query: str
+    mode: str
+    items: List[AlertSearchHit]
+    # Pass as `offset` to fetch the next page; None on the last page
+    next_offset: Optional[int] = None
+
+class SimilarAlert(AlertResponse):
+    # Cosine similarity to the queried alert, 1.0 is identical wording
+    score: float
+    # Most recent stored response recommendation for the similar alert
+    recommendation: Optional[str] = None
+
+class SimilarAlertsResponse(BaseModel):
+    alert_id: int
+    model: str
+    items: List[SimilarAlert]
+
+class AlertPage(BaseModel):
+    items: List[AlertResponse]
+    # Pass as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+class BulkAlertResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    severity: Optional[str] = None
+    classified_by: Optional[str] = None
+    enrichment_status: Optional[str] = None
+    # True when the item was folded into an existing alert (id) as a duplicate
+    deduplicated: bool = False
+    error: Optional[str] = None
+
+class BulkAlertResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[BulkAlertResult]
+
+class AlertStatusResponse(BaseModel):
+    id: int
+    severity: str
+    enrichment_status: str
+    enrichment_attempts: int
+    enrichment_error: Optional[str] = None
+    jira_ticket_id: Optional[str] = None
+    slack_notified: bool
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        orm_mode = True
+
+class IncidentResponse(BaseModel):
+    id: int
+    status: str
+    severity: str
+    source: str
+    title: str
+    entities: List[str]
+    alert_count: int
+    first_seen_at: datetime
+    last_seen_at: datetime
+    jira_ticket_id: Optional[str] = None
     
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class IncidentPage(BaseModel):
+    items: List[IncidentResponse]
+
+class IncidentDetailResponse(IncidentResponse):
+    # Most recent alerts of the incident, newest first
+    alerts: List[AlertResponse]
+
+class AlertStatsBucket(BaseModel):
+    bucket_start: datetime
+    count: int
+    by_severity: Dict[str, int]
+
+class AlertStatsResponse(BaseModel):
+    granularity: str
+    start_date: datetime
+    end_date: datetime
+    total: int
+    by_severity: Dict[str, int]
+    by_source: Dict[str, int]
+    buckets: List[AlertStatsBucket]
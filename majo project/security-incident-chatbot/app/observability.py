@@ -0,0 +1,320 @@
+"""
+Pipeline instrumentation:
+- per-stage latency histograms and error counters (classification, the
+  database insert, JIRA, Slack, recommendations), LLM token counters and
+  queue depth gauges, exposed in Prometheus format on /metrics
+- lightweight trace spans: each stage is a span with a trace id (the
+  request id for API calls), a span id and its parent, and finished spans
+  can be written to the log
+- a request id per HTTP request, taken from X-Request-ID or generated,
+  returned in the response and added to every log record
+
+Set METRICS_ENABLED=false to turn stages into plain calls. Observing a
+stage costs a few microseconds, against stages that take milliseconds.
+
+Nothing in this module imports the rest of the app.
+"""
+import os
+import time
+import uuid
+import random
+import asyncio
+import logging
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+from dotenv import load_dotenv
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+
+# Load environment variables
+load_dotenv()
+
+# Instrumentation configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Log every finished span at INFO; spans slower than TRACE_SLOW_SPAN_MS are always logged
+TRACE_LOG_SPANS = os.getenv("TRACE_LOG_SPANS", "false").lower() == "true"
+TRACE_SLOW_SPAN_MS = float(os.getenv("TRACE_SLOW_SPAN_MS", "5000"))
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+
+# Request id of the API call (or background job) being handled
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+logger = logging.getLogger("app.trace")
+
+# A registry of our own so a reload doesn't register the metrics twice
+registry = CollectorRegistry()
+
+STAGE_SECONDS = Histogram(
+    "alert_pipeline_stage_seconds",
+    "Latency of each alert pipeline stage",
+    ["stage", "outcome"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    registry=registry
+)
+STAGE_ERRORS = Counter(
+    "alert_pipeline_stage_errors",
+    "Alert pipeline stage failures by exception type",
+    ["stage", "error"],
+    registry=registry
+)
+CLASSIFICATIONS = Counter(
+    "alert_classifications",
+    "Alert severities decided, by the stage that decided them",
+    ["decided_by", "severity"],
+    registry=registry
+)
+LLM_TOKENS = Counter(
+    "llm_tokens",
+    "Tokens used by LLM calls",
+    ["operation", "kind"],
+    registry=registry
+)
+LLM_TOKENS_PER_CALL = Histogram(
+    "llm_tokens_per_call",
+    "Total tokens (prompt + completion) per LLM call",
+    ["operation"],
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192),
+    registry=registry
+)
+LLM_REQUESTS = Counter(
+    "llm_requests",
+    "LLM call attempts by outcome (ok, rate_limited, timeout, server_error, rejected, ...)",
+    ["operation", "outcome"],
+    registry=registry
+)
+HTTP_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    registry=registry
+)
+
+class _GaugeCallbacks:
+    """
+    Gauges read from callbacks at scrape time, e.g. queue sizes
+    """
+
+    def __init__(self, name: str, documentation: str, label: str):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.callbacks: Dict[str, Callable[[], float]] = {}
+
+    def collect(self):
+        family = GaugeMetricFamily(self.name, self.documentation, labels=[self.label])
+        for key, callback in self.callbacks.items():
+            try:
+                family.add_metric([key], float(callback()))
+            except Exception as e:
+                logger.warning("Gauge %s{%s=%s} failed: %s", self.name, self.label, key, e)
+        yield family
+
+_queue_depths = _GaugeCallbacks("alert_pipeline_queue_depth", "Items waiting in each in-process queue", "queue")
+registry.register(_queue_depths)
+
+_llm_gateway_state = _GaugeCallbacks(
+    "llm_gateway_state",
+    "LLM gateway concurrency limit, in-flight and queued calls, and circuit (0 closed, 1 half-open, 2 open)",
+    "field"
+)
+registry.register(_llm_gateway_state)
+
+def register_queue_depth(queue: str, callback: Callable[[], float]):
+    """
+    Report `callback()` as alert_pipeline_queue_depth{queue="..."} on every scrape
+    """
+    _queue_depths.callbacks[queue] = callback
+
+def register_llm_gateway_state(field: str, callback: Callable[[], float]):
+    """
+    Report `callback()` as llm_gateway_state{field="..."} on every scrape
+    """
+    _llm_gateway_state.callbacks[field] = callback
+
+def render_metrics() -> bytes:
+    return generate_latest(registry)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+class Span:
+    """
+    One timed stage. trace_id is shared by every span of a request.
+    """
+    __slots__ = ("name", "trace_id", "span_id", "parent_id")
+
+    def __init__(self, name: str, parent: Optional["Span"]):
+        self.name = name
+        # Span ids only need to be unique within a trace; getrandbits is much cheaper than uuid4
+        self.span_id = "%016x" % random.getrandbits(64)
+        if parent is not None:
+            self.trace_id, self.parent_id = parent.trace_id, parent.span_id
+        else:
+            self.trace_id, self.parent_id = request_id_var.get() or "%032x" % random.getrandbits(128), None
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a pipeline stage: a latency observation labelled with the outcome
+    (ok, error, cancelled), an error count by exception type and a span
+    """
+    if not METRICS_ENABLED:
+        yield None
+        return
+
+    span = Span(name, _current_span.get())
+    token = _current_span.set(span)
+    outcome = "ok"
+    started = time.perf_counter()
+    try:
+        yield span
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except BaseException as e:
+        outcome = "error"
+        STAGE_ERRORS.labels(name, type(e).__name__).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        _current_span.reset(token)
+        STAGE_SECONDS.labels(name, outcome).observe(elapsed)
+        if TRACE_LOG_SPANS or elapsed * 1000 >= TRACE_SLOW_SPAN_MS:
+            logger.log(
+                logging.INFO if elapsed * 1000 < TRACE_SLOW_SPAN_MS else logging.WARNING,
+                "span %s trace=%s span=%s parent=%s outcome=%s duration_ms=%.1f",
+                name, span.trace_id, span.span_id, span.parent_id or "-", outcome, elapsed * 1000
+            )
+
+def observe_stage(name: str, seconds: float, outcome: str = "ok", error: Optional[str] = None):
+    """
+    Record a stage timed by the caller, for code that can't hold a span
+    open (generators) or that reports failure by return value
+    """
+    if not METRICS_ENABLED:
+        return
+    STAGE_SECONDS.labels(name, outcome).observe(seconds)
+    if outcome == "error":
+        STAGE_ERRORS.labels(name, error or "failed").inc()
+
+def instrumented(name: str):
+    """
+    Decorator running an async function as a stage
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            if not METRICS_ENABLED:
+                return await function(*args, **kwargs)
+            with stage(name):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_classification(decided_by: str, severity: str):
+    if METRICS_ENABLED:
+        CLASSIFICATIONS.labels(decided_by, severity).inc()
+
+def record_llm_request(operation: str, outcome: str):
+    if METRICS_ENABLED:
+        LLM_REQUESTS.labels(operation, outcome).inc()
+
+def record_tokens(operation: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+    """
+    Count the tokens of one LLM call (from the response's usage)
+    """
+    if not METRICS_ENABLED:
+        return
+    if prompt_tokens:
+        LLM_TOKENS.labels(operation, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(operation, "completion").inc(completion_tokens)
+    LLM_TOKENS_PER_CALL.labels(operation).observe(prompt_tokens + completion_tokens)
+
+def record_usage(operation: str, response):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        record_tokens(operation, usage.prompt_tokens or 0, getattr(usage, "completion_tokens", 0) or 0)
+
+@contextmanager
+def request_context(request_id: Optional[str] = None):
+    """
+    Run a request or background job under a request id (a new one if not given)
+    """
+    request_id = request_id or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        yield request_id
+    finally:
+        request_id_var.reset(token)
+
+class RequestIdFilter(logging.Filter):
+    """
+    Adds the current request id to log records as %(request_id)s
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+def configure_logging(level: int = logging.INFO):
+    """
+    Log with the request id on every line (root logger and uvicorn's)
+
+    The root logger may already be set up (the Alembic migrations configure
+    it at WARN), so the app's loggers get their own level.
+    """
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+    logging.getLogger("app").setLevel(level)
+    request_filter = RequestIdFilter()
+    formatter = logging.Formatter(LOG_FORMAT)
+    for name in ["", "uvicorn", "uvicorn.error", "uvicorn.access"]:
+        for handler in logging.getLogger(name).handlers:
+            handler.addFilter(request_filter)
+            handler.setFormatter(formatter)
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware that gives each HTTP request a request id (X-Request-ID
+    when the caller sent a usable one) and times it by route template
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")[:64] if value.isascii() and value.strip() else None
+                break
+        status = 500
+        started = time.perf_counter()
+
+        with request_context(request_id) as request_id:
+            async def send_with_request_id(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            finally:
+                if METRICS_ENABLED:
+                    route = scope.get("route")
+                    HTTP_SECONDS.labels(
+                        scope["method"], getattr(route, "path", "unmatched"), str(status)
+                    ).observe(time.perf_counter() - started)
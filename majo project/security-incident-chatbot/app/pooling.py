@@ -0,0 +1,256 @@
+"""
+Shared database connection pooling for every entry point:
+- SQLAlchemy engines (app/database.py) get their pool settings and
+  instrumented pool classes from here
+- raw psycopg2 callers (implementedcode.py, security_botcore) use
+  Psycopg2ConnectionPool
+
+Nothing in this module imports the rest of the app, so the legacy scripts
+can use it on its own.
+"""
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Load environment variables
+load_dotenv()
+
+# Pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+class PoolMetrics:
+    """
+    Checkout counters for one pool. Wait time covers the whole checkout,
+    so it includes opening a new connection when the pool has to grow.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waiting = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def start_wait(self) -> float:
+        with self._lock:
+            self.waiting += 1
+        return time.perf_counter()
+
+    def end_wait(self, started: float, acquired: bool, timed_out: bool = False):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.checkouts += 1
+                self.wait_time_total += elapsed
+                self.wait_time_max = max(self.wait_time_max, elapsed)
+            elif timed_out:
+                self.timeouts += 1
+            else:
+                self.errors += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "waiting": self.waiting,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "wait_time_avg_ms": round(self.wait_time_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+        }
+
+class _InstrumentedPoolMixin:
+    """
+    Times every checkout from a SQLAlchemy queue pool
+    """
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        if "_metrics" not in self.__dict__:
+            self.__dict__["_metrics"] = PoolMetrics()
+        return self.__dict__["_metrics"]
+
+    def _do_get(self):
+        started = self.metrics.start_wait()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.end_wait(started, acquired=False, timed_out=True)
+            raise
+        except BaseException:
+            self.metrics.end_wait(started, acquired=False)
+            raise
+        self.metrics.end_wait(started, acquired=True)
+        return connection
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def engine_pool_kwargs() -> dict:
+    """
+    Pool arguments for create_engine / create_async_engine
+    """
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def engine_pool_metrics(pool) -> dict:
+    """
+    Current state of a SQLAlchemy engine pool
+    """
+    state = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    if isinstance(pool, _InstrumentedPoolMixin):
+        state.update(pool.metrics.snapshot())
+    return state
+
+class Psycopg2ConnectionPool:
+    """
+    Thread-safe psycopg2 pool with the same semantics as the SQLAlchemy
+    engines: up to pool_size idle connections are kept, up to
+    pool_size + max_overflow can be open at once, and a checkout waits up to
+    `timeout` seconds for a free connection. Connections are opened lazily,
+    pinged before use (pre_ping) and replaced after `recycle` seconds.
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        pool_size: int = DB_POOL_SIZE,
+        max_overflow: int = DB_MAX_OVERFLOW,
+        timeout: float = DB_POOL_TIMEOUT,
+        recycle: int = DB_POOL_RECYCLE,
+        pre_ping: bool = DB_POOL_PRE_PING,
+        **connect_kwargs
+    ):
+        self.dsn = dsn
+        self.connect_kwargs = connect_kwargs
+        self.pool_size = pool_size
+        self.max_connections = pool_size + max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.metrics = PoolMetrics()
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._checked_out = 0
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a `with` block. Uncommitted
+        work is rolled back when the block exits.
+        """
+        started = self.metrics.start_wait()
+        if not self._slots.acquire(timeout=self.timeout):
+            self.metrics.end_wait(started, acquired=False, timed_out=True)
+            raise TimeoutError(f"No database connection available within {self.timeout}s")
+
+        try:
+            conn, opened_at = self._checkout()
+        except BaseException:
+            self.metrics.end_wait(started, acquired=False)
+            self._slots.release()
+            raise
+        self.metrics.end_wait(started, acquired=True)
+
+        try:
+            yield conn
+        finally:
+            self._checkin(conn, opened_at)
+            self._slots.release()
+
+    def _connect(self):
+        import psycopg2
+
+        return psycopg2.connect(self.dsn, **self.connect_kwargs), time.monotonic()
+
+    def _checkout(self):
+        import psycopg2
+
+        with self._lock:
+            entry = self._idle.pop() if self._idle else None
+            self._checked_out += 1
+
+        try:
+            if entry is None:
+                return self._connect()
+
+            conn, opened_at = entry
+            if conn.closed or (self.recycle >= 0 and time.monotonic() - opened_at > self.recycle):
+                conn.close()
+                return self._connect()
+
+            if self.pre_ping:
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                    conn.rollback()
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    conn.close()
+                    return self._connect()
+            return entry
+        except BaseException:
+            with self._lock:
+                self._checked_out -= 1
+            raise
+
+    def _checkin(self, conn, opened_at: float):
+        import psycopg2.extensions
+
+        keep = not conn.closed
+        if keep:
+            try:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                keep = False
+
+        with self._lock:
+            self._checked_out -= 1
+            if keep and len(self._idle) < self.pool_size:
+                self._idle.append((conn, opened_at))
+                return
+        conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = {
+                "pool_size": self.pool_size,
+                "max_connections": self.max_connections,
+                "checked_out": self._checked_out,
+                "idle": len(self._idle),
+            }
+        state.update(self.metrics.snapshot())
+        return state
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                conn.close()
@@ -1,64 +1,465 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import Optional, List
+import base64
+import binascii
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Text, and_, delete, func, literal_column, null, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
 from datetime import datetime
-from app.models import Alert, AlertCreate
+from app.models import Alert, AlertCreate, ALERT_SEARCH_CONFIG, ALERT_METADATA_FIELDS, normalize_metadata_field
+from app.repositories.stats_repository import add_alerts_to_rollups, to_naive_utc
+from app.observability import instrumented
 
-def create_alert(db: Session, alert: AlertCreate, severity: str) -> Alert:
+def _upsert_alerts():
+    """
+    INSERT for alerts that folds a row whose dedup_key belongs to an open
+    window into the existing alert instead of failing
+    """
+    statement = insert(Alert)
+    return statement.on_conflict_do_update(
+        index_elements=[Alert.dedup_key],
+        index_where=Alert.dedup_key.isnot(None),
+        set_={
+            "occurrence_count": Alert.occurrence_count + 1,
+            "last_seen_at": statement.excluded.last_seen_at
+        }
+    )
+
+def alert_metadata_value(alert: AlertCreate) -> Optional[dict]:
+    """
+    The metadata of an incoming alert as stored in the metadata column
+    (None when it has none)
+    """
+    if alert.metadata is None:
+        return None
+    return alert.metadata.model_dump(exclude_none=True) or None
+
+@instrumented("db.create_alert")
+async def create_alert(
+    db: AsyncSession,
+    alert: AlertCreate,
+    severity: str,
+    enrichment_status: str = "skipped",
+    classified_by: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+    dedup_key: Optional[str] = None
+) -> Alert:
     """
     Create a new alert in the database
+    If dedup_key matches an alert with an open window, that alert's occurrence
+    count is incremented and it is returned instead (occurrence_count > 1)
     """
-    db_alert = Alert(
-        source=alert.source,
-        severity=severity,
-        message=alert.message
+    now = datetime.utcnow()
+    result = await db.scalars(
+        _upsert_alerts().values(
+            source=alert.source,
+            severity=severity,
+            message=alert.message,
+            alert_metadata=alert_metadata_value(alert),
+            enrichment_status=enrichment_status,
+            classified_by=classified_by,
+            fingerprint=fingerprint,
+            dedup_key=dedup_key,
+            created_at=now,
+            first_seen_at=now,
+            last_seen_at=now
+        ).returning(Alert),
+        execution_options={"populate_existing": True}
     )
-    db.add(db_alert)
-    db.commit()
-    db.refresh(db_alert)
+    db_alert = result.one()
+    # A row folded into an open-window alert is not a new alert
+    if db_alert.occurrence_count == 1:
+        await add_alerts_to_rollups(db, [db_alert])
+    await db.commit()
     return db_alert
 
-def get_alert_by_id(db: Session, alert_id: int) -> Optional[Alert]:
+@instrumented("db.create_alerts_bulk")
+async def create_alerts_bulk(db: AsyncSession, rows: List[dict]) -> List[Alert]:
+    """
+    Insert many alerts with multi-row INSERT ... RETURNING statements in one transaction
+    Returns the created alerts in the same order as rows
+
+    Rows with a dedup_key are folded into open-window alerts like in
+    create_alert; their keys must be unique within rows.
+    """
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    rows = [
+        {"fingerprint": None, "dedup_key": None, "alert_metadata": None, "created_at": now, "first_seen_at": now, "last_seen_at": now, **row}
+        for row in rows
+    ]
+
+    keyed = [row for row in rows if row["dedup_key"] is not None]
+    plain = [row for row in rows if row["dedup_key"] is None]
+
+    # RETURNING order can't be requested together with ON CONFLICT, so upserted
+    # rows are matched back to their input by dedup_key
+    by_key = {}
+    if keyed:
+        result = await db.scalars(
+            _upsert_alerts().returning(Alert),
+            keyed,
+            execution_options={"populate_existing": True}
+        )
+        by_key = {alert.dedup_key: alert for alert in result}
+
+    inserted = iter([])
+    if plain:
+        inserted = iter(list(await db.scalars(
+            insert(Alert).returning(Alert, sort_by_parameter_order=True),
+            plain
+        )))
+
+    alerts = [by_key[row["dedup_key"]] if row["dedup_key"] is not None else next(inserted) for row in rows]
+    await add_alerts_to_rollups(db, [alert for alert in alerts if alert.occurrence_count == 1])
+    await db.commit()
+    return alerts
+
+async def get_alert_by_id(db: AsyncSession, alert_id: int) -> Optional[Alert]:
     """
     Get an alert by its ID
     """
-    return db.query(Alert).filter(Alert.id == alert_id).first()
+    return await db.get(Alert, alert_id)
+
+async def get_alerts_by_ids(db: AsyncSession, alert_ids: List[int]) -> Dict[int, Alert]:
+    """
+    Get several alerts by ID; IDs that no longer exist are left out
+    """
+    if not alert_ids:
+        return {}
+    result = await db.scalars(select(Alert).where(Alert.id.in_(alert_ids)))
+    return {alert.id: alert for alert in result}
+
+def _metadata_field(field: str):
+    # The key is rendered inline rather than as a bind parameter so that the
+    # planner matches the expression indexes on (metadata ->> 'field')
+    return Alert.alert_metadata.op("->>", return_type=Text)(literal_column(f"'{field}'"))
 
-def get_alerts_by_filter(
-    db: Session, 
+def _alert_filters(
     severity: Optional[str] = None,
     source: Optional[str] = None,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None
-) -> List[Alert]:
+    end_date: Optional[datetime] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> list:
     """
-    Get alerts with optional filtering
+    WHERE conditions for the alert list, export and search queries
+    metadata: key -> value the alert's metadata must have. The fields in
+    ALERT_METADATA_FIELDS use their expression indexes, any other key a
+    containment match on the GIN index. Raises ValueError for an invalid IP.
     """
-    query = db.query(Alert)
-    
-    # Apply filters if provided
     filters = []
     if severity:
         filters.append(Alert.severity == severity)
     if source:
         filters.append(Alert.source == source)
+    # asyncpg rejects aware datetimes for the naive created_at column
     if start_date:
-        filters.append(Alert.created_at >= start_date)
+        filters.append(Alert.created_at >= to_naive_utc(start_date))
     if end_date:
-        filters.append(Alert.created_at <= end_date)
-    
+        filters.append(Alert.created_at <= to_naive_utc(end_date))
+    if metadata:
+        other = {}
+        for key, value in metadata.items():
+            if key in ALERT_METADATA_FIELDS:
+                filters.append(_metadata_field(key) == normalize_metadata_field(key, value))
+            else:
+                other[key] = value
+        if other:
+            filters.append(Alert.alert_metadata.contains(other))
+    return filters
+
+async def get_alerts_by_filter(
+    db: AsyncSession,
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> List[Alert]:
+    """
+    Get alerts with optional filtering, newest first
+
+    Pages are read with keyset pagination: pass the (created_at, id) of the
+    last alert of the previous page as `after` to get the next one.
+    """
+    query = select(Alert)
+
+    # Apply filters if provided
+    filters = _alert_filters(severity, source, start_date, end_date, metadata)
+    if after:
+        filters.append(tuple_(Alert.created_at, Alert.id) < tuple_(*after))
+
+    if filters:
+        query = query.where(and_(*filters))
+
+    query = query.order_by(Alert.created_at.desc(), Alert.id.desc())
+    if limit:
+        query = query.limit(limit)
+
+    result = await db.scalars(query)
+    return list(result)
+
+async def stream_alerts_by_filter(
+    db: AsyncSession,
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    batch_size: int = 1000,
+    metadata: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Alert]:
+    """
+    Iterate over all matching alerts, newest first, through a server-side
+    cursor that fetches batch_size rows at a time
+    """
+    query = select(Alert)
+    filters = _alert_filters(severity, source, start_date, end_date, metadata)
     if filters:
-        query = query.filter(and_(*filters))
-    
-    return query.order_by(Alert.created_at.desc()).all()
+        query = query.where(and_(*filters))
+
+    result = await db.stream_scalars(
+        query.order_by(Alert.created_at.desc(), Alert.id.desc()).execution_options(yield_per=batch_size)
+    )
+    async for alert in result:
+        yield alert
+
+# Search modes accepted by search_alerts
+SEARCH_MODES = ["text", "substring", "fuzzy"]
+
+# Deepest page offset served; every skipped row is still matched and ranked
+SEARCH_MAX_OFFSET = 10000
+
+# Whether pg_trgm is installed, looked up on the first fuzzy search
+_pg_trgm_installed: Optional[bool] = None
+
+async def _has_pg_trgm(db: AsyncSession) -> bool:
+    global _pg_trgm_installed
+    if _pg_trgm_installed is None:
+        _pg_trgm_installed = bool(await db.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")))
+    return _pg_trgm_installed
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+async def search_alerts(
+    db: AsyncSession,
+    query: str,
+    mode: str = "text",
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = 50,
+    offset: int = 0,
+    metadata: Optional[Dict[str, Any]] = None
+) -> List[Tuple[Alert, Optional[float]]]:
+    """
+    Search alert messages, best match first
+    - text: web-style full-text query ("mimikatz or 10.0.4.22", quoted phrases,
+      -exclusions) over the search_vector GIN index, ranked by ts_rank_cd
+    - substring: case-insensitive substring match, newest first; uses the
+      pg_trgm index when it exists
+    - fuzzy: pg_trgm word similarity, tolerant of typos; needs the extension
+    Returns (alert, rank) pairs. Raises ValueError for an unknown mode or a
+    fuzzy search without pg_trgm.
+    """
+    filters = _alert_filters(severity, source, start_date, end_date, metadata)
+
+    if mode == "text":
+        tsquery = func.websearch_to_tsquery(text(f"'{ALERT_SEARCH_CONFIG}'::regconfig"), query)
+        rank = func.ts_rank_cd(Alert.search_vector, tsquery)
+        filters.append(Alert.search_vector.op("@@")(tsquery))
+    elif mode == "substring":
+        rank = None
+        filters.append(Alert.message.ilike(f"%{_escape_like(query)}%", escape="\\"))
+    elif mode == "fuzzy":
+        if not await _has_pg_trgm(db):
+            raise ValueError("Fuzzy search needs the pg_trgm extension")
+        rank = func.word_similarity(query, Alert.message)
+        # message %> query is the indexable form of
+        # word_similarity(query, message) >= pg_trgm.word_similarity_threshold
+        filters.append(Alert.message.bool_op("%>")(query))
+    else:
+        raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+
+    order_by = [Alert.created_at.desc(), Alert.id.desc()]
+    if rank is None:
+        statement = select(Alert, null().label("rank"))
+    else:
+        statement = select(Alert, rank.label("rank"))
+        order_by.insert(0, rank.desc())
 
-def update_alert_jira_ticket(db: Session, alert_id: int, jira_ticket_id: str) -> Optional[Alert]:
+    result = await db.execute(
+        statement.where(and_(*filters)).order_by(*order_by).limit(limit).offset(offset)
+    )
+    return [(alert, rank_value) for alert, rank_value in result.all()]
+
+def encode_alert_cursor(alert: Alert) -> str:
+    """
+    Opaque pagination cursor pointing just after the given alert
+    """
+    raw = f"{alert.created_at.isoformat()}|{alert.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_alert_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Inverse of encode_alert_cursor. Raises ValueError for malformed cursors.
+    """
+    try:
+        created_at, alert_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(alert_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+async def update_alert_jira_ticket(db: AsyncSession, alert_id: int, jira_ticket_id: str) -> Optional[Alert]:
     """
     Update an alert with JIRA ticket ID
     """
-    alert = get_alert_by_id(db, alert_id)
+    alert = await get_alert_by_id(db, alert_id)
     if alert:
         alert.jira_ticket_id = jira_ticket_id
-        db.commit()
-        db.refresh(alert)
-    return alert
\ No newline at end of file
+        await db.commit()
+        await db.refresh(alert)
+    return alert
+
+async def set_alert_jira_ticket_if_missing(db: AsyncSession, alert: Alert, jira_ticket_id: str) -> str:
+    """
+    Record a JIRA ticket on an alert unless another one was recorded first
+    Returns the ticket ID stored on the alert afterwards
+    """
+    await db.execute(
+        update(Alert)
+        .where(Alert.id == alert.id, Alert.jira_ticket_id.is_(None))
+        .values(jira_ticket_id=jira_ticket_id)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await db.refresh(alert)
+    return alert.jira_ticket_id
+
+async def update_alert_enrichment_status(
+    db: AsyncSession,
+    alert: Alert,
+    status: str,
+    error: Optional[str] = None,
+    increment_attempts: bool = False
+) -> Alert:
+    """
+    Record the state of an alert's background enrichment job
+    """
+    alert.enrichment_status = status
+    alert.enrichment_error = error
+    if increment_attempts:
+        alert.enrichment_attempts = (alert.enrichment_attempts or 0) + 1
+    await db.commit()
+    await db.refresh(alert)
+    return alert
+
+async def get_alert_ids_pending_enrichment(db: AsyncSession) -> List[int]:
+    """
+    Get IDs of alerts whose enrichment job has not finished yet
+    (used to re-queue work after a restart)
+    """
+    result = await db.scalars(
+        select(Alert.id)
+        .where(Alert.enrichment_status.in_(["queued", "running", "retrying"]))
+        .order_by(Alert.id)
+    )
+    return list(result)
+
+async def get_open_alerts_by_dedup_key(db: AsyncSession, dedup_keys: List[str]) -> List[Alert]:
+    """
+    Get the alerts whose suppression window is open for any of the given keys
+    """
+    if not dedup_keys:
+        return []
+    result = await db.scalars(select(Alert).where(Alert.dedup_key.in_(dedup_keys)))
+    return list(result)
+
+async def add_alert_occurrences(db: AsyncSession, alert_id: int, count: int, last_seen_at: datetime) -> Optional[Alert]:
+    """
+    Fold `count` more occurrences into an alert without loading it first
+    Returns the updated alert, or None if it no longer exists
+    """
+    alert = await db.scalar(
+        update(Alert)
+        .where(Alert.id == alert_id)
+        .values(occurrence_count=Alert.occurrence_count + count, last_seen_at=last_seen_at)
+        .returning(Alert)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    await db.commit()
+    return alert
+
+async def close_dedup_windows(db: AsyncSession, alert_ids: List[int]) -> List[Alert]:
+    """
+    Clear the dedup key of alerts so later occurrences start new alerts
+    Returns the alerts whose window this call closed
+    """
+    if not alert_ids:
+        return []
+    result = await db.scalars(
+        update(Alert)
+        .where(Alert.id.in_(alert_ids), Alert.dedup_key.isnot(None))
+        .values(dedup_key=None)
+        .returning(Alert)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    alerts = list(result)
+    await db.commit()
+    return alerts
+
+async def close_stale_dedup_windows(db: AsyncSession, last_seen_before: datetime) -> List[Alert]:
+    """
+    Clear the dedup key of alerts with no occurrence since last_seen_before,
+    e.g. windows left open by a process that stopped
+    Returns the alerts whose window this call closed
+    """
+    result = await db.scalars(
+        update(Alert)
+        .where(Alert.dedup_key.isnot(None), Alert.last_seen_at < last_seen_before)
+        .values(dedup_key=None)
+        .returning(Alert)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    alerts = list(result)
+    await db.commit()
+    return alerts
+
+async def get_alerts_to_archive(db: AsyncSession, created_before: datetime, limit: int) -> List[Alert]:
+    """
+    The oldest alerts created before created_before, oldest first, leaving
+    out alerts whose enrichment or dedup window is still open
+    """
+    result = await db.scalars(
+        select(Alert)
+        .where(
+            Alert.created_at < created_before,
+            Alert.enrichment_status.notin_(["queued", "running", "retrying"]),
+            Alert.dedup_key.is_(None)
+        )
+        .order_by(Alert.created_at, Alert.id)
+        .limit(limit)
+    )
+    return list(result)
+
+async def delete_alerts(db: AsyncSession, alert_ids: List[int], lock_timeout_ms: int = 2000) -> int:
+    """
+    Delete alerts by ID in one short transaction (their recommendations and
+    embeddings go with them). Gives up with an error instead of queueing
+    behind another lock for longer than lock_timeout_ms.
+    Returns the number of alerts deleted
+    """
+    if not alert_ids:
+        return 0
+    await db.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+    result = await db.execute(
+        delete(Alert)
+        .where(Alert.id.in_(alert_ids))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
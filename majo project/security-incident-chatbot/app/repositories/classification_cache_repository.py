@@ -0,0 +1,31 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from typing import Optional
+from datetime import datetime
+from app.models import ClassificationCacheEntry
+
+async def get_cached_severity(db: AsyncSession, fingerprint: str, not_before: datetime) -> Optional[str]:
+    """
+    Get the stored severity for a message fingerprint, ignoring entries older than not_before
+    """
+    return await db.scalar(
+        select(ClassificationCacheEntry.severity).where(
+            ClassificationCacheEntry.fingerprint == fingerprint,
+            ClassificationCacheEntry.created_at >= not_before
+        )
+    )
+
+async def save_cached_severity(db: AsyncSession, fingerprint: str, severity: str):
+    """
+    Insert or refresh the stored severity for a message fingerprint
+    """
+    now = datetime.utcnow()
+    statement = insert(ClassificationCacheEntry).values(
+        fingerprint=fingerprint, severity=severity, created_at=now
+    )
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[ClassificationCacheEntry.fingerprint],
+        set_={"severity": severity, "created_at": now}
+    ))
+    await db.commit()
@@ -0,0 +1,68 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from datetime import datetime
+from app.models import Alert, AlertEmbedding
+
+async def save_alert_embeddings(db: AsyncSession, model: str, alert_ids: Sequence[int], embeddings: Sequence[bytes]):
+    """
+    Store embeddings for a batch of alerts, replacing existing ones for the same model
+    Alerts deleted in the meantime are skipped.
+    """
+    if not alert_ids:
+        return
+    existing = set(await db.scalars(select(Alert.id).where(Alert.id.in_(alert_ids))))
+    rows = [
+        {"model": model, "alert_id": alert_id, "embedding": embedding, "created_at": datetime.utcnow()}
+        for alert_id, embedding in zip(alert_ids, embeddings) if alert_id in existing
+    ]
+    if rows:
+        statement = insert(AlertEmbedding).values(rows)
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[AlertEmbedding.model, AlertEmbedding.alert_id],
+            set_={"embedding": statement.excluded.embedding, "created_at": statement.excluded.created_at}
+        ))
+    await db.commit()
+
+async def get_alert_embedding(db: AsyncSession, model: str, alert_id: int) -> Optional[bytes]:
+    return await db.scalar(
+        select(AlertEmbedding.embedding).where(AlertEmbedding.model == model, AlertEmbedding.alert_id == alert_id)
+    )
+
+async def stream_alert_embeddings(
+    db: AsyncSession,
+    model: str,
+    limit: int,
+    batch_size: int = 10000
+) -> AsyncIterator[List[Tuple[int, bytes]]]:
+    """
+    (alert_id, embedding) rows for a model, newest alerts first, in batches
+    """
+    result = await db.stream(
+        select(AlertEmbedding.alert_id, AlertEmbedding.embedding)
+        .where(AlertEmbedding.model == model)
+        .order_by(AlertEmbedding.alert_id.desc())
+        .limit(limit)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+async def get_alerts_without_embeddings(
+    db: AsyncSession,
+    model: str,
+    limit: int,
+    before_id: Optional[int] = None
+) -> List[Tuple[int, str]]:
+    """
+    (id, message) of the newest alerts below before_id that have no embedding for the model
+    """
+    missing = ~select(AlertEmbedding.alert_id).where(
+        AlertEmbedding.model == model, AlertEmbedding.alert_id == Alert.id
+    ).exists()
+    query = select(Alert.id, Alert.message).where(missing)
+    if before_id is not None:
+        query = query.where(Alert.id < before_id)
+    result = await db.execute(query.order_by(Alert.id.desc()).limit(limit))
+    return [tuple(row) for row in result.all()]
@@ -0,0 +1,153 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Integer, bindparam, func, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from typing import List, Optional
+from datetime import datetime
+from app.models import Alert, Incident
+
+async def create_incidents(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """
+    Insert incidents with one multi-row INSERT ... RETURNING and commit
+    Returns their IDs in the same order as rows
+    """
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    result = await db.scalars(
+        insert(Incident).returning(Incident.id, sort_by_parameter_order=True),
+        [{"status": "open", "updated_at": now, **row} for row in rows]
+    )
+    ids = list(result)
+    await db.commit()
+    return ids
+
+async def record_incident_activity(db: AsyncSession, updates: List[dict]) -> None:
+    """
+    Add alerts to existing incidents: each update has the incident id, the
+    number of alerts added (count), the latest last_seen, the incident's
+    severity and its entity keys. Not committed.
+    """
+    if not updates:
+        return
+    # Table-level UPDATE: executemany with our own WHERE, not the ORM's by-primary-key form
+    incidents = Incident.__table__
+    await db.execute(
+        update(incidents)
+        .where(incidents.c.id == bindparam("b_id"))
+        .values(
+            status="open",
+            alert_count=incidents.c.alert_count + bindparam("b_count"),
+            last_seen_at=func.greatest(incidents.c.last_seen_at, bindparam("b_last_seen")),
+            severity=bindparam("b_severity"),
+            entities=bindparam("b_entities", type_=incidents.c.entities.type),
+            updated_at=datetime.utcnow()
+        ),
+        [
+            {
+                "b_id": row["id"],
+                "b_count": row["count"],
+                "b_last_seen": row["last_seen"],
+                "b_severity": row["severity"],
+                "b_entities": row["entities"],
+            }
+            for row in updates
+        ]
+    )
+
+async def set_alert_incidents(db: AsyncSession, links: List[tuple]) -> None:
+    """
+    Record the incident of each (alert_id, incident_id) pair with one
+    UPDATE ... FROM unnest(...) statement. Not committed.
+    """
+    if not links:
+        return
+    alert_ids, incident_ids = zip(*links)
+    values = func.unnest(
+        bindparam("alert_ids", list(alert_ids), type_=ARRAY(Integer)),
+        bindparam("incident_ids", list(incident_ids), type_=ARRAY(Integer))
+    ).table_valued("alert_id", "incident_id").render_derived()
+    await db.execute(
+        update(Alert)
+        .where(Alert.id == values.c.alert_id)
+        .values(incident_id=values.c.incident_id)
+        .execution_options(synchronize_session=False)
+    )
+
+async def get_incident_by_id(db: AsyncSession, incident_id: int) -> Optional[Incident]:
+    """
+    Get an incident by its ID
+    """
+    return await db.get(Incident, incident_id)
+
+async def get_incidents(db: AsyncSession, status: Optional[str] = None, limit: int = 100) -> List[Incident]:
+    """
+    Incidents with the most recent activity first
+    """
+    query = select(Incident)
+    if status:
+        query = query.where(Incident.status == status)
+    result = await db.scalars(query.order_by(Incident.last_seen_at.desc(), Incident.id.desc()).limit(limit))
+    return list(result)
+
+async def get_incident_alerts(db: AsyncSession, incident_id: int, limit: int = 100) -> List[Alert]:
+    """
+    The most recent alerts of an incident, newest first
+    """
+    result = await db.scalars(
+        select(Alert)
+        .where(Alert.incident_id == incident_id)
+        .order_by(Alert.id.desc())
+        .limit(limit)
+    )
+    return list(result)
+
+async def get_open_incidents(db: AsyncSession, last_seen_after: datetime) -> List[Incident]:
+    """
+    Open incidents with an alert since last_seen_after, oldest activity first
+    """
+    result = await db.scalars(
+        select(Incident)
+        .where(Incident.status == "open", Incident.last_seen_at >= last_seen_after)
+        .order_by(Incident.last_seen_at)
+    )
+    return list(result)
+
+async def close_stale_incidents(db: AsyncSession, last_seen_before: datetime, first_seen_before: datetime) -> int:
+    """
+    Close open incidents with no alert since last_seen_before, or open since
+    before first_seen_before
+    Returns the number of incidents closed
+    """
+    result = await db.execute(
+        update(Incident)
+        .where(
+            Incident.status == "open",
+            (Incident.last_seen_at < last_seen_before) | (Incident.first_seen_at < first_seen_before)
+        )
+        .values(status="closed", updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+async def set_incident_jira_ticket_if_missing(db: AsyncSession, incident: Incident, jira_ticket_id: str) -> str:
+    """
+    Record the JIRA ticket of an incident unless another one was recorded first
+    Returns the ticket ID stored on the incident afterwards
+    """
+    await db.execute(
+        update(Incident)
+        .where(Incident.id == incident.id, Incident.jira_ticket_id.is_(None))
+        .values(jira_ticket_id=jira_ticket_id)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await db.refresh(incident)
+    return incident.jira_ticket_id
+
+async def set_incident_slack_severity(db: AsyncSession, incident: Incident, severity: str) -> None:
+    """
+    Record the highest severity announced on Slack for an incident
+    """
+    incident.slack_severity = severity
+    await db.commit()
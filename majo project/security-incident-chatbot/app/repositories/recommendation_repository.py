@@ -0,0 +1,63 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, Optional, Sequence
+from datetime import datetime
+from app.models import ResponseRecommendation
+
+async def get_recommendation_for_alert(db: AsyncSession, alert_id: int, prompt_version: str) -> Optional[str]:
+    """
+    Get the stored recommendation for an alert and prompt version
+    """
+    return await db.scalar(
+        select(ResponseRecommendation.recommendation).where(
+            ResponseRecommendation.alert_id == alert_id,
+            ResponseRecommendation.prompt_version == prompt_version
+        )
+    )
+
+async def get_recommendation_by_fingerprint(db: AsyncSession, fingerprint: str, prompt_version: str) -> Optional[str]:
+    """
+    Get the most recent recommendation stored for any alert with the same fingerprint
+    """
+    return await db.scalar(
+        select(ResponseRecommendation.recommendation)
+        .where(
+            ResponseRecommendation.fingerprint == fingerprint,
+            ResponseRecommendation.prompt_version == prompt_version
+        )
+        .order_by(ResponseRecommendation.created_at.desc())
+        .limit(1)
+    )
+
+async def get_latest_recommendations(db: AsyncSession, alert_ids: Sequence[int]) -> Dict[int, str]:
+    """
+    The most recent recommendation of any prompt version for each of the given alerts
+    """
+    if not alert_ids:
+        return {}
+    result = await db.execute(
+        select(ResponseRecommendation.alert_id, ResponseRecommendation.recommendation)
+        .where(ResponseRecommendation.alert_id.in_(alert_ids))
+        .order_by(ResponseRecommendation.alert_id, ResponseRecommendation.created_at.desc())
+        .distinct(ResponseRecommendation.alert_id)
+    )
+    return {alert_id: recommendation for alert_id, recommendation in result.all()}
+
+async def save_recommendation(db: AsyncSession, alert_id: int, prompt_version: str, fingerprint: str, recommendation: str):
+    """
+    Store the recommendation for an alert, replacing any earlier one for the same prompt version
+    """
+    now = datetime.utcnow()
+    statement = insert(ResponseRecommendation).values(
+        alert_id=alert_id,
+        prompt_version=prompt_version,
+        fingerprint=fingerprint,
+        recommendation=recommendation,
+        created_at=now
+    )
+    await db.execute(statement.on_conflict_do_update(
+        constraint="uq_response_recommendations_alert_version",
+        set_={"fingerprint": fingerprint, "recommendation": recommendation, "created_at": now}
+    ))
+    await db.commit()
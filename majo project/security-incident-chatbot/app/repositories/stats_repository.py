@@ -0,0 +1,78 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from typing import Iterable, List, Optional
+from collections import Counter
+from datetime import datetime, timezone
+from app.models import Alert, AlertStatsRollup
+
+# Rollup granularities, finest first
+GRANULARITIES = ["minute", "hour", "day"]
+
+def to_naive_utc(timestamp: Optional[datetime]) -> Optional[datetime]:
+    """
+    Timestamps are stored as naive UTC; convert aware ones (e.g. "...Z" from the UI)
+    """
+    if timestamp is None or timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """
+    Start of the minute/hour/day bucket containing timestamp (same as date_trunc)
+    """
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+async def add_alerts_to_rollups(db: AsyncSession, alerts: Iterable[Alert]):
+    """
+    Count newly inserted alerts into the rollups, as part of the caller's transaction
+    """
+    counts = Counter()
+    for alert in alerts:
+        for granularity in GRANULARITIES:
+            counts[(granularity, bucket_start(alert.created_at, granularity), alert.severity, alert.source)] += 1
+    if not counts:
+        return
+
+    # Rows are upserted in key order so concurrent inserts lock them in the same order
+    statement = insert(AlertStatsRollup).values([
+        {"granularity": granularity, "bucket_start": start, "severity": severity, "source": source, "count": count}
+        for (granularity, start, severity, source), count in sorted(counts.items())
+    ])
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "severity", "source"],
+        set_={"count": AlertStatsRollup.count + statement.excluded["count"]}
+    ))
+
+async def get_alert_stats(
+    db: AsyncSession,
+    granularity: str,
+    start_date: datetime,
+    end_date: datetime,
+    severity: Optional[str] = None,
+    source: Optional[str] = None
+) -> List[tuple]:
+    """
+    Alert counts per (bucket_start, severity, source) for buckets starting in
+    [bucket_start(start_date), end_date)
+    """
+    query = select(
+        AlertStatsRollup.bucket_start,
+        AlertStatsRollup.severity,
+        AlertStatsRollup.source,
+        AlertStatsRollup.count
+    ).where(
+        AlertStatsRollup.granularity == granularity,
+        AlertStatsRollup.bucket_start >= bucket_start(start_date, granularity),
+        AlertStatsRollup.bucket_start < end_date
+    )
+    if severity:
+        query = query.where(AlertStatsRollup.severity == severity)
+    if source:
+        query = query.where(AlertStatsRollup.source == source)
+
+    return list(await db.execute(query.order_by(AlertStatsRollup.bucket_start)))
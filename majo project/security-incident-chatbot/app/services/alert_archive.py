@@ -0,0 +1,211 @@
+import os
+import json
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from app.models import Alert, ALERT_METADATA_FIELDS, normalize_metadata_field
+from app.repositories.stats_repository import to_naive_utc
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Columns of the archive files. day and severity are not stored in the
+# files: they are the partition directories (day=2026-01-31/severity=High).
+# The indexed metadata fields get their own columns so filters on them are
+# pushed down to the row group statistics; the full metadata is kept as JSON.
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("source", pa.string()),
+    ("message", pa.string()),
+    ("created_at", pa.timestamp("us")),
+    ("classified_by", pa.string()),
+    ("jira_ticket_id", pa.string()),
+    ("enrichment_status", pa.string()),
+    ("slack_notified", pa.bool_()),
+    ("fingerprint", pa.string()),
+    ("occurrence_count", pa.int32()),
+    ("first_seen_at", pa.timestamp("us")),
+    ("last_seen_at", pa.timestamp("us")),
+    ("incident_id", pa.int64()),
+    *((field, pa.string()) for field in ALERT_METADATA_FIELDS),
+    ("metadata", pa.string()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("day", pa.string()), ("severity", pa.string())]), flavor="hive")
+# What a query reads: the file columns plus severity from the partition path
+DATASET_SCHEMA = ARCHIVE_SCHEMA.append(pa.field("severity", pa.string()))
+
+def _open_filesystem(uri: str) -> Tuple[pafs.FileSystem, str]:
+    """
+    Filesystem and base path for a local path (relative to the application
+    directory) or an object store URI such as s3://bucket/alerts
+    """
+    if "://" in uri:
+        return pafs.FileSystem.from_uri(uri)
+    return pafs.LocalFileSystem(), os.path.join(APP_DIR, uri)
+
+class AlertArchive:
+    """
+    Archived alerts as Parquet files partitioned by day and severity.
+
+    Each archived batch writes one file per (day, severity) it covers,
+    named after the batch's first and last alert ID, so archiving the same
+    batch again after a crash replaces its files instead of duplicating them.
+    Queries read the newest day partitions first and stop once they have
+    enough rows; the date, severity, source and indexed metadata filters are
+    pushed down to the partitions and row group statistics.
+    """
+
+    def __init__(self, uri: str, compression: str = "zstd"):
+        self.uri = uri
+        self.compression = compression
+        # Opened on first use: an object store client is not needed while retention is off
+        self._filesystem: Optional[Tuple[pafs.FileSystem, str]] = None
+        self.files_written = 0
+
+    def _location(self) -> Tuple[pafs.FileSystem, str]:
+        if self._filesystem is None:
+            self._filesystem = _open_filesystem(self.uri)
+        return self._filesystem
+
+    @property
+    def filesystem(self) -> pafs.FileSystem:
+        return self._location()[0]
+
+    @property
+    def base_path(self) -> str:
+        return self._location()[1]
+
+    def write(self, alerts: List[Alert]) -> int:
+        """
+        Write alerts to the archive. Blocking; run it in an executor.
+        Returns the number of files written
+        """
+        if not alerts:
+            return 0
+        first_id = min(alert.id for alert in alerts)
+        last_id = max(alert.id for alert in alerts)
+        partitions: Dict[Tuple[str, str], List[Alert]] = defaultdict(list)
+        for alert in alerts:
+            partitions[(alert.created_at.date().isoformat(), alert.severity)].append(alert)
+
+        for (day, severity), rows in partitions.items():
+            directory = f"{self.base_path}/day={day}/severity={quote(severity, safe='')}"
+            self.filesystem.create_dir(directory, recursive=True)
+            table = pa.Table.from_pylist([_archive_row(alert) for alert in rows], schema=ARCHIVE_SCHEMA)
+            # Written under a name dataset discovery skips, then moved into place
+            staging = f"{directory}/_{uuid.uuid4().hex}.tmp"
+            pq.write_table(table, staging, filesystem=self.filesystem, compression=self.compression)
+            self.filesystem.move(staging, f"{directory}/part-{first_id}-{last_id}.parquet")
+        self.files_written += len(partitions)
+        return len(partitions)
+
+    def query(
+        self,
+        severity: Optional[str] = None,
+        source: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        after: Optional[Tuple[datetime, int]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Alert]:
+        """
+        Archived alerts matching the same filters as get_alerts_by_filter,
+        newest first, as detached Alert objects. Metadata keys outside
+        ALERT_METADATA_FIELDS match top-level values only. Blocking; run it
+        in an executor.
+        """
+        start_date = to_naive_utc(start_date) if start_date else None
+        end_date = to_naive_utc(end_date) if end_date else None
+        # Days after the cursor were read by earlier pages
+        newest = min(end_date, after[0]) if end_date and after else end_date or (after[0] if after else None)
+        days = self._days(start_date, newest)
+        if not days:
+            return []
+
+        condition = self._filter(severity, source, start_date, end_date, after, metadata)
+        other = {key: value for key, value in (metadata or {}).items() if key not in ALERT_METADATA_FIELDS}
+        alerts: List[Alert] = []
+        for day in days:
+            dataset = ds.dataset(
+                f"{self.base_path}/day={day}", format="parquet", filesystem=self.filesystem,
+                partitioning=PARTITIONING, partition_base_dir=self.base_path, schema=DATASET_SCHEMA
+            )
+            table = dataset.to_table(filter=condition)
+            if table.num_rows == 0:
+                continue
+            table = table.sort_by([("created_at", "descending"), ("id", "descending")])
+            for row in table.to_pylist():
+                alert = _alert_from_row(row)
+                if other and not all((alert.alert_metadata or {}).get(key) == value for key, value in other.items()):
+                    continue
+                alerts.append(alert)
+                if len(alerts) >= limit:
+                    return alerts
+        return alerts
+
+    def _days(self, start_date: Optional[datetime], end_date: Optional[datetime]) -> List[str]:
+        """
+        The day partitions in the date range, newest first
+        """
+        selector = pafs.FileSelector(self.base_path, allow_not_found=True)
+        days = []
+        for info in self.filesystem.get_file_info(selector):
+            name = info.base_name
+            if info.type != pafs.FileType.Directory or not name.startswith("day="):
+                continue
+            day = name[len("day="):]
+            if start_date and day < start_date.date().isoformat():
+                continue
+            if end_date and day > end_date.date().isoformat():
+                continue
+            days.append(day)
+        return sorted(days, reverse=True)
+
+    def _filter(self, severity, source, start_date, end_date, after, metadata) -> Optional[ds.Expression]:
+        conditions = []
+        if severity:
+            conditions.append(ds.field("severity") == severity)
+        if source:
+            conditions.append(ds.field("source") == source)
+        if start_date:
+            conditions.append(ds.field("created_at") >= pa.scalar(start_date, pa.timestamp("us")))
+        if end_date:
+            conditions.append(ds.field("created_at") <= pa.scalar(end_date, pa.timestamp("us")))
+        if after:
+            created_at = pa.scalar(after[0], pa.timestamp("us"))
+            conditions.append(
+                (ds.field("created_at") < created_at)
+                | ((ds.field("created_at") == created_at) & (ds.field("id") < after[1]))
+            )
+        for key, value in (metadata or {}).items():
+            if key in ALERT_METADATA_FIELDS:
+                conditions.append(ds.field(key) == normalize_metadata_field(key, value))
+        if not conditions:
+            return None
+        condition = conditions[0]
+        for other in conditions[1:]:
+            condition = condition & other
+        return condition
+
+    def stats(self) -> dict:
+        return {"uri": self.uri, "files_written": self.files_written}
+
+def _archive_row(alert: Alert) -> dict:
+    metadata = alert.alert_metadata or {}
+    row = {name: getattr(alert, name) for name in ARCHIVE_SCHEMA.names if name not in ALERT_METADATA_FIELDS and name != "metadata"}
+    for field in ALERT_METADATA_FIELDS:
+        row[field] = metadata.get(field)
+    row["metadata"] = json.dumps(metadata) if alert.alert_metadata else None
+    return row
+
+def _alert_from_row(row: dict) -> Alert:
+    metadata = row.pop("metadata")
+    for field in ALERT_METADATA_FIELDS:
+        row.pop(field)
+    return Alert(**row, alert_metadata=json.loads(metadata) if metadata else None)
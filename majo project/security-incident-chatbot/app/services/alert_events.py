@@ -0,0 +1,220 @@
+import os
+import json
+import asyncio
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set
+import asyncpg
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from app.database import ASYNC_DATABASE_URL
+from app.models import Alert, AlertResponse
+
+# Load environment variables
+load_dotenv()
+
+# Live alert feed configuration
+ALERT_EVENTS_ENABLED = os.getenv("ALERT_EVENTS_ENABLED", "true").lower() == "true"
+# "memory" delivers within this process; "postgres" uses LISTEN/NOTIFY so
+# clients of every uvicorn worker see alerts stored by any of them
+ALERT_EVENTS_BACKEND = os.getenv("ALERT_EVENTS_BACKEND", "memory")
+ALERT_EVENTS_CHANNEL = os.getenv("ALERT_EVENTS_CHANNEL", "alert_events")
+# Events buffered per client; a client that falls further behind is disconnected
+ALERT_EVENTS_CLIENT_QUEUE = int(os.getenv("ALERT_EVENTS_CLIENT_QUEUE", "1000"))
+# Events buffered for NOTIFY while the listener connection is down; older ones are dropped
+ALERT_EVENTS_BUFFER = int(os.getenv("ALERT_EVENTS_BUFFER", "10000"))
+# Messages are cut to this length in events (NOTIFY payloads are limited to 8000 bytes)
+ALERT_EVENTS_MAX_MESSAGE = int(os.getenv("ALERT_EVENTS_MAX_MESSAGE", "1000"))
+
+# Largest NOTIFY payload sent; Postgres rejects payloads of 8000 bytes or more
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+@dataclass(eq=False)
+class Subscription:
+    # None receives every severity
+    severities: Optional[Set[str]] = None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=ALERT_EVENTS_CLIENT_QUEUE))
+    # Set when the subscriber fell behind and was dropped
+    overflowed: bool = False
+
+    def wants(self, severity: str) -> bool:
+        return self.severities is None or severity in self.severities
+
+class AlertEventBroker:
+    """
+    Fans alert.created / alert.updated events out to live feed subscribers
+    (the /ws/alerts WebSocket). Each event is serialized once and the same
+    string is handed to every subscriber whose severity filter matches.
+
+    With the postgres backend, publish() only buffers the event. A background
+    task sends the buffered events in batches with NOTIFY. Every process,
+    including the sender, delivers them when the notification arrives on its
+    LISTEN connection, so a client sees each event once whichever worker
+    stored the alert.
+    """
+
+    def __init__(self, backend: str = ALERT_EVENTS_BACKEND):
+        self.backend = backend
+        self.subscriptions: Set[Subscription] = set()
+        self._outgoing: List[str] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._connection = None
+        self.published = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+        self.dropped_events = 0
+        self.notifications = 0
+        self.errors = 0
+
+    async def start(self):
+        if self.backend == "postgres":
+            self._task = asyncio.create_task(self._run_postgres(), name="alert-events")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for subscription in list(self.subscriptions):
+            self._drop(subscription)
+
+    def subscribe(self, severities: Optional[Iterable[str]] = None) -> Subscription:
+        subscription = Subscription(set(severities) if severities else None)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    def publish(self, event_type: str, alerts: Iterable[Alert]):
+        """
+        Announce that alerts were created or updated ("alert.created" / "alert.updated")
+        """
+        if not ALERT_EVENTS_ENABLED:
+            return
+        if self.backend != "postgres" and not self.subscriptions:
+            return
+        for alert in alerts:
+            snapshot = AlertResponse.model_validate(alert, from_attributes=True).model_dump(mode="json")
+            snapshot["message"] = snapshot["message"][:ALERT_EVENTS_MAX_MESSAGE]
+            event = {"type": event_type, "alert": snapshot}
+            self.published += 1
+            if self.backend == "postgres":
+                self._outgoing.append(json.dumps(event))
+                self._trim_outgoing()
+                self._wakeup.set()
+            else:
+                self._deliver(event)
+
+    def _trim_outgoing(self):
+        """
+        Keep at most ALERT_EVENTS_BUFFER unsent events, dropping the oldest
+        """
+        overflow = len(self._outgoing) - ALERT_EVENTS_BUFFER
+        if overflow > 0:
+            del self._outgoing[:overflow]
+            self.dropped_events += overflow
+
+    def _deliver(self, event: dict):
+        severity = event["alert"]["severity"]
+        text = None
+        for subscription in list(self.subscriptions):
+            if not subscription.wants(severity):
+                continue
+            if text is None:
+                text = json.dumps(event)
+            try:
+                subscription.queue.put_nowait(text)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self._drop(subscription)
+                subscription.overflowed = True
+                self.dropped_subscribers += 1
+
+    def _drop(self, subscription: Subscription):
+        """
+        Disconnect a subscriber; its reader gets None and closes the socket
+        """
+        self.subscriptions.discard(subscription)
+        # Make room for the end-of-stream marker
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.notifications += 1
+        try:
+            events = json.loads(payload)
+        except ValueError as e:
+            self.errors += 1
+            print(f"Invalid alert event notification: {e}")
+            return
+        for event in events:
+            self._deliver(event)
+
+    async def _run_postgres(self):
+        dsn = make_url(ASYNC_DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                self._connection = await asyncpg.connect(dsn)
+                await self._connection.add_listener(ALERT_EVENTS_CHANNEL, self._on_notification)
+                while True:
+                    await self._wakeup.wait()
+                    self._wakeup.clear()
+                    await self._send_outgoing()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"Alert event listener error, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                if self._connection is not None:
+                    await self._connection.close(timeout=5)
+                    self._connection = None
+
+    async def _send_outgoing(self):
+        """
+        NOTIFY the buffered events, packed into as few payloads as fit
+        """
+        events, self._outgoing = self._outgoing, []
+        sent = 0
+        try:
+            batch, size = [], 2
+            for event in events:
+                # json.dumps escapes non-ASCII, so characters are bytes
+                if batch and size + len(event) + 1 > NOTIFY_PAYLOAD_LIMIT:
+                    await self._notify(batch)
+                    sent += len(batch)
+                    batch, size = [], 2
+                batch.append(event)
+                size += len(event) + 1
+            if batch:
+                await self._notify(batch)
+                sent += len(batch)
+        except BaseException:
+            # Put the unsent events back in front of those published meanwhile
+            self._outgoing = events[sent:] + self._outgoing
+            self._trim_outgoing()
+            self._wakeup.set()
+            raise
+
+    async def _notify(self, batch: List[str]):
+        await self._connection.execute("SELECT pg_notify($1, $2)", ALERT_EVENTS_CHANNEL, "[" + ",".join(batch) + "]")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": ALERT_EVENTS_ENABLED,
+            "backend": self.backend,
+            "subscribers": len(self.subscriptions),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped_subscribers,
+            "buffered_events": len(self._outgoing),
+            "dropped_events": self.dropped_events,
+            "notifications": self.notifications,
+            "errors": self.errors,
+        }
+
+# Shared broker used by the API, the ingest pipeline and background workers
+alert_events = AlertEventBroker()
@@ -0,0 +1,215 @@
+import os
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Union
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Alert, AlertCreate
+from app.repositories.alert_repository import (
+    create_alert,
+    create_alerts_bulk,
+    get_alert_by_id,
+    add_alert_occurrences,
+    get_alerts_by_ids,
+    alert_metadata_value
+)
+from app.services.classification_service import classify_alert
+from app.services.enrichment_queue import enrichment_queue
+from app.services.deduplication import alert_deduplicator, alert_fingerprint, DEDUP_ENABLED
+from app.services.similarity import similar_alert_index
+from app.services.alert_events import alert_events
+from app.services.correlation import incident_correlator
+
+# Load environment variables
+load_dotenv()
+
+# Maximum number of bulk items classified at the same time
+BULK_CLASSIFY_CONCURRENCY = int(os.getenv("BULK_CLASSIFY_CONCURRENCY", "50"))
+
+# Maximum number of rows written by one multi-row insert
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000"))
+# Longest NDJSON line accepted by /process_alerts/bulk (bytes)
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", "1048576"))
+
+# Severities that get a JIRA ticket and a Slack notification
+ENRICHED_SEVERITIES = ["High", "Critical"]
+
+@dataclass
+class IngestedAlert:
+    alert: Alert
+    # True when the item was folded into an existing alert instead of stored
+    deduplicated: bool = False
+
+def enrichment_status_for(severity: str) -> str:
+    return "queued" if severity in ENRICHED_SEVERITIES else "skipped"
+
+async def _correlate(db: AsyncSession, alerts: List[Alert]):
+    """
+    Group newly stored alerts into incidents. Best effort: an alert left
+    without an incident is still enriched on its own.
+    """
+    new_alerts = [alert for alert in alerts if alert.occurrence_count == 1]
+    try:
+        await incident_correlator.correlate(db, new_alerts)
+    except Exception as e:
+        print(f"Incident correlation failed for {len(new_alerts)} alerts: {e}")
+        await db.rollback()
+        # The rollback expired the stored alerts; load them again
+        await get_alerts_by_ids(db, [alert.id for alert in new_alerts])
+
+def _after_store(new_alert: Alert) -> bool:
+    """
+    Track the dedup window of a stored alert, queue its enrichment and
+    embedding, and announce it on the live feed
+    Returns: True if the row was folded into an existing alert by the database
+    (a duplicate that raced past the in-memory window)
+    """
+    if new_alert.dedup_key is not None:
+        alert_deduplicator.track(new_alert)
+    if new_alert.occurrence_count > 1:
+        alert_events.publish("alert.updated", [new_alert])
+        return True
+    alert_events.publish("alert.created", [new_alert])
+    similar_alert_index.enqueue(new_alert)
+    if new_alert.enrichment_status == "queued":
+        enrichment_queue.enqueue(new_alert.id)
+    return False
+
+async def ingest_alert(db: AsyncSession, alert: AlertCreate) -> IngestedAlert:
+    """
+    Classify and store a single alert, correlate it into an incident and
+    queue enrichment for High/Critical ones
+    Duplicates inside an open suppression window are folded into the original
+    alert, which is returned instead
+    """
+    fingerprint = alert_fingerprint(alert.source, alert.message)
+
+    if DEDUP_ENABLED:
+        original_id = alert_deduplicator.fold(fingerprint)
+        if original_id is not None:
+            original = await get_alert_by_id(db, original_id)
+            if original:
+                return IngestedAlert(original, deduplicated=True)
+        folded = await alert_deduplicator.fold_open(db, [fingerprint])
+        if fingerprint in folded:
+            return IngestedAlert(folded[fingerprint], deduplicated=True)
+
+    # Classify severity, recording which stage decided it
+    severity, classified_by = await classify_alert(alert.message)
+
+    # Create the alert in the database
+    new_alert = await create_alert(
+        db, alert, severity, enrichment_status_for(severity), classified_by,
+        fingerprint=fingerprint, dedup_key=fingerprint if DEDUP_ENABLED else None
+    )
+    await _correlate(db, [new_alert])
+    return IngestedAlert(new_alert, deduplicated=_after_store(new_alert))
+
+async def ingest_alerts(db: AsyncSession, alerts: List[AlertCreate]) -> List[Union[IngestedAlert, Exception]]:
+    """
+    Classify a batch of alerts in parallel and store them with one multi-row insert
+    Only the first occurrence of each fingerprint is classified and stored;
+    duplicates (in the batch or in an open window) are folded into it.
+    Returns one entry per input alert: the stored or folded-into Alert, or the
+    exception that prevented it from being classified
+    """
+    fingerprints = [alert_fingerprint(alert.source, alert.message) for alert in alerts]
+
+    # Index of the first item with each fingerprint that is not already folded
+    leaders = {}
+    # Fingerprints with an open window: {fingerprint: alert id}
+    folded = {}
+    for index, fingerprint in enumerate(fingerprints):
+        if not DEDUP_ENABLED:
+            leaders[index] = index
+            continue
+        if fingerprint in folded or fingerprint in leaders:
+            continue
+        original_id = alert_deduplicator.fold(fingerprint)
+        if original_id is not None:
+            folded[fingerprint] = original_id
+        else:
+            leaders[fingerprint] = index
+
+    if DEDUP_ENABLED:
+        for fingerprint, original in (await alert_deduplicator.fold_open(db, list(leaders))).items():
+            folded[fingerprint] = original.id
+            del leaders[fingerprint]
+
+    semaphore = asyncio.Semaphore(BULK_CLASSIFY_CONCURRENCY)
+
+    async def classify(message: str):
+        async with semaphore:
+            return await classify_alert(message)
+
+    leader_indexes = list(leaders.values())
+    classifications = await asyncio.gather(
+        *(classify(alerts[index].message) for index in leader_indexes), return_exceptions=True
+    )
+
+    rows = []
+    stored_indexes = []
+    outcomes = {}
+    for index, classification in zip(leader_indexes, classifications):
+        if isinstance(classification, Exception):
+            outcomes[index] = classification
+            continue
+        severity, classified_by = classification
+        stored_indexes.append(index)
+        rows.append({
+            "source": alerts[index].source,
+            "message": alerts[index].message,
+            "alert_metadata": alert_metadata_value(alerts[index]),
+            "severity": severity,
+            "classified_by": classified_by,
+            "enrichment_status": enrichment_status_for(severity),
+            "fingerprint": fingerprints[index],
+            "dedup_key": fingerprints[index] if DEDUP_ENABLED else None,
+        })
+
+    stored = await create_alerts_bulk(db, rows)
+    await _correlate(db, stored)
+    for index, new_alert in zip(stored_indexes, stored):
+        outcomes[index] = IngestedAlert(new_alert, deduplicated=_after_store(new_alert))
+
+    # Alerts folded into by this batch, loaded once each
+    originals = {}
+    for original_id in set(folded.values()):
+        originals[original_id] = await get_alert_by_id(db, original_id)
+
+    # The first occurrence of each folded fingerprint was counted above; count the rest
+    counted = set(folded)
+    untracked = defaultdict(int)
+    results: List[Union[IngestedAlert, Exception]] = []
+    for index, fingerprint in enumerate(fingerprints):
+        if index in outcomes:
+            results.append(outcomes[index])
+            continue
+
+        if fingerprint in folded:
+            target = originals[folded[fingerprint]]
+            if target is None:
+                results.append(LookupError(f"Alert {folded[fingerprint]} no longer exists"))
+                continue
+        else:
+            # Duplicate of an earlier item in this batch
+            leader = outcomes[leaders[fingerprint]]
+            if isinstance(leader, Exception):
+                results.append(leader)
+                continue
+            target = leader.alert
+
+        if fingerprint in counted:
+            counted.discard(fingerprint)
+        elif alert_deduplicator.fold(fingerprint) is None:
+            untracked[target.id] += 1
+        results.append(IngestedAlert(target, deduplicated=True))
+
+    for alert_id, count in untracked.items():
+        updated = await add_alert_occurrences(db, alert_id, count, datetime.utcnow())
+        if updated is not None:
+            alert_events.publish("alert.updated", [updated])
+
+    return results
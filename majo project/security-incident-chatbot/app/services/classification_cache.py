@@ -0,0 +1,188 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from app.database import AsyncSessionLocal
+from app.repositories.classification_cache_repository import get_cached_severity, save_cached_severity
+
+# Load environment variables
+load_dotenv()
+
+# Classification cache configuration
+CLASSIFICATION_CACHE_ENABLED = os.getenv("CLASSIFICATION_CACHE_ENABLED", "true").lower() == "true"
+CLASSIFICATION_CACHE_SIZE = int(os.getenv("CLASSIFICATION_CACHE_SIZE", "10000"))
+CLASSIFICATION_CACHE_TTL_SECONDS = float(os.getenv("CLASSIFICATION_CACHE_TTL_SECONDS", "3600"))
+CLASSIFICATION_CACHE_PERSIST = os.getenv("CLASSIFICATION_CACHE_PERSIST", "false").lower() == "true"
+
+# Volatile parts of an alert message, masked in this order before hashing
+_NORMALIZE_PATTERNS = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:z|[+-]\d{2}:?\d{2})?\b"), "<ts>"),
+    (re.compile(r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}\b"), "<ts>"),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:\.\d+)?\b"), "<ts>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"), "<uuid>"),
+    (re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}(?::\d{1,5})?\b"), "<ip>"),
+    (re.compile(r"(?<![\w:])(?:[0-9a-f]{0,4}:){2,7}[0-9a-f]{1,4}(?![\w:])"), "<ip>"),
+    (re.compile(r"\b[0-9a-f]{32,64}\b"), "<hash>"),
+    (re.compile(r"\b(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+(?:local|lan|corp|internal|com|net|org|io)\b"), "<host>"),
+    (re.compile(r"\d+"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+def normalize_message(message: str) -> str:
+    """
+    Mask timestamps, UUIDs, IPs, hashes, hostnames and numbers so that
+    repeats of the same alert text map to the same string
+    """
+    normalized = message.lower()
+    for pattern, replacement in _NORMALIZE_PATTERNS:
+        normalized = pattern.sub(replacement, normalized)
+    return normalized.strip()
+
+def message_fingerprint(message: str) -> str:
+    """
+    SHA-256 hex digest of the normalized message
+    """
+    return hashlib.sha256(normalize_message(message).encode("utf-8")).hexdigest()
+
+class LRUTTLCache:
+    """
+    In-memory LRU cache whose entries also expire after ttl_seconds
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class ClassificationCache:
+    """
+    Severity cache in front of the LLM classifier, keyed on the fingerprint
+    of the normalized alert message.
+
+    Lookups go to the in-memory LRU tier first, then (with
+    CLASSIFICATION_CACHE_PERSIST) to the classification_cache table.
+    Concurrent misses for the same fingerprint share a single classification.
+    """
+
+    def __init__(
+        self,
+        max_size: int = CLASSIFICATION_CACHE_SIZE,
+        ttl_seconds: float = CLASSIFICATION_CACHE_TTL_SECONDS,
+        persist: bool = CLASSIFICATION_CACHE_PERSIST
+    ):
+        self.memory = LRUTTLCache(max_size, ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.persist = persist
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_classify(self, message: str, classify: Callable[[str], Awaitable[str]]) -> Tuple[str, bool]:
+        """
+        Return the cached severity for a message, calling classify(message) on a miss
+        Returns: (severity, True if no new classification was needed)
+        """
+        fingerprint = message_fingerprint(message)
+
+        severity = self.memory.get(fingerprint)
+        if severity is not None:
+            self.hits += 1
+            return severity, True
+
+        inflight = self._inflight.get(fingerprint)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[fingerprint] = future
+        try:
+            severity = await self._load(fingerprint)
+            cached = severity is not None
+            if cached:
+                self.persistent_hits += 1
+            else:
+                self.misses += 1
+                severity = await classify(message)
+                await self._store(fingerprint, severity)
+            self.memory.set(fingerprint, severity)
+            future.set_result(severity)
+            return severity, cached
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[fingerprint]
+
+    async def _load(self, fingerprint: str) -> Optional[str]:
+        if not self.persist:
+            return None
+        try:
+            async with AsyncSessionLocal() as db:
+                not_before = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+                return await get_cached_severity(db, fingerprint, not_before)
+        except Exception as e:
+            print(f"Error reading classification cache: {e}")
+            return None
+
+    async def _store(self, fingerprint: str, severity: str):
+        if not self.persist:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await save_cached_severity(db, fingerprint, severity)
+        except Exception as e:
+            print(f"Error writing classification cache: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": CLASSIFICATION_CACHE_ENABLED,
+            "persistent": self.persist,
+            "size": len(self.memory),
+            "max_size": self.memory.max_size,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.memory.evictions,
+            "expirations": self.memory.expirations,
+        }
+
+# Shared cache instance used by the OpenAI service
+classification_cache = ClassificationCache()
@@ -0,0 +1,38 @@
+from typing import Tuple
+from app.services.openai_service import classify_alert_severity
+from app.services.llm_gateway import LLMUnavailableError
+from app.services.preclassifier import preclassifier, PRECLASSIFIER_ENABLED
+from app.services.classification_cache import classification_cache, CLASSIFICATION_CACHE_ENABLED
+from app.observability import instrumented, record_classification
+
+@instrumented("classify")
+async def classify_alert(message: str) -> Tuple[str, str]:
+    """
+    Classify the severity of an alert, cheapest stage first:
+    1. Local pre-classifier (rules, then the trained model if present)
+    2. Classification cache keyed on the normalized message
+    3. OpenAI
+    Returns: (severity, stage) where stage is "rules", "model", "cache", "llm"
+    or "fallback"
+
+    When the LLM gateway gives up (circuit open, deadline passed, retries
+    exhausted) the pre-classifier's best guess is used instead of failing
+    ingest; those alerts are marked classified_by="fallback".
+    """
+    if PRECLASSIFIER_ENABLED:
+        decision = preclassifier.classify(message)
+        if decision:
+            record_classification(decision.stage, decision.severity)
+            return decision.severity, decision.stage
+
+    try:
+        if CLASSIFICATION_CACHE_ENABLED:
+            severity, cached = await classification_cache.get_or_classify(message, classify_alert_severity)
+            stage = "cache" if cached else "llm"
+        else:
+            severity, stage = await classify_alert_severity(message), "llm"
+    except LLMUnavailableError:
+        severity, stage = preclassifier.fallback(message).severity, "fallback"
+    
+    record_classification(stage, severity)
+    return severity, stage
@@ -0,0 +1,353 @@
+import os
+import re
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.models import Alert, Incident
+from app.repositories.incident_repository import (
+    create_incidents,
+    record_incident_activity,
+    set_alert_incidents,
+    get_open_incidents,
+    close_stale_incidents
+)
+from app.observability import instrumented
+
+# Load environment variables
+load_dotenv()
+
+# Correlation configuration
+CORRELATION_ENABLED = os.getenv("CORRELATION_ENABLED", "true").lower() == "true"
+# An incident takes new alerts until none has arrived for this long...
+CORRELATION_WINDOW_SECONDS = float(os.getenv("CORRELATION_WINDOW_SECONDS", "900"))
+# ...or until it has been open this long, so a shared entity can't grow one incident forever
+CORRELATION_MAX_INCIDENT_SECONDS = float(os.getenv("CORRELATION_MAX_INCIDENT_SECONDS", "86400"))
+# Open incidents and entities per incident kept in the in-memory index
+CORRELATION_MAX_INCIDENTS = int(os.getenv("CORRELATION_MAX_INCIDENTS", "100000"))
+CORRELATION_MAX_ENTITIES = int(os.getenv("CORRELATION_MAX_ENTITIES", "256"))
+# How often incidents past the window are closed in the database
+CORRELATION_CLOSE_SECONDS = float(os.getenv("CORRELATION_CLOSE_SECONDS", "60"))
+# Entity keys that never correlate, e.g. a proxy or DNS server seen in every alert
+CORRELATION_IGNORED_ENTITIES = frozenset(
+    entity.strip().lower() for entity in os.getenv("CORRELATION_IGNORED_ENTITIES", "").split(",") if entity.strip()
+) | {"ip:0.0.0.0", "ip:127.0.0.1", "ip:255.255.255.255"}
+
+SEVERITY_RANK = {"Low": 0, "Medium": 1, "High": 2, "Critical": 3}
+
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_ENTITY_PATTERN = re.compile(
+    rf"(?P<ip>\b{_OCTET}(?:\.{_OCTET}){{3}}\b)"
+    r"|(?P<hash>\b(?:[a-f0-9]{64}|[a-f0-9]{40}|[a-f0-9]{32})\b)"
+    # user alice, account svc_backup, login for bob, user=CORP\carol, dave@corp.com
+    r"|(?:\b(?:user(?:name)?|account|login for|logon for)[\s:=]+['\"]?(?P<user>[\w.$\\@-]+))"
+    r"|(?P<email>\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+    # host eng-ws-4, on fin-ws-12, from db01: a name with a digit, a hyphen or a dot
+    r"|(?:\b(?:host(?:name)?|server|workstation|endpoint|device|on|from|to)[\s:=]+(?=[a-z][\w.-]*[\d.-])(?P<host>[a-z][\w-]*(?:\.[a-z0-9][\w-]*)*))"
+    r"|(?P<fqdn>\b(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z]{2,}\b)",
+    re.IGNORECASE
+)
+# Names that look like domains but are files
+_FILE_EXTENSIONS = {
+    "exe", "dll", "sys", "ps1", "bat", "cmd", "vbs", "js", "jar", "msi", "sh", "py",
+    "zip", "rar", "7z", "txt", "log", "csv", "doc", "docx", "xls", "xlsx", "pdf", "tmp", "dat", "bin"
+}
+
+def extract_entities(message: str, ignored: FrozenSet[str] = CORRELATION_IGNORED_ENTITIES) -> Set[str]:
+    """
+    Entity keys found in an alert message: "ip:10.0.4.22", "hash:<hex>",
+    "user:svc_backup", "host:fin-ws-12" (host names and domains)
+    """
+    entities = set()
+    for match in _ENTITY_PATTERN.finditer(message):
+        kind = match.lastgroup
+        value = match.group(kind).lower().rstrip(".-")
+        if kind in ("host", "fqdn"):
+            if "." in value:
+                if value.rsplit(".", 1)[-1] in _FILE_EXTENSIONS:
+                    continue
+            elif not any(char.isdigit() or char == "-" for char in value):
+                # "on monday", "from backup": only names with a digit or a hyphen are hosts
+                continue
+            kind = "host"
+        elif kind == "email":
+            kind = "user"
+        entity = f"{kind}:{value}"
+        if entity not in ignored:
+            entities.add(entity)
+    return entities
+
+def metadata_entities(metadata: Optional[dict], ignored: FrozenSet[str] = CORRELATION_IGNORED_ENTITIES) -> Set[str]:
+    """
+    Entity keys from an alert's structured metadata (src_ip, dst_ip, host, user)
+    """
+    entities = set()
+    if not metadata:
+        return entities
+    for field, kind in (("src_ip", "ip"), ("dst_ip", "ip"), ("host", "host"), ("user", "user")):
+        value = metadata.get(field)
+        if isinstance(value, str) and value:
+            entity = f"{kind}:{value.lower()}"
+            if entity not in ignored:
+                entities.add(entity)
+    return entities
+
+class TrackedIncident:
+    """
+    An open incident in the correlation index
+    """
+    __slots__ = ("id", "source", "severity", "first_seen", "last_seen", "entities", "alert_count", "stored")
+
+    def __init__(self, source: str, severity: str, first_seen: datetime, last_seen: datetime, incident_id: Optional[int] = None):
+        self.id = incident_id
+        self.source = source
+        self.severity = severity
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.entities: Set[str] = set()
+        self.alert_count = 0
+        # Resolved with the row id once a new incident is stored
+        self.stored: Optional[asyncio.Future] = None
+
+class IncidentCorrelator:
+    """
+    Streaming correlation of stored alerts into incidents.
+
+    Each alert's entities (IPs, host names, users, file hashes, from its
+    message and its metadata) are looked up in an in-memory entity ->
+    incident index. The alert joins the open incident it shares the most
+    entities with (one from the same source wins a tie, then the most
+    recently active one), or starts a new one; alerts without entities
+    start their own. Incidents leave the index,
+    and are closed in the database, once no alert has joined them for the
+    correlation window or they have been open for the maximum age.
+
+    The JIRA ticket, Slack notification and response recommendation are
+    then made once per incident (see EnrichmentQueue) instead of per alert.
+
+    The index is per process and rebuilt from open incidents on startup;
+    with several workers, each correlates the alerts it ingests.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = CORRELATION_ENABLED,
+        window_seconds: float = CORRELATION_WINDOW_SECONDS,
+        max_incident_seconds: float = CORRELATION_MAX_INCIDENT_SECONDS,
+        max_incidents: int = CORRELATION_MAX_INCIDENTS,
+        max_entities: int = CORRELATION_MAX_ENTITIES,
+        close_seconds: float = CORRELATION_CLOSE_SECONDS
+    ):
+        self.enabled = enabled
+        self.window = timedelta(seconds=window_seconds)
+        self.max_age = timedelta(seconds=max_incident_seconds)
+        self.max_incidents = max_incidents
+        self.max_entities = max_entities
+        self.close_seconds = close_seconds
+        self._index: Dict[str, TrackedIncident] = {}
+        # Least recently active first
+        self._incidents: "OrderedDict[TrackedIncident, None]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self.alerts_correlated = 0
+        self.incidents_created = 0
+        self.incidents_evicted = 0
+        self.incidents_closed = 0
+
+    async def start(self):
+        """
+        Rebuild the index from the open incidents and start the close task
+        """
+        if not self.enabled:
+            return
+        async with AsyncSessionLocal() as db:
+            for incident in await get_open_incidents(db, datetime.utcnow() - self.window):
+                self.restore(incident)
+        self._task = asyncio.create_task(self._run(), name="incident-close")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def restore(self, incident: Incident):
+        tracked = TrackedIncident(
+            incident.source, incident.severity, incident.first_seen_at, incident.last_seen_at, incident.id
+        )
+        tracked.alert_count = incident.alert_count
+        self._incidents[tracked] = None
+        self._add_entities(tracked, incident.entities or [])
+
+    def assign(
+        self, source: str, message: str, severity: str, seen_at: datetime, metadata: Optional[dict] = None
+    ) -> Tuple[TrackedIncident, bool]:
+        """
+        Put an alert into its incident in the index
+        Returns: (incident, True if the alert started it)
+        """
+        self._evict(seen_at)
+        entities = extract_entities(message) | metadata_entities(metadata)
+
+        scores: Dict[TrackedIncident, int] = {}
+        # Sorted so that full ties always resolve the same way
+        for entity in sorted(entities):
+            incident = self._index.get(entity)
+            if incident is not None:
+                scores[incident] = scores.get(incident, 0) + 1
+
+        best = None
+        best_key = None
+        for incident, score in scores.items():
+            if seen_at - incident.first_seen > self.max_age:
+                continue
+            key = (score, incident.source == source, incident.last_seen)
+            if best_key is None or key > best_key:
+                best, best_key = incident, key
+
+        created = best is None
+        if created:
+            best = TrackedIncident(source, severity, seen_at, seen_at)
+            self._incidents[best] = None
+            self.incidents_created += 1
+        else:
+            self._incidents.move_to_end(best)
+            if SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(best.severity, 0):
+                best.severity = severity
+            if seen_at > best.last_seen:
+                best.last_seen = seen_at
+        best.alert_count += 1
+        self._add_entities(best, entities)
+        self.alerts_correlated += 1
+        return best, created
+
+    def _add_entities(self, incident: TrackedIncident, entities):
+        for entity in entities:
+            if entity not in incident.entities:
+                if len(incident.entities) >= self.max_entities:
+                    continue
+                incident.entities.add(entity)
+            # An entity seen again points at the incident it was last seen in
+            self._index[entity] = incident
+
+    def _evict(self, now: datetime):
+        cutoff = now - self.window
+        while self._incidents:
+            oldest = next(iter(self._incidents))
+            if oldest.last_seen >= cutoff and len(self._incidents) <= self.max_incidents:
+                return
+            self._forget(oldest)
+            self.incidents_evicted += 1
+
+    def _forget(self, incident: TrackedIncident):
+        self._incidents.pop(incident, None)
+        for entity in incident.entities:
+            if self._index.get(entity) is incident:
+                del self._index[entity]
+
+    @instrumented("correlate")
+    async def correlate(self, db: AsyncSession, alerts: List[Alert]):
+        """
+        Group newly stored alerts into incidents: store new incidents, update
+        the ones they joined and set each alert's incident_id
+        """
+        if not self.enabled or not alerts:
+            return
+
+        loop = asyncio.get_running_loop()
+        # Assigned without awaiting, so concurrent calls see each other's incidents
+        assigned = []
+        created: Dict[TrackedIncident, dict] = {}
+        for alert in alerts:
+            incident, is_new = self.assign(
+                alert.source, alert.message, alert.severity, alert.created_at, alert.alert_metadata
+            )
+            if is_new:
+                incident.stored = loop.create_future()
+                created[incident] = {
+                    "severity": alert.severity,
+                    "source": alert.source,
+                    "title": alert.message,
+                    "lead_alert_id": alert.id,
+                    "alert_count": 0,
+                    "first_seen_at": alert.created_at,
+                    "last_seen_at": alert.created_at,
+                }
+            assigned.append((alert, incident))
+
+        joined: Dict[TrackedIncident, dict] = {}
+        for alert, incident in assigned:
+            if incident in created:
+                row = created[incident]
+                row["alert_count"] += 1
+                row["last_seen_at"] = max(row["last_seen_at"], alert.created_at)
+            else:
+                update = joined.setdefault(incident, {"count": 0, "last_seen": alert.created_at})
+                update["count"] += 1
+                update["last_seen"] = max(update["last_seen"], alert.created_at)
+
+        try:
+            ids = await create_incidents(db, [
+                {**row, "severity": incident.severity, "entities": sorted(incident.entities)}
+                for incident, row in created.items()
+            ])
+        except BaseException as e:
+            for incident in created:
+                self._forget(incident)
+                if isinstance(e, Exception):
+                    incident.stored.set_exception(e)
+                    # Mark the exception as retrieved when nobody else was waiting
+                    incident.stored.exception()
+                else:
+                    incident.stored.cancel()
+            raise
+        for incident, incident_id in zip(created, ids):
+            incident.id = incident_id
+            incident.stored.set_result(incident_id)
+
+        # Incidents started by a concurrent call that is still storing them
+        for incident in joined:
+            if incident.id is None:
+                await asyncio.shield(incident.stored)
+
+        await record_incident_activity(db, [
+            {
+                "id": incident.id,
+                "count": update["count"],
+                "last_seen": update["last_seen"],
+                "severity": incident.severity,
+                "entities": sorted(incident.entities),
+            }
+            for incident, update in joined.items()
+        ])
+        await set_alert_incidents(db, [(alert.id, incident.id) for alert, incident in assigned])
+        await db.commit()
+        for alert, incident in assigned:
+            alert.incident_id = incident.id
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.close_seconds)
+            try:
+                now = datetime.utcnow()
+                async with AsyncSessionLocal() as db:
+                    self.incidents_closed += await close_stale_incidents(db, now - self.window, now - self.max_age)
+            except Exception as e:
+                print(f"Incident close error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "window_seconds": self.window.total_seconds(),
+            "open_incidents": len(self._incidents),
+            "indexed_entities": len(self._index),
+            "alerts_correlated": self.alerts_correlated,
+            "incidents_created": self.incidents_created,
+            "incidents_evicted": self.incidents_evicted,
+            "incidents_closed": self.incidents_closed,
+        }
+
+# Shared correlator used by the ingest pipeline
+incident_correlator = IncidentCorrelator()
@@ -0,0 +1,245 @@
+import os
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.models import Alert
+from app.repositories.alert_repository import (
+    get_open_alerts_by_dedup_key,
+    add_alert_occurrences,
+    close_dedup_windows,
+    close_stale_dedup_windows
+)
+from app.services.classification_cache import normalize_message
+from app.services.slack_service import send_slack_suppression_summary
+from app.services.alert_events import alert_events
+
+# Load environment variables
+load_dotenv()
+
+# Deduplication configuration
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+# A window closes once no duplicate has been seen for this long...
+DEDUP_WINDOW_SECONDS = float(os.getenv("DEDUP_WINDOW_SECONDS", "300"))
+# ...or once it has been open this long, so a continuous storm still gets summaries
+DEDUP_MAX_WINDOW_SECONDS = float(os.getenv("DEDUP_MAX_WINDOW_SECONDS", "3600"))
+# How often folded counts are written to the alert rows and windows are closed
+DEDUP_FLUSH_SECONDS = float(os.getenv("DEDUP_FLUSH_SECONDS", "5"))
+# Windows tracked in memory; beyond this duplicates are found through the database
+DEDUP_MAX_TRACKED = int(os.getenv("DEDUP_MAX_TRACKED", "100000"))
+# Severities whose suppressed-count summary is posted to Slack when the window closes
+DEDUP_SUMMARY_SEVERITIES = [
+    severity.strip() for severity in os.getenv("DEDUP_SUMMARY_SEVERITIES", "High,Critical").split(",") if severity.strip()
+]
+
+def alert_fingerprint(source: str, message: str) -> str:
+    """
+    SHA-256 hex digest of the alert source and normalized message
+    """
+    return hashlib.sha256(f"{source}|{normalize_message(message)}".encode("utf-8")).hexdigest()
+
+@dataclass
+class DedupWindow:
+    alert_id: int
+    first_seen: datetime
+    last_seen: datetime
+    # Occurrences folded in memory and not yet written to the alert row
+    pending: int = 0
+
+class AlertDeduplicator:
+    """
+    Sliding suppression windows keyed on alert fingerprints.
+
+    The first occurrence of a fingerprint is stored as an alert with
+    dedup_key set; later occurrences inside the window are folded into it
+    (occurrence_count, last_seen_at) without classification, JIRA or Slack.
+    Windows are tracked in memory and backed by the unique dedup_key, so
+    other processes and restarts fold into the same alert. A background
+    task writes folded counts every DEDUP_FLUSH_SECONDS, closes finished
+    windows and posts a suppressed-count summary to Slack.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = DEDUP_WINDOW_SECONDS,
+        max_window_seconds: float = DEDUP_MAX_WINDOW_SECONDS,
+        flush_seconds: float = DEDUP_FLUSH_SECONDS,
+        max_tracked: int = DEDUP_MAX_TRACKED
+    ):
+        self.window = timedelta(seconds=window_seconds)
+        self.max_window = timedelta(seconds=max_window_seconds)
+        self.flush_seconds = flush_seconds
+        self.max_tracked = max_tracked
+        self.windows: Dict[str, DedupWindow] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Windows closed outside of flush whose summary is still to be sent
+        self._closed: List[Alert] = []
+        self._summary_tasks: Set[asyncio.Task] = set()
+        self.folded = 0
+        self.windows_closed = 0
+        self.summaries_sent = 0
+
+    async def start(self):
+        """
+        Start the background flush task
+        """
+        self._task = asyncio.create_task(self._run(), name="dedup-flush")
+
+    async def stop(self):
+        """
+        Stop the flush task and write out folded counts. Open windows stay open
+        in the database and are picked up again, or closed as stale, after a restart.
+        """
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush(close=False)
+
+    def fold(self, fingerprint: str) -> Optional[int]:
+        """
+        Count an occurrence against an open window in memory
+        Returns: the ID of the alert it was folded into, or None if no window is tracked
+        """
+        window = self.windows.get(fingerprint)
+        if window is None:
+            return None
+        window.pending += 1
+        window.last_seen = datetime.utcnow()
+        self.folded += 1
+        return window.alert_id
+
+    def track(self, alert: Alert):
+        """
+        Start tracking the window of an alert that has dedup_key set
+        """
+        if alert.fingerprint in self.windows or len(self.windows) >= self.max_tracked:
+            return
+        self.windows[alert.fingerprint] = DedupWindow(
+            alert_id=alert.id,
+            first_seen=alert.first_seen_at or datetime.utcnow(),
+            last_seen=alert.last_seen_at or datetime.utcnow()
+        )
+
+    async def fold_open(self, db: AsyncSession, fingerprints: List[str]) -> Dict[str, Alert]:
+        """
+        Fold one occurrence of each fingerprint into alerts whose window is open
+        in the database but not tracked here (another process, or a restart)
+        Returns: {fingerprint: alert} for the fingerprints that were folded
+        """
+        folded = {}
+        cutoff = datetime.utcnow() - self.window
+        for alert in await get_open_alerts_by_dedup_key(db, fingerprints):
+            # A stale window is closed here so that the occurrence starts a new alert
+            if alert.last_seen_at and alert.last_seen_at < cutoff:
+                self._closed += await close_dedup_windows(db, [alert.id])
+                continue
+            self.track(alert)
+            if self.fold(alert.fingerprint) is None:
+                # Not tracked in memory (max_tracked reached): count it directly
+                await add_alert_occurrences(db, alert.id, 1, datetime.utcnow())
+                self.folded += 1
+            folded[alert.fingerprint] = alert
+        return folded
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Deduplication flush error: {e}")
+
+    async def flush(self, close: bool = True):
+        """
+        Write folded counts to the alert rows, then close finished windows
+        and send their summaries
+        """
+        now = datetime.utcnow()
+        # Finished windows leave memory before any await, so occurrences that
+        # arrive during the flush are not folded into a window being closed
+        closing = {}
+        if close:
+            for fingerprint, window in list(self.windows.items()):
+                if now - window.first_seen > self.max_window or now - window.last_seen > self.window:
+                    closing[fingerprint] = self.windows.pop(fingerprint)
+
+        async with AsyncSessionLocal() as db:
+            try:
+                await self._write_pending(db, list(self.windows.values()) + list(closing.values()))
+            except Exception:
+                for fingerprint, window in closing.items():
+                    self.windows.setdefault(fingerprint, window)
+                raise
+            if not close:
+                return
+
+            closed = await close_dedup_windows(db, [window.alert_id for window in closing.values()])
+            closed += await close_stale_dedup_windows(db, now - self.window)
+            closed += self._closed
+            self._closed = []
+
+            # Windows of closed alerts tracked again meanwhile (fold_open in
+            # another request, or a stale close of a tracked window) are
+            # dropped, and what they folded is written before the summaries
+            closed_ids = {alert.id for alert in closed}
+            leftover = [
+                self.windows.pop(fingerprint)
+                for fingerprint, window in list(self.windows.items())
+                if window.alert_id in closed_ids
+            ]
+            updated = await self._write_pending(db, leftover)
+            closed = [updated.get(alert.id, alert) for alert in closed]
+        self.windows_closed += len(closed)
+
+        summaries = [
+            alert for alert in closed
+            if alert.occurrence_count > 1 and alert.severity in DEDUP_SUMMARY_SEVERITIES
+        ]
+        if summaries:
+            # Slack delivery is rate limited; don't hold up the next flush for it
+            task = asyncio.create_task(self._send_summaries(summaries))
+            self._summary_tasks.add(task)
+            task.add_done_callback(self._summary_tasks.discard)
+
+    async def _write_pending(self, db: AsyncSession, windows: List[DedupWindow]) -> Dict[int, Alert]:
+        """
+        Write the occurrences folded into windows since the last flush
+        Returns: {alert_id: updated alert}
+        """
+        updated = {}
+        for window in windows:
+            if not window.pending:
+                continue
+            count, window.pending = window.pending, 0
+            try:
+                alert = await add_alert_occurrences(db, window.alert_id, count, window.last_seen)
+            except Exception:
+                window.pending += count
+                raise
+            if alert is not None:
+                updated[alert.id] = alert
+                alert_events.publish("alert.updated", [alert])
+        return updated
+
+    async def _send_summaries(self, alerts: List[Alert]):
+        for sent in await asyncio.gather(*(send_slack_suppression_summary(alert) for alert in alerts)):
+            if sent:
+                self.summaries_sent += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": DEDUP_ENABLED,
+            "window_seconds": self.window.total_seconds(),
+            "open_windows": len(self.windows),
+            "folded": self.folded,
+            "windows_closed": self.windows_closed,
+            "summaries_sent": self.summaries_sent,
+        }
+
+# Shared deduplicator used by the ingest pipeline
+alert_deduplicator = AlertDeduplicator()
@@ -0,0 +1,107 @@
+import os
+import re
+import asyncio
+import hashlib
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+from dotenv import load_dotenv
+import numpy as np
+from app.services.classification_cache import normalize_message
+
+# Load environment variables
+load_dotenv()
+
+# Embedding provider: "local" (feature hashing, no network) or "openai"
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "local")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "256"))
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002")
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|<[a-z]+>")
+
+@lru_cache(maxsize=65536)
+def _feature_slot(feature: str, dimensions: int) -> Tuple[int, float]:
+    """
+    Stable (index, sign) for a feature; Python's hash() differs between processes
+    """
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return digest % dimensions, 1.0 if (digest >> 63) else -1.0
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+class HashingEmbeddingProvider:
+    """
+    Local bag-of-words embeddings: unigrams and bigrams of the normalized
+    message (IPs, hosts, numbers masked) hashed into a fixed number of
+    signed dimensions. Needs no model files or network, and finds alerts
+    that use the same wording. It is a lexical fallback: alerts that
+    describe the same activity in different words are not matched.
+    """
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing-v1-{dimensions}"
+
+    def embed_sync(self, messages: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(messages), self.dimensions), dtype=np.float32)
+        for row, message in enumerate(messages):
+            tokens = _TOKEN_PATTERN.findall(normalize_message(message))
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                index, sign = _feature_slot(feature, self.dimensions)
+                vectors[row, index] += sign
+        # Sublinear term frequency, then unit length so inner product is cosine
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return _normalize_rows(vectors)
+
+    async def embed(self, messages: Sequence[str]) -> np.ndarray:
+        if len(messages) <= 16:
+            return self.embed_sync(messages)
+        return await asyncio.get_running_loop().run_in_executor(None, self.embed_sync, list(messages))
+
+class OpenAIEmbeddingProvider:
+    """
+    Embeddings from the OpenAI embeddings API
+    """
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.model = model
+        self.dimensions = dimensions
+        self.name = f"openai-{model}"
+
+    async def embed(self, messages: Sequence[str]) -> np.ndarray:
+        from app.services.openai_service import client, llm_gateway, LLM_EMBED_DEADLINE_SECONDS
+
+        response = await llm_gateway.call(
+            "embed",
+            lambda timeout: client.embeddings.create(model=self.model, input=list(messages), timeout=timeout),
+            sum(len(message) for message in messages) // 4,
+            LLM_EMBED_DEADLINE_SECONDS,
+            lambda response: response.usage.total_tokens if response.usage else None
+        )
+        vectors = np.array([item.embedding for item in sorted(response.data, key=lambda item: item.index)], dtype=np.float32)
+        if vectors.shape[1] != self.dimensions:
+            raise ValueError(
+                f"{self.model} returned {vectors.shape[1]} dimensions; set EMBEDDING_DIMENSIONS={vectors.shape[1]}"
+            )
+        return _normalize_rows(vectors)
+
+def get_embedding_provider():
+    """
+    The provider selected by EMBEDDING_PROVIDER
+    """
+    if EMBEDDING_PROVIDER == "openai":
+        return OpenAIEmbeddingProvider()
+    if EMBEDDING_PROVIDER != "local":
+        print(f"Unknown EMBEDDING_PROVIDER {EMBEDDING_PROVIDER!r}, using local embeddings")
+    return HashingEmbeddingProvider()
+
+def vectors_to_bytes(vectors: np.ndarray) -> List[bytes]:
+    """
+    Compact float16 encoding used in alert_embeddings.embedding
+    """
+    return [row.tobytes() for row in np.asarray(vectors, dtype=np.float16)]
+
+def vectors_from_bytes(blobs: Sequence[bytes], dimensions: int) -> np.ndarray:
+    return np.frombuffer(b"".join(blobs), dtype=np.float16).reshape(-1, dimensions)
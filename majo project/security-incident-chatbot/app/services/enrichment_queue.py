@@ -0,0 +1,178 @@
+import os
+import asyncio
+import weakref
+from typing import List, Optional
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.models import Alert, Incident
+from app.repositories.alert_repository import (
+    get_alert_by_id,
+    get_alert_ids_pending_enrichment,
+    set_alert_jira_ticket_if_missing,
+    update_alert_enrichment_status
+)
+from app.repositories.incident_repository import (
+    get_incident_by_id,
+    set_incident_jira_ticket_if_missing,
+    set_incident_slack_severity
+)
+from app.services.jira_service import create_jira_ticket
+from app.services.slack_service import send_slack_alert
+from app.services.recommendation_service import recommendation_store, RECOMMENDATION_PRECOMPUTE
+from app.services.alert_events import alert_events
+from app.services.correlation import SEVERITY_RANK
+from app.observability import stage, request_context, request_id_var
+
+# Load environment variables
+load_dotenv()
+
+# Enrichment queue configuration
+ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "4"))
+ENRICHMENT_MAX_ATTEMPTS = int(os.getenv("ENRICHMENT_MAX_ATTEMPTS", "5"))
+ENRICHMENT_BACKOFF_SECONDS = float(os.getenv("ENRICHMENT_BACKOFF_SECONDS", "2"))
+ENRICHMENT_MAX_BACKOFF_SECONDS = float(os.getenv("ENRICHMENT_MAX_BACKOFF_SECONDS", "60"))
+
+class EnrichmentQueue:
+    """
+    In-process work queue that runs the JIRA, Slack and response
+    recommendation steps for an alert outside of the ingest request.
+
+    Job state lives on the alert row itself (enrichment_status, enrichment_attempts,
+    enrichment_error), so unfinished jobs are picked up again on startup.
+    Queued jobs carry the request id of the request that scheduled them, so
+    a job and its retries are traced and logged under that request.
+
+    Alerts grouped into an incident share its JIRA ticket and response
+    recommendation, and only the first alert of the incident, and any
+    alert more severe than what was announced, is posted to Slack. Jobs of
+    one incident run one at a time so its ticket is created once.
+    """
+
+    def __init__(
+        self,
+        workers: int = ENRICHMENT_WORKERS,
+        max_attempts: int = ENRICHMENT_MAX_ATTEMPTS,
+        backoff_seconds: float = ENRICHMENT_BACKOFF_SECONDS,
+        max_backoff_seconds: float = ENRICHMENT_MAX_BACKOFF_SECONDS
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._incident_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    async def start(self):
+        """
+        Start the worker tasks and re-queue jobs left over from a previous run
+        """
+        self._queue = asyncio.Queue()
+
+        async with AsyncSessionLocal() as db:
+            for alert_id in await get_alert_ids_pending_enrichment(db):
+                self._queue.put_nowait((alert_id, None))
+
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"enrichment-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        """
+        Cancel the worker tasks. Jobs still queued keep their state in the
+        database and are resumed on the next start.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, alert_id: int):
+        """
+        Schedule the enrichment job for an alert
+        """
+        self._queue.put_nowait((alert_id, request_id_var.get()))
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def _retry_delay(self, attempt: int) -> float:
+        return min(self.backoff_seconds * (2 ** (attempt - 1)), self.max_backoff_seconds)
+
+    async def _worker(self):
+        while True:
+            alert_id, request_id = await self._queue.get()
+            try:
+                with request_context(request_id), stage("enrichment_job"):
+                    await self._process(alert_id)
+            except Exception as e:
+                print(f"Enrichment worker error for alert {alert_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, alert_id: int):
+        async with AsyncSessionLocal() as db:
+            alert = await get_alert_by_id(db, alert_id)
+            if not alert or alert.enrichment_status == "completed":
+                return
+            if alert.incident_id is None:
+                await self._enrich(db, alert, None)
+                return
+
+            lock = self._incident_locks.get(alert.incident_id)
+            if lock is None:
+                lock = self._incident_locks[alert.incident_id] = asyncio.Lock()
+            async with lock:
+                await self._enrich(db, alert, await get_incident_by_id(db, alert.incident_id))
+
+    async def _enrich(self, db: AsyncSession, alert: Alert, incident: Optional[Incident]):
+        alert_id = alert.id
+        await update_alert_enrichment_status(db, alert, "running", increment_attempts=True)
+        attempts = alert.enrichment_attempts
+
+        try:
+            # Each step is skipped if it already succeeded on an earlier attempt
+            # (the "running" update above re-read the alert row)
+            if not alert.jira_ticket_id:
+                ticket_id = incident.jira_ticket_id if incident else None
+                if ticket_id is None:
+                    # Look for a labelled ticket first: an earlier attempt, or a
+                    # /create_ticket call that hasn't saved its key yet, may have created it
+                    ticket_id = await create_jira_ticket(alert, check_existing=True)
+                    if incident:
+                        ticket_id = await set_incident_jira_ticket_if_missing(db, incident, ticket_id)
+                await set_alert_jira_ticket_if_missing(db, alert, ticket_id)
+                alert_events.publish("alert.updated", [alert])
+
+            if not alert.slack_notified:
+                # An alert of an incident already announced at its severity is covered by that post
+                if incident is None or SEVERITY_RANK.get(alert.severity, 0) > SEVERITY_RANK.get(incident.slack_severity, -1):
+                    if not await send_slack_alert(alert):
+                        raise RuntimeError("Slack notification failed")
+                    if incident:
+                        await set_incident_slack_severity(db, incident, alert.severity)
+                alert.slack_notified = True
+                await db.commit()
+
+            # Precompute the response recommendation so opening the alert is a database read
+            if RECOMMENDATION_PRECOMPUTE and not await recommendation_store.has_recommendation(db, alert):
+                await recommendation_store.get_or_generate(db, alert)
+        except Exception as e:
+            await db.rollback()
+            if attempts >= self.max_attempts:
+                await update_alert_enrichment_status(db, alert, "failed", error=str(e))
+                alert_events.publish("alert.updated", [alert])
+                return
+
+            await update_alert_enrichment_status(db, alert, "retrying", error=str(e))
+            delay = self._retry_delay(attempts)
+            asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, (alert_id, request_id_var.get()))
+            return
+
+        await update_alert_enrichment_status(db, alert, "completed")
+        alert_events.publish("alert.updated", [alert])
+
+# Shared queue instance used by the API
+enrichment_queue = EnrichmentQueue()
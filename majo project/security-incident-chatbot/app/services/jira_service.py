@@ -1,7 +1,16 @@
 import os
-from jira import JIRA
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+import requests
+from requests.adapters import HTTPAdapter
+from jira import JIRA, JIRAError
 from dotenv import load_dotenv
 from app.models import Alert
+from app.services.batching import MicroBatcher
+from app.observability import instrumented
 
 # Load environment variables
 load_dotenv()
@@ -12,30 +21,91 @@ JIRA_USERNAME = os.getenv("JIRA_USERNAME")
 JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
 JIRA_PROJECT_KEY = os.getenv("JIRA_PROJECT_KEY")
 
+# The jira library is synchronous, so calls run on a small dedicated thread
+# pool instead of the event loop. The pool size caps concurrent JIRA requests.
+JIRA_MAX_CONCURRENCY = int(os.getenv("JIRA_MAX_CONCURRENCY", "8"))
+jira_executor = ThreadPoolExecutor(max_workers=JIRA_MAX_CONCURRENCY, thread_name_prefix="jira")
+
+# Tickets requested within JIRA_BATCH_WINDOW_MS of each other are created
+# with one call to the bulk issue API
+JIRA_BULK_ENABLED = os.getenv("JIRA_BULK_ENABLED", "true").lower() == "true"
+JIRA_BATCH_SIZE = int(os.getenv("JIRA_BATCH_SIZE", "50"))
+JIRA_BATCH_WINDOW_MS = float(os.getenv("JIRA_BATCH_WINDOW_MS", "100"))
+
+_jira_client = None
+_jira_client_lock = threading.Lock()
+
 def get_jira_client():
     """
-    Create and return a JIRA client
+    Return the shared JIRA client, creating it on first use
+    Authentication and server discovery happen once; the client's HTTP
+    session keeps up to JIRA_MAX_CONCURRENCY connections alive.
     """
-    return JIRA(
-        server=JIRA_SERVER,
-        basic_auth=(JIRA_USERNAME, JIRA_API_TOKEN)
-    )
+    global _jira_client
+    with _jira_client_lock:
+        if _jira_client is None:
+            client = JIRA(
+                server=JIRA_SERVER,
+                basic_auth=(JIRA_USERNAME, JIRA_API_TOKEN)
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=JIRA_MAX_CONCURRENCY)
+            client._session.mount("https://", adapter)
+            client._session.mount("http://", adapter)
+            _jira_client = client
+        return _jira_client
 
-async def create_jira_ticket(alert: Alert) -> str:
+def reset_jira_client():
     """
-    Create a JIRA ticket for a high-severity security alert
-    Returns the JIRA issue key
+    Drop the shared client so the next call reconnects and re-authenticates
+    """
+    global _jira_client
+    with _jira_client_lock:
+        _jira_client = None
+
+def _handle_client_error(error: Exception):
+    # Rebuild the client after connection or authentication failures
+    if isinstance(error, requests.ConnectionError) or (
+        isinstance(error, JIRAError) and error.status_code in (401, 403)
+    ):
+        reset_jira_client()
+
+def idempotency_label(alert_id: int) -> str:
+    """
+    Label that marks the ticket created for an alert, used to find it again
+    """
+    return f"security-alert-{alert_id}"
+
+# Alert metadata fields shown in the ticket description
+METADATA_LABELS = [
+    ("src_ip", "Source IP"),
+    ("dst_ip", "Destination IP"),
+    ("host", "Host"),
+    ("user", "User"),
+    ("rule_id", "Rule ID"),
+]
+
+def build_issue_fields(alert: Alert) -> dict:
+    """
+    JIRA issue fields for a security alert
     """
-    # Create JIRA client
-    jira = get_jira_client()
-    
     # Determine issue type based on severity
     issue_type = "Bug"
     if alert.severity == "Critical":
         issue_type = "Critical Bug"
     
-    # Create issue
-    issue_dict = {
+    labels = ['security-alert', alert.source.lower(), alert.severity.lower(), idempotency_label(alert.id)]
+    if alert.incident_id is not None:
+        labels.append(f"security-incident-{alert.incident_id}")
+    
+    # Structured fields sent with the alert, one line each
+    metadata = alert.alert_metadata or {}
+    metadata_lines = "".join(
+        f"\n        {label}: {metadata[field]}"
+        for field, label in METADATA_LABELS
+        if metadata.get(field) is not None
+    )
+    
+    return {
         'project': {'key': JIRA_PROJECT_KEY},
         'summary': f"[{alert.severity}] Security Alert from {alert.source}",
         'description': f"""
@@ -44,20 +114,123 @@ async def create_jira_ticket(alert: Alert) -> str:
         Severity: {alert.severity}
         Source: {alert.source}
         Alert ID: {alert.id}
-        Time: {alert.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')}
+        Incident ID: {alert.incident_id or "-"}
+        Time: {alert.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')}{metadata_lines}
         
         Message:
         {alert.message}
         """,
         'issuetype': {'name': issue_type},
         'priority': {'name': get_jira_priority(alert.severity)},
-        'labels': ['security-alert', alert.source.lower(), alert.severity.lower()]
+        'labels': labels
     }
-    
-    new_issue = jira.create_issue(fields=issue_dict)
-    
+
+# Ticket creation in progress per alert ID, shared by concurrent callers
+_inflight_tickets: Dict[int, asyncio.Future] = {}
+# Keys of tickets created recently, by alert ID. Covers the gap between a
+# ticket being created and its key being saved on the alert, where JIRA's
+# label search may not find it yet.
+_recent_tickets: "OrderedDict[int, str]" = OrderedDict()
+RECENT_TICKETS_MAX = 10000
+
+@instrumented("jira.create_ticket")
+async def create_jira_ticket(alert: Alert, check_existing: bool = False) -> str:
+    """
+    Create a JIRA ticket for a high-severity security alert
+    Returns the JIRA issue key
+
+    Concurrent calls for the same alert (the enrichment job and
+    /create_ticket racing) share one ticket. With check_existing, a ticket
+    already labelled with the alert's idempotency key is returned instead of
+    creating another, e.g. when an earlier attempt created the ticket but
+    failed before its key was saved.
+    """
+    if alert.id in _recent_tickets:
+        return _recent_tickets[alert.id]
+    inflight = _inflight_tickets.get(alert.id)
+    if inflight is not None:
+        return await asyncio.shield(inflight)
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    _inflight_tickets[alert.id] = future
+    try:
+        key = None
+        if check_existing:
+            key = await loop.run_in_executor(jira_executor, _find_issue_by_label, idempotency_label(alert.id))
+        if key is None:
+            if JIRA_BULK_ENABLED:
+                key = await jira_batcher.submit(build_issue_fields(alert))
+                if isinstance(key, Exception):
+                    raise key
+            else:
+                key = await loop.run_in_executor(jira_executor, _create_issue, build_issue_fields(alert))
+        _recent_tickets[alert.id] = key
+        if len(_recent_tickets) > RECENT_TICKETS_MAX:
+            _recent_tickets.popitem(last=False)
+        future.set_result(key)
+        return key
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception as retrieved when nobody else was waiting
+        future.exception()
+        raise
+    finally:
+        del _inflight_tickets[alert.id]
+
+def _create_issue(issue_dict: dict) -> str:
+    """
+    Create the issue with a blocking JIRA client (runs on jira_executor)
+    """
+    try:
+        new_issue = get_jira_client().create_issue(fields=issue_dict, prefetch=False)
+    except Exception as e:
+        _handle_client_error(e)
+        raise
     return new_issue.key
 
+def _create_issues(field_list: List[dict]) -> List[Union[str, Exception]]:
+    """
+    Create several issues with one bulk API request (runs on jira_executor)
+    Returns the issue key, or the error, for each entry of field_list
+    """
+    if len(field_list) == 1:
+        try:
+            return [_create_issue(field_list[0])]
+        except Exception as e:
+            return [e]
+
+    try:
+        created = get_jira_client().create_issues(field_list, prefetch=False)
+    except Exception as e:
+        _handle_client_error(e)
+        raise
+    return [
+        result["issue"].key if result["status"] == "Success" else RuntimeError(f"JIRA rejected the issue: {result['error']}")
+        for result in created
+    ]
+
+def _find_issue_by_label(label: str) -> Optional[str]:
+    """
+    Key of the issue carrying an idempotency label, if any (runs on jira_executor)
+    """
+    try:
+        issues = get_jira_client().search_issues(f'labels = "{label}"', maxResults=1, fields="key")
+    except Exception as e:
+        _handle_client_error(e)
+        raise
+    return issues[0].key if issues else None
+
+async def _create_issue_batch(field_list: List[dict]) -> List[Union[str, Exception]]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(jira_executor, _create_issues, field_list)
+
+# Shared batcher used by create_jira_ticket
+jira_batcher = MicroBatcher(_create_issue_batch, JIRA_BATCH_SIZE, JIRA_BATCH_WINDOW_MS)
+
 def get_jira_priority(severity: str) -> str:
     """
     Map security alert severity to JIRA priority
@@ -0,0 +1,359 @@
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Optional
+from app.services.rate_limit import TokenBucket
+
+class LLMUnavailableError(Exception):
+    """
+    The gateway gave up on a call: the circuit is open, the deadline passed
+    or the retries ran out. Callers fall back or report the LLM as unavailable.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitOpenError(LLMUnavailableError):
+    pass
+
+class LLMDeadlineExceeded(LLMUnavailableError):
+    pass
+
+class Overloaded(Exception):
+    """
+    An upstream answer that means "slow down": a 429, a timeout, a 5xx or a
+    connection failure. Raised by a gateway's `classify_error` mapping.
+    """
+
+    def __init__(self, kind: str, retry_after: Optional[float] = None):
+        super().__init__(kind)
+        self.kind = kind
+        self.retry_after = retry_after
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted AIMD-style: +1 per limit's worth of
+    successful calls, halved (at most once per `decrease_interval`) when the
+    upstream signals overload. Waiters are served in arrival order.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, backoff: float = 0.5, decrease_interval: float = 1.0):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the waiter was cancelled
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self._wake()
+
+    def on_overload(self):
+        now = time.monotonic()
+        # Calls already in flight when the limit dropped fail too; count
+        # one decrease per interval instead of collapsing the limit
+        if now - self._last_decrease >= self.decrease_interval:
+            self.limit = max(self.minimum, self.limit * self.backoff)
+            self._last_decrease = now
+            self.decreases += 1
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls and rejects
+    calls for `reset_seconds`, then lets one probe through (half-open): its
+    success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def release_probe(self):
+        """
+        The call let through never reached the upstream (cancelled or no capacity)
+        """
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+class LLMGateway:
+    """
+    Single path for every LLM call:
+    - an adaptive (AIMD) concurrency limit
+    - requests-per-minute and tokens-per-minute budgets (token buckets
+      holding `burst_seconds` worth; a 429's Retry-After pauses them)
+    - a deadline per call covering queueing, every attempt and the backoff
+      between them; attempts get the remaining time as their timeout
+    - retries with jittered exponential backoff on overload errors
+    - a timeout counts as upstream overload only when the attempt had at
+      least `slow_call_seconds`; a shorter one is the caller's deadline
+      running out after queueing, not a sign the upstream is struggling
+    - a circuit breaker that fails calls fast while the upstream is down
+
+    `classify_error` maps an upstream exception to Overloaded (retry, slow
+    down, counts against the breaker) or returns None (a plain error,
+    raised as is). With enabled=False calls go straight through.
+    """
+
+    def __init__(
+        self,
+        classify_error: Callable[[BaseException], Optional[Overloaded]],
+        enabled: bool = True,
+        initial_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        burst_seconds: float = 10,
+        max_retries: int = 2,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 8,
+        breaker_failures: int = 5,
+        breaker_reset_seconds: float = 30,
+        slow_call_seconds: float = 5,
+        on_request: Optional[Callable[[str, str], None]] = None
+    ):
+        self.classify_error = classify_error
+        self.enabled = enabled
+        self.limiter = AdaptiveLimiter(initial_concurrency, min_concurrency, max_concurrency)
+        self.requests = (
+            TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 60 * burst_seconds))
+            if requests_per_minute else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute / 60, max(1.0, tokens_per_minute / 60 * burst_seconds))
+            if tokens_per_minute else None
+        )
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+        self.slow_call_seconds = slow_call_seconds
+        self.on_request = on_request
+        self.outcomes = {}
+        self.retries = 0
+
+    def _record(self, operation: str, outcome: str):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if self.on_request:
+            self.on_request(operation, outcome)
+
+    async def _admit(self, estimated_tokens: int):
+        """
+        Wait for the budgets, then for a concurrency slot
+        """
+        if self.requests:
+            await self.requests.acquire()
+        if self.tokens:
+            await self.tokens.acquire(min(estimated_tokens, self.tokens.capacity))
+        await self.limiter.acquire()
+
+    def _settle_tokens(self, estimated_tokens: int, used_tokens: Optional[int]):
+        if self.tokens and used_tokens is not None:
+            self.tokens.adjust(min(estimated_tokens, self.tokens.capacity) - used_tokens)
+
+    def _backoff(self, attempt: int, overload: Overloaded) -> float:
+        if overload.retry_after is not None:
+            return overload.retry_after
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _on_overload(self, overload: Overloaded):
+        if overload.kind in ("rate_limited", "timeout"):
+            self.limiter.on_overload()
+        if overload.kind == "rate_limited" and overload.retry_after:
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.pause(overload.retry_after)
+
+    async def call(
+        self,
+        operation: str,
+        request: Callable[[Optional[float]], Awaitable[Any]],
+        estimated_tokens: int,
+        deadline_seconds: float,
+        used_tokens: Callable[[Any], Optional[int]] = lambda result: None
+    ) -> Any:
+        """
+        Run `request(timeout)` under the gateway's limits and return its result
+        Raises LLMUnavailableError when the call can't be completed in time
+        """
+        if not self.enabled:
+            return await request(None)
+        return await self._call(operation, request, estimated_tokens, deadline_seconds, used_tokens, keep_slot=False)
+
+    async def _call(self, operation, request, estimated_tokens, deadline_seconds, used_tokens, keep_slot: bool):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + deadline_seconds
+        if not self.breaker.allow():
+            self._record(operation, "rejected")
+            raise CircuitOpenError("LLM circuit is open", retry_after=self.breaker.retry_after())
+
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                await asyncio.wait_for(self._admit(estimated_tokens), remaining)
+            except asyncio.TimeoutError:
+                # Waiting for capacity isn't an upstream failure
+                self.breaker.release_probe()
+                self._record(operation, "deadline")
+                raise LLMDeadlineExceeded(f"No LLM capacity within {deadline_seconds:.0f}s")
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+
+            try:
+                remaining = deadline - loop.time()
+                result = await asyncio.wait_for(request(remaining), remaining)
+            except asyncio.CancelledError:
+                self.limiter.release()
+                self.breaker.release_probe()
+                raise
+            except BaseException as e:
+                self.limiter.release()
+                if isinstance(e, asyncio.TimeoutError) and remaining < self.slow_call_seconds:
+                    self.breaker.release_probe()
+                    self._record(operation, "deadline")
+                    raise LLMDeadlineExceeded(f"LLM call didn't finish within {deadline_seconds:.0f}s") from e
+                overload = Overloaded("timeout") if isinstance(e, asyncio.TimeoutError) else self.classify_error(e)
+                if overload is None:
+                    # The upstream answered; the request itself was at fault
+                    self.breaker.record_success()
+                    self._record(operation, "error")
+                    raise
+                self._on_overload(overload)
+                self._record(operation, overload.kind)
+                delay = self._backoff(attempt, overload)
+                if attempt >= self.max_retries or loop.time() + delay >= deadline:
+                    self.breaker.record_failure()
+                    raise LLMUnavailableError(
+                        f"LLM {overload.kind} after {attempt + 1} attempts", retry_after=overload.retry_after
+                    ) from e
+                attempt += 1
+                self.retries += 1
+                try:
+                    await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    self.breaker.release_probe()
+                    raise
+                continue
+
+            if not keep_slot:
+                self.limiter.release()
+            self.limiter.on_success()
+            self.breaker.record_success()
+            self._settle_tokens(estimated_tokens, used_tokens(result))
+            self._record(operation, "ok")
+            return result
+
+    async def stream(
+        self,
+        operation: str,
+        open_stream: Callable[[Optional[float]], Awaitable[AsyncIterator[Any]]],
+        estimated_tokens: int,
+        deadline_seconds: float
+    ) -> AsyncIterator[Any]:
+        """
+        Open a streaming call like call() (deadline, retries and breaker
+        apply until the stream is open) and yield its items. The concurrency
+        slot is held until the stream is consumed or closed, so long streams
+        count against the limit.
+        """
+        if not self.enabled:
+            async for item in await open_stream(None):
+                yield item
+            return
+
+        stream = await self._call(operation, open_stream, estimated_tokens, deadline_seconds, lambda result: None, keep_slot=True)
+        try:
+            async for item in stream:
+                yield item
+        finally:
+            self.limiter.release()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "queued": self.limiter.queued,
+            "limit_decreases": self.limiter.decreases,
+            "circuit": self.breaker.state,
+            "circuit_opens": self.breaker.opens,
+            "consecutive_failures": self.breaker.failures,
+            "requests_budget": round(self.requests.available(), 1) if self.requests else None,
+            "tokens_budget": round(self.tokens.available(), 1) if self.tokens else None,
+            "retries": self.retries,
+            "outcomes": dict(self.outcomes),
+        }
@@ -0,0 +1,223 @@
+import os
+import re
+import pickle
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Pre-classifier configuration
+PRECLASSIFIER_ENABLED = os.getenv("PRECLASSIFIER_ENABLED", "true").lower() == "true"
+PRECLASSIFIER_CONFIDENCE_THRESHOLD = float(os.getenv("PRECLASSIFIER_CONFIDENCE_THRESHOLD", "0.8"))
+# The trained model is a pickle, and unpickling runs code from the file, so
+# it is only loaded when enabled explicitly. Relative paths are resolved
+# against the application directory, not the working directory.
+PRECLASSIFIER_MODEL_ENABLED = os.getenv("PRECLASSIFIER_MODEL_ENABLED", "false").lower() == "true"
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PRECLASSIFIER_MODEL_PATH = os.path.join(APP_DIR, os.getenv("PRECLASSIFIER_MODEL_PATH", "preclassifier_model.pkl"))
+
+SEVERITY_RANK = {"Low": 0, "Medium": 1, "High": 2, "Critical": 3}
+
+# (severity, confidence, phrases). When several rules match, the most
+# severe one wins. Rules below the confidence threshold only decide when
+# a more confident rule or the model agrees; otherwise the LLM does.
+SEVERITY_RULES: List[Tuple[str, float, List[str]]] = [
+    ("Critical", 0.95, [
+        "ransomware", "data exfiltration", "exfiltrated", "files encrypted", "rootkit",
+        "command and control", "c2 beacon", "domain admin compromised", "wiper"
+    ]),
+    ("High", 0.9, [
+        "brute force", "mimikatz", "credential dump", "privilege escalation", "lateral movement",
+        "malware detected", "trojan", "sql injection", "reverse shell", "webshell"
+    ]),
+    ("Medium", 0.8, [
+        "port scan", "failed login", "failed logins", "login failure",
+        "policy violation", "blocked connection", "phishing"
+    ]),
+    # Too vague to skip the LLM on its own
+    ("Medium", 0.6, ["suspicious"]),
+    ("Low", 0.85, [
+        "successful login", "user logged in", "password changed", "scan completed",
+        "heartbeat", "informational", "health check"
+    ]),
+]
+
+# A rule phrase preceded by a negation ("no ransomware found") or followed by
+# one ("malware: not detected") doesn't describe what happened
+NEGATION_BEFORE = re.compile(r"\b(?:no|not|without|never|zero|none of|free of)\b(?:\W+\w+){0,2}\W*$", re.IGNORECASE)
+NEGATION_AFTER = re.compile(
+    r"^(?:\W*\w+){0,2}?\W*(?:(?:was|were|is|are)\s+)?(?:not\s+(?:detected|found|present|observed)|negative|(?:a\s+)?false positive|cleared)\b",
+    re.IGNORECASE
+)
+# Words that contradict a Low ("health check failed: database server down")
+LOW_CONTRADICTIONS = re.compile(
+    r"\b(?:fail(?:ed|ure|ing)?|down|error|unreachable|critical|denied|timeout|timed out|outage)\b", re.IGNORECASE
+)
+
+@dataclass
+class PreclassifierDecision:
+    severity: str
+    confidence: float
+    stage: str
+
+class RuleMatcher:
+    """
+    Matches every rule phrase in a single pass with one compiled alternation.
+    Each phrase maps back to its rule through the name of its capture group.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, float, List[str]]] = SEVERITY_RULES):
+        self.rules = list(rules)
+        alternatives = []
+        for index, (_, _, phrases) in enumerate(self.rules):
+            # Longest phrases first so "failed logins" beats "failed login"
+            ordered = sorted(phrases, key=len, reverse=True)
+            alternatives.append(f"(?P<r{index}>" + "|".join(re.escape(p) for p in ordered) + ")")
+        self.pattern = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+    def classify(self, message: str) -> Optional[PreclassifierDecision]:
+        """
+        The decision of the most severe matching rule, or None when nothing
+        matches or the message is negated or contradicts a Low match
+        """
+        best = None
+        for match in self.pattern.finditer(message):
+            if NEGATION_BEFORE.search(message, max(0, match.start() - 40), match.start()) or NEGATION_AFTER.search(message[match.end():]):
+                # Hand negated messages to the LLM rather than guess what's left
+                return None
+            severity, confidence, _ = self.rules[int(match.lastgroup[1:])]
+            if (
+                best is None
+                or SEVERITY_RANK[severity] > SEVERITY_RANK[best.severity]
+                or (severity == best.severity and confidence > best.confidence)
+            ):
+                best = PreclassifierDecision(severity, confidence, "rules")
+        if best and best.severity == "Low" and LOW_CONTRADICTIONS.search(message):
+            return None
+        return best
+
+class LocalSeverityModel:
+    """
+    TF-IDF + logistic regression model trained on stored alerts.
+    Requires scikit-learn, which is only needed when a model is used.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    @classmethod
+    def train(cls, messages: Sequence[str], severities: Sequence[str]) -> "LocalSeverityModel":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+
+        pipeline = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), min_df=2, sublinear_tf=True),
+            LogisticRegression(max_iter=1000, class_weight="balanced")
+        )
+        pipeline.fit(list(messages), list(severities))
+        return cls(pipeline)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["LocalSeverityModel"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return cls(pickle.load(f))
+        except Exception as e:
+            print(f"Error loading pre-classifier model from {path}: {e}")
+            return None
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump(self.pipeline, f)
+
+    def classify(self, message: str) -> PreclassifierDecision:
+        probabilities = self.pipeline.predict_proba([message])[0]
+        best = probabilities.argmax()
+        return PreclassifierDecision(str(self.pipeline.classes_[best]), float(probabilities[best]), "model")
+
+class Preclassifier:
+    """
+    Local classification stage that runs ahead of the LLM.
+    Returns a decision only when a stage is at least `threshold` confident.
+    """
+
+    def __init__(
+        self,
+        matcher: Optional[RuleMatcher] = None,
+        model: Optional[LocalSeverityModel] = None,
+        threshold: float = PRECLASSIFIER_CONFIDENCE_THRESHOLD
+    ):
+        self.matcher = matcher or RuleMatcher()
+        self.model = model
+        self.threshold = threshold
+
+    def classify(self, message: str) -> Optional[PreclassifierDecision]:
+        decision = self.matcher.classify(message)
+        if decision and decision.confidence >= self.threshold:
+            return decision
+
+        if self.model is not None:
+            decision = self.model.classify(message)
+            if decision.confidence >= self.threshold:
+                return decision
+
+        return None
+
+    def fallback(self, message: str) -> PreclassifierDecision:
+        """
+        Best local guess at any confidence, for when the LLM is unavailable:
+        the matching rule, else the model, else Medium. The stage is
+        "fallback" so these alerts can be told apart and reviewed.
+        """
+        decision = self.matcher.classify(message)
+        if decision is None and self.model is not None:
+            decision = self.model.classify(message)
+        severity = decision.severity if decision else "Medium"
+        return PreclassifierDecision(severity, decision.confidence if decision else 0.0, "fallback")
+
+# Shared pre-classifier instance; the trained model is added by load_preclassifier_model()
+preclassifier = Preclassifier()
+
+def load_preclassifier_model():
+    """
+    Load the trained model at startup when PRECLASSIFIER_MODEL_ENABLED is set
+    """
+    if PRECLASSIFIER_ENABLED and PRECLASSIFIER_MODEL_ENABLED:
+        preclassifier.model = LocalSeverityModel.load(PRECLASSIFIER_MODEL_PATH)
+
+async def train_model_from_alerts(path: str = PRECLASSIFIER_MODEL_PATH, limit: int = 100000) -> int:
+    """
+    Train the local model on stored alerts that were classified by the LLM
+    and save it to `path`. Returns the number of training rows.
+    """
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models import Alert
+
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(Alert.message, Alert.severity)
+            .where(Alert.classified_by == "llm")
+            .order_by(Alert.id.desc())
+            .limit(limit)
+        )).all()
+
+    if len({severity for _, severity in rows}) < 2:
+        raise ValueError("Need LLM-classified alerts of at least two severities to train")
+
+    model = LocalSeverityModel.train([m for m, _ in rows], [s for _, s in rows])
+    model.save(path)
+    preclassifier.model = model
+    return len(rows)
+
+if __name__ == "__main__":
+    # python -m app.services.preclassifier  -> retrain the local model
+    import asyncio
+
+    count = asyncio.run(train_model_from_alerts())
+    print(f"Trained pre-classifier model on {count} alerts -> {PRECLASSIFIER_MODEL_PATH}")
@@ -0,0 +1,56 @@
+import time
+import asyncio
+
+class TokenBucket:
+    """
+    Token bucket for async callers: tokens refill at `rate` per second and
+    up to `capacity` can be banked for bursts. pause() blocks all acquires
+    for a while, e.g. to honor a Retry-After from the upstream API.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1):
+        """
+        Wait until `tokens` are available and take them
+        """
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self._refill(now)
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """
+        Block acquires for `seconds` and drop any banked tokens
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def adjust(self, tokens: float):
+        """
+        Give back (positive) or take (negative) tokens after the fact, e.g.
+        when a request turned out cheaper or dearer than estimated
+        """
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def available(self) -> float:
+        self._refill(time.monotonic())
+        return self.tokens
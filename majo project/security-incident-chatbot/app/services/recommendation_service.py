@@ -0,0 +1,240 @@
+import os
+import asyncio
+import hashlib
+from typing import AsyncIterator, Dict, List, Set, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.models import Alert
+from app.repositories.recommendation_repository import (
+    get_recommendation_for_alert,
+    get_recommendation_by_fingerprint,
+    save_recommendation
+)
+from app.services.classification_cache import normalize_message
+from app.services.openai_service import (
+    generate_response_recommendation,
+    stream_response_recommendation,
+    RECOMMENDATION_PROMPT_VERSION
+)
+from app.services.similarity import similar_alert_index
+
+# Load environment variables
+load_dotenv()
+
+# Reuse the recommendation of an earlier alert with the same fingerprint
+RECOMMENDATION_REUSE_SIMILAR = os.getenv("RECOMMENDATION_REUSE_SIMILAR", "true").lower() == "true"
+
+# Generate recommendations for High/Critical alerts during background enrichment
+RECOMMENDATION_PRECOMPUTE = os.getenv("RECOMMENDATION_PRECOMPUTE", "true").lower() == "true"
+
+def recommendation_fingerprint(alert: Alert) -> str:
+    """
+    SHA-256 hex digest of the inputs to the recommendation prompt, with the
+    message normalized so repeats of the same alert share one recommendation.
+    Alerts of one incident share the recommendation made for its severity.
+    """
+    if alert.incident_id is not None:
+        key = f"incident|{alert.incident_id}|{alert.severity}"
+    else:
+        key = f"{alert.severity}|{alert.source}|{normalize_message(alert.message)}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+class RecommendationStore:
+    """
+    Stored response recommendations, keyed by alert id and prompt version.
+
+    A miss for one alert is served from another alert with the same
+    fingerprint when possible, and only then generated. Concurrent misses
+    for the same fingerprint (an analyst opening an alert while it is being
+    precomputed, or a burst of identical alerts) share one generation.
+    """
+
+    def __init__(self, reuse_similar: bool = RECOMMENDATION_REUSE_SIMILAR):
+        self.reuse_similar = reuse_similar
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.reused = 0
+        self.generated = 0
+        self.coalesced = 0
+
+    async def get_or_generate(self, db: AsyncSession, alert: Alert) -> Tuple[str, str]:
+        """
+        Return the recommendation for an alert, generating it only when nothing reusable is stored
+        Returns: (recommendation, source) where source is "stored", "similar" or "generated"
+        """
+        recommendation = await get_recommendation_for_alert(db, alert.id, RECOMMENDATION_PROMPT_VERSION)
+        if recommendation is not None:
+            self.hits += 1
+            return recommendation, "stored"
+
+        fingerprint = recommendation_fingerprint(alert)
+
+        inflight = self._inflight.get(fingerprint)
+        if inflight is not None:
+            self.coalesced += 1
+            recommendation = await self._wait_inflight(inflight)
+            await save_recommendation(db, alert.id, RECOMMENDATION_PROMPT_VERSION, fingerprint, recommendation)
+            return recommendation, "similar"
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[fingerprint] = future
+        try:
+            source = "similar"
+            recommendation = None
+            if self.reuse_similar:
+                recommendation = await get_recommendation_by_fingerprint(db, fingerprint, RECOMMENDATION_PROMPT_VERSION)
+            if recommendation is None:
+                source = "generated"
+                similar = await similar_alert_index.prompt_context(db, alert)
+                recommendation = await generate_response_recommendation(alert, similar)
+
+            await save_recommendation(db, alert.id, RECOMMENDATION_PROMPT_VERSION, fingerprint, recommendation)
+            if source == "generated":
+                self.generated += 1
+            else:
+                self.reused += 1
+            future.set_result(recommendation)
+            return recommendation, source
+        except BaseException as e:
+            self._fail(future, e)
+            raise
+        finally:
+            self._release(fingerprint, future)
+
+    async def stream(self, db: AsyncSession, alert: Alert) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Same lookups as get_or_generate, but a new recommendation is yielded
+        in chunks as the tokens arrive. Stored, reused and coalesced
+        recommendations arrive as a single chunk.
+        Yields: (text, source) where source is "stored", "similar" or "generated"
+        """
+        recommendation = await get_recommendation_for_alert(db, alert.id, RECOMMENDATION_PROMPT_VERSION)
+        if recommendation is not None:
+            self.hits += 1
+            yield recommendation, "stored"
+            return
+
+        fingerprint = recommendation_fingerprint(alert)
+
+        inflight = self._inflight.get(fingerprint)
+        if inflight is not None:
+            self.coalesced += 1
+            recommendation = await self._wait_inflight(inflight)
+            await save_recommendation(db, alert.id, RECOMMENDATION_PROMPT_VERSION, fingerprint, recommendation)
+            yield recommendation, "similar"
+            return
+
+        # Registered before the first await so concurrent misses coalesce onto this call
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[fingerprint] = future
+        try:
+            if self.reuse_similar:
+                recommendation = await get_recommendation_by_fingerprint(db, fingerprint, RECOMMENDATION_PROMPT_VERSION)
+            if recommendation is not None:
+                await save_recommendation(db, alert.id, RECOMMENDATION_PROMPT_VERSION, fingerprint, recommendation)
+                self.reused += 1
+                future.set_result(recommendation)
+            else:
+                similar = await similar_alert_index.prompt_context(db, alert)
+        except BaseException as e:
+            # Includes the client disconnecting (the generator is closed)
+            self._fail(future, e)
+            self._release(fingerprint, future)
+            raise
+
+        if recommendation is not None:
+            self._release(fingerprint, future)
+            yield recommendation, "similar"
+            return
+
+        # The generation runs in its own task so the text is still stored if
+        # the client disconnects part way through
+        chunks: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self._generate_streaming(alert, similar, fingerprint, future, chunks))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk, "generated"
+
+    async def _generate_streaming(
+        self,
+        alert: Alert,
+        similar: List[dict],
+        fingerprint: str,
+        future: asyncio.Future,
+        chunks: asyncio.Queue
+    ):
+        try:
+            parts = []
+            async for chunk in stream_response_recommendation(alert, similar):
+                parts.append(chunk)
+                chunks.put_nowait(chunk)
+            recommendation = "".join(parts).strip()
+
+            async with AsyncSessionLocal() as db:
+                await save_recommendation(db, alert.id, RECOMMENDATION_PROMPT_VERSION, fingerprint, recommendation)
+            self.generated += 1
+            future.set_result(recommendation)
+            chunks.put_nowait(None)
+        except asyncio.CancelledError:
+            # Wake coalesced waiters and the SSE consumer instead of leaving them hanging
+            future.cancel()
+            chunks.put_nowait(RuntimeError("Recommendation generation was cancelled"))
+            raise
+        except Exception as e:
+            print(f"Error streaming recommendation for alert {alert.id}: {e}")
+            self._fail(future, e)
+            chunks.put_nowait(e)
+        finally:
+            self._release(fingerprint, future)
+
+    async def _wait_inflight(self, inflight: asyncio.Future) -> str:
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # The generation was cancelled, not this caller
+            if inflight.cancelled() and not asyncio.current_task().cancelling():
+                raise RuntimeError("The recommendation being generated for this alert was cancelled")
+            raise
+
+    def _fail(self, future: asyncio.Future, error: BaseException):
+        if future.done():
+            return
+        if not isinstance(error, Exception):
+            future.cancel()
+            return
+        future.set_exception(error)
+        # Mark the exception as retrieved when nobody else was waiting
+        future.exception()
+
+    def _release(self, fingerprint: str, future: asyncio.Future):
+        """
+        Forget the in-flight generation, unless another call has replaced it
+        """
+        if self._inflight.get(fingerprint) is future:
+            del self._inflight[fingerprint]
+
+    async def has_recommendation(self, db: AsyncSession, alert: Alert) -> bool:
+        return await get_recommendation_for_alert(db, alert.id, RECOMMENDATION_PROMPT_VERSION) is not None
+
+    def stats(self) -> dict:
+        return {
+            "prompt_version": RECOMMENDATION_PROMPT_VERSION,
+            "reuse_similar": self.reuse_similar,
+            "precompute": RECOMMENDATION_PRECOMPUTE,
+            "hits": self.hits,
+            "reused": self.reused,
+            "generated": self.generated,
+            "coalesced": self.coalesced,
+        }
+
+# Shared store used by the API and the enrichment queue
+recommendation_store = RecommendationStore()
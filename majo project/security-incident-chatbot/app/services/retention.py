@@ -0,0 +1,170 @@
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.database import AsyncSessionLocal
+from app.models import Alert
+from app.repositories.alert_repository import get_alerts_to_archive, delete_alerts
+from app.repositories.stats_repository import to_naive_utc
+from app.services.alert_archive import AlertArchive
+
+# Load environment variables
+load_dotenv()
+
+# Retention configuration. Alerts older than RETENTION_HOT_DAYS are moved
+# from the alerts table to Parquet files under RETENTION_ARCHIVE_URI (a path
+# relative to the application directory, or an object store URI such as
+# s3://bucket/alerts).
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "false").lower() == "true"
+RETENTION_HOT_DAYS = float(os.getenv("RETENTION_HOT_DAYS", "30"))
+RETENTION_ARCHIVE_URI = os.getenv("RETENTION_ARCHIVE_URI", "archive/alerts")
+RETENTION_COMPRESSION = os.getenv("RETENTION_COMPRESSION", "zstd")
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+# Alerts written per archive batch (fewer, larger files with bigger batches)
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "20000"))
+# Alerts deleted per transaction, and the pause between deletes
+RETENTION_DELETE_CHUNK_SIZE = int(os.getenv("RETENTION_DELETE_CHUNK_SIZE", "1000"))
+RETENTION_DELETE_PAUSE_SECONDS = float(os.getenv("RETENTION_DELETE_PAUSE_SECONDS", "0.05"))
+
+class AlertRetention:
+    """
+    Hot/cold tiering of alerts.
+
+    Every RETENTION_INTERVAL_SECONDS the oldest alerts past the hot window
+    are written to the archive a batch at a time, and only then deleted from
+    the alerts table in small chunks, each its own short transaction, so
+    ingest and the history view are not held up by long row locks. A crash
+    between the two steps leaves the alerts in place to be archived again.
+    Alerts with enrichment still pending or an open dedup window wait for
+    the next run. The stats rollups are left alone, so /alerts/stats keeps
+    counting archived alerts.
+
+    /alerts/ reads the archive too when its start_date reaches past the hot
+    window (see query_archive).
+    """
+
+    def __init__(
+        self,
+        archive: AlertArchive,
+        enabled: bool = RETENTION_ENABLED,
+        hot_days: float = RETENTION_HOT_DAYS,
+        interval_seconds: float = RETENTION_INTERVAL_SECONDS,
+        batch_size: int = RETENTION_BATCH_SIZE,
+        delete_chunk_size: int = RETENTION_DELETE_CHUNK_SIZE,
+        delete_pause_seconds: float = RETENTION_DELETE_PAUSE_SECONDS
+    ):
+        self.archive = archive
+        self.enabled = enabled
+        self.hot_window = timedelta(days=hot_days)
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.delete_chunk_size = delete_chunk_size
+        self.delete_pause_seconds = delete_pause_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.alerts_archived = 0
+        self.alerts_deleted = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    async def start(self):
+        """
+        Start the background archive task
+        """
+        if self.enabled:
+            self._task = asyncio.create_task(self._run(), name="alert-retention")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def hot_cutoff(self) -> datetime:
+        """
+        Alerts created before this are archived
+        """
+        return datetime.utcnow() - self.hot_window
+
+    def reaches_archive(self, start_date: Optional[datetime]) -> bool:
+        """
+        Whether a query from start_date needs the archive as well as the alerts table
+        """
+        return self.enabled and start_date is not None and to_naive_utc(start_date) < self.hot_cutoff()
+
+    async def run_once(self) -> int:
+        """
+        Archive and delete every alert past the hot window
+        Returns the number of alerts archived
+        """
+        cutoff = self.hot_cutoff()
+        archived = 0
+        loop = asyncio.get_running_loop()
+        async with AsyncSessionLocal() as db:
+            while True:
+                alerts = await get_alerts_to_archive(db, cutoff, self.batch_size)
+                if not alerts:
+                    break
+                # Detached so the deletes below don't expire them mid-write
+                for alert in alerts:
+                    db.expunge(alert)
+                await loop.run_in_executor(None, self.archive.write, alerts)
+                self.alerts_archived += len(alerts)
+                archived += len(alerts)
+                await self._delete(db, [alert.id for alert in alerts])
+                if len(alerts) < self.batch_size:
+                    break
+        self.runs += 1
+        self.last_run_at = datetime.utcnow()
+        return archived
+
+    async def _delete(self, db, alert_ids: List[int]):
+        for start in range(0, len(alert_ids), self.delete_chunk_size):
+            self.alerts_deleted += await delete_alerts(db, alert_ids[start:start + self.delete_chunk_size])
+            if self.delete_pause_seconds:
+                await asyncio.sleep(self.delete_pause_seconds)
+
+    async def query_archive(
+        self,
+        severity: Optional[str] = None,
+        source: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        after: Optional[Tuple[datetime, int]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Alert]:
+        """
+        Archived alerts matching the /alerts/ filters, newest first
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.archive.query(severity, source, start_date, end_date, limit, after, metadata)
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Alert retention error: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "hot_days": self.hot_window.total_seconds() / 86400,
+            "hot_cutoff": self.hot_cutoff().isoformat(),
+            "runs": self.runs,
+            "alerts_archived": self.alerts_archived,
+            "alerts_deleted": self.alerts_deleted,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_error": self.last_error,
+            **self.archive.stats(),
+        }
+
+# Shared retention job and archive reader
+alert_retention = AlertRetention(AlertArchive(RETENTION_ARCHIVE_URI, RETENTION_COMPRESSION))
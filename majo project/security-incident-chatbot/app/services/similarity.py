@@ -0,0 +1,253 @@
+import os
+import asyncio
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.models import Alert
+from app.repositories.alert_repository import get_alerts_by_ids
+from app.repositories.embedding_repository import (
+    save_alert_embeddings,
+    get_alert_embedding,
+    stream_alert_embeddings,
+    get_alerts_without_embeddings
+)
+from app.repositories.recommendation_repository import get_latest_recommendations
+from app.services.embeddings import get_embedding_provider, vectors_to_bytes, vectors_from_bytes
+from app.services.vector_index import IVFIndex
+
+# Load environment variables
+load_dotenv()
+
+# Similar-alert lookup configuration
+SIMILARITY_ENABLED = os.getenv("SIMILARITY_ENABLED", "true").lower() == "true"
+# Newest alerts kept in the in-memory index (256 dimensions: about 260 bytes each)
+SIMILARITY_MAX_VECTORS = int(os.getenv("SIMILARITY_MAX_VECTORS", "1000000"))
+# Embed alerts stored before the feature existed, newest first, after startup
+SIMILARITY_BACKFILL = os.getenv("SIMILARITY_BACKFILL", "true").lower() == "true"
+SIMILARITY_BATCH_SIZE = int(os.getenv("SIMILARITY_BATCH_SIZE", "256"))
+SIMILARITY_QUEUE_SIZE = int(os.getenv("SIMILARITY_QUEUE_SIZE", "100000"))
+# Lists scanned per query; higher is slower with better recall
+SIMILARITY_NPROBE = int(os.getenv("SIMILARITY_NPROBE", "10"))
+# Neighbours added to the recommendation prompt, and the score they need
+SIMILARITY_PROMPT_NEIGHBOURS = int(os.getenv("SIMILARITY_PROMPT_NEIGHBOURS", "3"))
+SIMILARITY_PROMPT_MIN_SCORE = float(os.getenv("SIMILARITY_PROMPT_MIN_SCORE", "0.5"))
+
+class SimilarAlertIndex:
+    """
+    Embeddings of alert messages with an in-memory IVF index over the newest
+    SIMILARITY_MAX_VECTORS of them.
+
+    Vectors are stored in alert_embeddings and loaded into the index on
+    startup. New alerts are queued by the ingest pipeline and embedded in
+    batches by a background task. The index is rebuilt in an executor once
+    the vectors added since the last build reach 10% of its size, keeping
+    only the newest SIMILARITY_MAX_VECTORS, so between rebuilds it holds at
+    most 10% more than that.
+    """
+
+    def __init__(self, provider=None, max_vectors: int = SIMILARITY_MAX_VECTORS):
+        self.provider = provider or get_embedding_provider()
+        self.max_vectors = max_vectors
+        self.index = IVFIndex(self.provider.dimensions, nprobe=SIMILARITY_NPROBE)
+        self.ready = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=SIMILARITY_QUEUE_SIZE)
+        self._task: Optional[asyncio.Task] = None
+        self._rebuild: Optional[asyncio.Task] = None
+        self.embedded = 0
+        self.backfilled = 0
+        self.dropped = 0
+        self.searches = 0
+        self.rebuilds = 0
+        self.errors = 0
+
+    @property
+    def model(self) -> str:
+        return self.provider.name
+
+    async def start(self):
+        """
+        Load stored vectors, then embed queued and missing alerts in the background
+        """
+        self._task = asyncio.create_task(self._run(), name="similarity-index")
+
+    async def stop(self):
+        for task in [self._task, self._rebuild]:
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._task = self._rebuild = None
+
+    def enqueue(self, alert: Alert):
+        """
+        Queue a newly stored alert for embedding
+        """
+        if not SIMILARITY_ENABLED:
+            return
+        try:
+            self._queue.put_nowait((alert.id, alert.message))
+        except asyncio.QueueFull:
+            # Picked up by the next startup backfill, or embedded on first lookup
+            self.dropped += 1
+
+    async def _run(self):
+        try:
+            await self._load()
+            if SIMILARITY_BACKFILL:
+                await self._backfill()
+        except Exception as e:
+            self.errors += 1
+            print(f"Similarity index load error: {e}")
+        self.ready = True
+
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < SIMILARITY_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._embed_and_store(batch)
+                self.embedded += len(batch)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error embedding {len(batch)} alerts: {e}")
+
+    async def _load(self):
+        ids, blobs = [], []
+        async with AsyncSessionLocal() as db:
+            async for rows in stream_alert_embeddings(db, self.model, self.max_vectors):
+                ids.extend(alert_id for alert_id, _ in rows)
+                blobs.extend(embedding for _, embedding in rows)
+        vectors = vectors_from_bytes(blobs, self.provider.dimensions)
+        del blobs
+        index = IVFIndex(self.provider.dimensions, nprobe=SIMILARITY_NPROBE)
+        await asyncio.get_running_loop().run_in_executor(None, index.build, np.array(ids, dtype=np.int64), vectors)
+        # Alerts embedded while loading were added to the old index
+        index.add(*self.index.contents())
+        self.index = index
+        print(f"Similarity index loaded {len(ids)} vectors ({self.model}, {index.nlist} lists)")
+
+    async def _backfill(self):
+        before_id = None
+        while len(self.index) < self.max_vectors:
+            async with AsyncSessionLocal() as db:
+                rows = await get_alerts_without_embeddings(
+                    db, self.model, min(SIMILARITY_BATCH_SIZE * 4, self.max_vectors - len(self.index)), before_id
+                )
+            if not rows:
+                break
+            await self._embed_and_store(rows)
+            self.backfilled += len(rows)
+            before_id = rows[-1][0]
+
+    async def _embed_and_store(self, rows: List[Tuple[int, str]]):
+        alert_ids = [alert_id for alert_id, _ in rows]
+        vectors = await self.provider.embed([message for _, message in rows])
+        async with AsyncSessionLocal() as db:
+            await save_alert_embeddings(db, self.model, alert_ids, vectors_to_bytes(vectors))
+        self.index.add(alert_ids, vectors)
+        self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        if self._rebuild is not None:
+            return
+        over_cap = len(self.index) - self.max_vectors > self.max_vectors // 10
+        if self.index.pending < max(self.index.train_threshold, len(self.index) // 10) and not over_cap:
+            return
+        self._rebuild = asyncio.create_task(self._rebuild_index(), name="similarity-rebuild")
+
+    async def _rebuild_index(self):
+        try:
+            old = self.index
+            ids, vectors = old.contents()
+            size = len(ids)
+            if size > self.max_vectors:
+                # Alert IDs increase over time, so the highest are the newest
+                newest = np.argsort(ids, kind="stable")[-self.max_vectors:]
+                ids, vectors = ids[newest], vectors[newest]
+            index = IVFIndex(self.provider.dimensions, nprobe=SIMILARITY_NPROBE)
+            await asyncio.get_running_loop().run_in_executor(None, index.build, ids, vectors)
+            index.add(*old.added_since(size))
+            self.index = index
+            self.rebuilds += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Similarity index rebuild error: {e}")
+        finally:
+            self._rebuild = None
+
+    async def _alert_vector(self, db: AsyncSession, alert: Alert) -> np.ndarray:
+        embedding = await get_alert_embedding(db, self.model, alert.id)
+        if embedding is not None:
+            return vectors_from_bytes([embedding], self.provider.dimensions)[0]
+        vector = (await self.provider.embed([alert.message]))[0]
+        await save_alert_embeddings(db, self.model, [alert.id], vectors_to_bytes(vector[None, :]))
+        self.index.add([alert.id], vector[None, :])
+        self._maybe_rebuild()
+        return vector
+
+    async def similar(self, db: AsyncSession, alert: Alert, k: int) -> List[Tuple[Alert, float]]:
+        """
+        The k stored alerts whose messages are closest to this alert's, best first
+        """
+        self.searches += 1
+        vector = await self._alert_vector(db, alert)
+        # A few extra in case some neighbours were deleted since they were indexed
+        neighbours = self.index.search(vector, k + 5, exclude=alert.id)
+        alerts = await get_alerts_by_ids(db, [alert_id for alert_id, _ in neighbours])
+        # float16 storage can put identical messages a hair above 1.0
+        return [(alerts[alert_id], min(score, 1.0)) for alert_id, score in neighbours if alert_id in alerts][:k]
+
+    async def prompt_context(self, db: AsyncSession, alert: Alert) -> List[dict]:
+        """
+        Similar past alerts, with their JIRA tickets and recommendations, for
+        the recommendation prompt. Empty when disabled, loading or on error.
+        """
+        if not SIMILARITY_ENABLED or not SIMILARITY_PROMPT_NEIGHBOURS or not self.ready:
+            return []
+        try:
+            neighbours = [
+                (neighbour, score)
+                for neighbour, score in await self.similar(db, alert, SIMILARITY_PROMPT_NEIGHBOURS)
+                if score >= SIMILARITY_PROMPT_MIN_SCORE
+            ]
+            recommendations = await get_latest_recommendations(db, [neighbour.id for neighbour, _ in neighbours])
+        except Exception as e:
+            self.errors += 1
+            print(f"Error finding similar alerts for alert {alert.id}: {e}")
+            return []
+        return [
+            {
+                "severity": neighbour.severity,
+                "message": neighbour.message,
+                "score": score,
+                "jira_ticket_id": neighbour.jira_ticket_id,
+                "recommendation": recommendations.get(neighbour.id),
+            }
+            for neighbour, score in neighbours
+        ]
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": SIMILARITY_ENABLED,
+            "model": self.model,
+            "ready": self.ready,
+            "vectors": len(self.index),
+            "pending": self.index.pending,
+            "lists": self.index.nlist,
+            "nprobe": self.index.nprobe,
+            "memory_mb": round(self.index.memory_bytes() / 2**20, 1),
+            "queued": self._queue.qsize(),
+            "embedded": self.embedded,
+            "backfilled": self.backfilled,
+            "dropped": self.dropped,
+            "searches": self.searches,
+            "rebuilds": self.rebuilds,
+            "errors": self.errors,
+        }
+
+# Shared index used by the API, the ingest pipeline and recommendations
+similar_alert_index = SimilarAlertIndex()
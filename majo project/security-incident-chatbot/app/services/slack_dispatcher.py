@@ -0,0 +1,207 @@
+import os
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from slack_sdk.errors import SlackApiError
+from app.models import Alert
+from app.services.rate_limit import TokenBucket
+
+# Load environment variables
+load_dotenv()
+
+# Slack allows about one message per second per channel, with short bursts
+SLACK_RATE_PER_SECOND = float(os.getenv("SLACK_RATE_PER_SECOND", "1"))
+SLACK_BURST = float(os.getenv("SLACK_BURST", "3"))
+# Alerts waiting for a channel at which they are sent as one digest message
+SLACK_DIGEST_THRESHOLD = int(os.getenv("SLACK_DIGEST_THRESHOLD", "3"))
+# Slack caps a message at 50 blocks; each digest entry uses 3
+SLACK_DIGEST_MAX_ALERTS = int(os.getenv("SLACK_DIGEST_MAX_ALERTS", "15"))
+# Attempts for errors other than rate limiting before a message is reported as failed
+SLACK_MAX_ATTEMPTS = int(os.getenv("SLACK_MAX_ATTEMPTS", "3"))
+# Wait used when a rate-limited response carries no Retry-After
+SLACK_DEFAULT_RETRY_AFTER = float(os.getenv("SLACK_DEFAULT_RETRY_AFTER", "1"))
+
+@dataclass
+class OutgoingMessage:
+    text: str
+    blocks: List[dict]
+    future: asyncio.Future
+    # Set for alert notifications, which can be coalesced into a digest
+    alert: Optional[Alert] = None
+    attempts: int = 0
+    queued_at: float = field(default_factory=time.monotonic)
+
+class _Channel:
+    def __init__(self, rate: float, burst: float):
+        self.queue: Deque[OutgoingMessage] = deque()
+        self.bucket = TokenBucket(rate, burst)
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+class SlackDispatcher:
+    """
+    Outbound Slack queue with one sender task and token bucket per channel.
+
+    Rate-limited responses pause the channel for the Retry-After the API
+    returned and the message is retried, so it is delayed rather than
+    dropped. When SLACK_DIGEST_THRESHOLD or more alert notifications are
+    waiting for a channel, they are coalesced into a single digest message.
+    """
+
+    def __init__(
+        self,
+        client,
+        digest_builder: Callable[[List[Alert]], Tuple[str, List[dict]]],
+        rate_per_second: float = SLACK_RATE_PER_SECOND,
+        burst: float = SLACK_BURST,
+        digest_threshold: int = SLACK_DIGEST_THRESHOLD,
+        digest_max_alerts: int = SLACK_DIGEST_MAX_ALERTS,
+        max_attempts: int = SLACK_MAX_ATTEMPTS
+    ):
+        self.client = client
+        self.digest_builder = digest_builder
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.digest_threshold = digest_threshold
+        self.digest_max_alerts = digest_max_alerts
+        self.max_attempts = max_attempts
+        self._channels: Dict[str, _Channel] = {}
+        self.messages_sent = 0
+        self.alerts_delivered = 0
+        self.digests_sent = 0
+        self.alerts_in_digests = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.failures = 0
+        self.delivery_time_total = 0.0
+        self.delivery_time_max = 0.0
+        self.delivered = 0
+
+    async def submit(self, channel: str, text: str, blocks: List[dict], alert: Optional[Alert] = None) -> bool:
+        """
+        Queue a message for a channel and wait for it to be delivered
+        Returns: True once Slack accepted it (possibly as part of a digest),
+        False if it failed SLACK_MAX_ATTEMPTS times or the dispatcher stopped
+        """
+        state = self._channels.get(channel)
+        if state is None:
+            state = self._channels[channel] = _Channel(self.rate_per_second, self.burst)
+        if state.task is None or state.task.done():
+            state.task = asyncio.create_task(self._sender(channel, state), name=f"slack-sender-{channel}")
+
+        message = OutgoingMessage(text, blocks, asyncio.get_running_loop().create_future(), alert)
+        state.queue.append(message)
+        state.wakeup.set()
+        return await message.future
+
+    async def stop(self):
+        """
+        Cancel the sender tasks; messages still queued are reported as not delivered
+        """
+        for state in self._channels.values():
+            if state.task:
+                state.task.cancel()
+        await asyncio.gather(*(state.task for state in self._channels.values() if state.task), return_exceptions=True)
+        for state in self._channels.values():
+            while state.queue:
+                message = state.queue.popleft()
+                if not message.future.done():
+                    message.future.set_result(False)
+        self._channels = {}
+
+    def _take_batch(self, state: _Channel) -> List[OutgoingMessage]:
+        waiting_alerts = [message for message in state.queue if message.alert is not None]
+        if len(waiting_alerts) < self.digest_threshold or state.queue[0].alert is None:
+            return [state.queue.popleft()]
+
+        batch = waiting_alerts[:self.digest_max_alerts]
+        taken = set(map(id, batch))
+        state.queue = deque(message for message in state.queue if id(message) not in taken)
+        return batch
+
+    async def _sender(self, channel: str, state: _Channel):
+        while True:
+            if not state.queue:
+                state.wakeup.clear()
+                await state.wakeup.wait()
+                continue
+
+            await state.bucket.acquire()
+            batch = self._take_batch(state)
+            if len(batch) == 1:
+                text, blocks = batch[0].text, batch[0].blocks
+            else:
+                text, blocks = self.digest_builder([message.alert for message in batch])
+
+            try:
+                await self.client.chat_postMessage(channel=channel, text=text, blocks=blocks)
+            except Exception as e:
+                self._handle_failure(channel, state, batch, e)
+                continue
+
+            self.messages_sent += 1
+            if len(batch) > 1:
+                self.digests_sent += 1
+                self.alerts_in_digests += len(batch)
+            now = time.monotonic()
+            for message in batch:
+                if message.alert is not None:
+                    self.alerts_delivered += 1
+                self.delivered += 1
+                self.delivery_time_total += now - message.queued_at
+                self.delivery_time_max = max(self.delivery_time_max, now - message.queued_at)
+                if not message.future.done():
+                    message.future.set_result(True)
+
+    def _handle_failure(self, channel: str, state: _Channel, batch: List[OutgoingMessage], error: Exception):
+        response = getattr(error, "response", None)
+        if isinstance(error, SlackApiError) and (response.status_code == 429 or response.get("error") == "ratelimited"):
+            headers = {key.lower(): value for key, value in (response.headers or {}).items()}
+            try:
+                retry_after = float(headers.get("retry-after", SLACK_DEFAULT_RETRY_AFTER))
+            except (TypeError, ValueError):
+                # An unparsable header must not kill the channel's sender task
+                retry_after = SLACK_DEFAULT_RETRY_AFTER
+            self.rate_limited += 1
+            state.bucket.pause(retry_after)
+            # Back to the front of the queue in their original order
+            state.queue.extendleft(reversed(batch))
+            return
+
+        detail = response.get("error") if isinstance(error, SlackApiError) else str(error)
+        print(f"Error sending message to Slack channel {channel}: {detail}")
+        retry = []
+        for message in batch:
+            message.attempts += 1
+            if message.attempts < self.max_attempts:
+                retry.append(message)
+            else:
+                self.failures += 1
+                if not message.future.done():
+                    message.future.set_result(False)
+        if retry:
+            self.retries += len(retry)
+            state.queue.extendleft(reversed(retry))
+
+    def queued(self) -> int:
+        return sum(len(state.queue) for state in self._channels.values())
+
+    def stats(self) -> dict:
+        return {
+            "messages_sent": self.messages_sent,
+            "alerts_delivered": self.alerts_delivered,
+            "digests_sent": self.digests_sent,
+            "alerts_in_digests": self.alerts_in_digests,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "failures": self.failures,
+            "delivery_time_avg_ms": round(self.delivery_time_total / self.delivered * 1000, 1) if self.delivered else 0.0,
+            "delivery_time_max_ms": round(self.delivery_time_max * 1000, 1),
+            "channels": {
+                channel: {"queued": len(state.queue), "tokens": round(state.bucket.available(), 2)}
+                for channel, state in self._channels.items()
+            },
+        }
@@ -1,8 +1,13 @@
 import os
-from slack_sdk import WebClient
+import time
+from slack_sdk.web.async_client import AsyncWebClient
 from slack_sdk.errors import SlackApiError
 from dotenv import load_dotenv
+from collections import Counter
+from typing import List, Optional, Tuple
 from app.models import Alert
+from app.services.slack_dispatcher import SlackDispatcher
+from app.observability import observe_stage
 
 # Load environment variables
 load_dotenv()
@@ -11,33 +16,25 @@ load_dotenv()
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 SLACK_CHANNEL_ID = os.getenv("SLACK_CHANNEL_ID")
 
+# SLACK_API_URL can point at a local mock Slack API server
+SLACK_API_URL = os.getenv("SLACK_API_URL", "https://www.slack.com/api/")
+
+# Send through the rate-limited dispatcher (queue, Retry-After, digests)
+SLACK_DISPATCHER_ENABLED = os.getenv("SLACK_DISPATCHER_ENABLED", "true").lower() == "true"
+
 # Initialize Slack client
-slack_client = WebClient(token=SLACK_BOT_TOKEN)
+slack_client = AsyncWebClient(token=SLACK_BOT_TOKEN, base_url=SLACK_API_URL)
 
-async def send_slack_alert(alert: Alert):
-    """
-    Send security alert notification to Slack
-    """
-    # Define emoji based on severity
-    severity_emoji = {
-        "Critical": ":rotating_light:",
-        "High": ":warning:",
-        "Medium": ":warning:",
-        "Low": ":information_source:"
-    }
-    
-    emoji = severity_emoji.get(alert.severity, ":information_source:")
-    
-    # Create message blocks
-    blocks = [
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": f"{emoji} Security Alert: {alert.severity} Severity",
-                "emoji": True
-            }
-        },
+# Emoji shown for each severity
+SEVERITY_EMOJI = {
+    "Critical": ":rotating_light:",
+    "High": ":warning:",
+    "Medium": ":warning:",
+    "Low": ":information_source:"
+}
+
+def _alert_summary_blocks(alert: Alert) -> List[dict]:
+    return [
         {
             "type": "section",
             "fields": [
@@ -48,6 +45,7 @@ async def send_slack_alert(alert: Alert):
                 {
                     "type": "mrkdwn",
                     "text": f"*Alert ID:*\n{alert.id}"
+                    + (f" (incident {alert.incident_id})" if alert.incident_id else "")
                 }
             ]
         },
@@ -59,6 +57,25 @@ async def send_slack_alert(alert: Alert):
             }
         }
     ]
+
+def build_alert_blocks(alert: Alert) -> List[dict]:
+    """
+    Message blocks for a single alert notification
+    """
+    emoji = SEVERITY_EMOJI.get(alert.severity, ":information_source:")
+    
+    # Create message blocks
+    blocks = [
+        {
+            "type": "header",
+            "text": {
+                "type": "plain_text",
+                "text": f"{emoji} Security Alert: {alert.severity} Severity",
+                "emoji": True
+            }
+        },
+        *_alert_summary_blocks(alert)
+    ]
     
     # Add JIRA ticket reference if exists
     if alert.jira_ticket_id:
@@ -85,15 +102,118 @@ async def send_slack_alert(alert: Alert):
             ]
         }
     ])
+    return blocks
+
+def build_digest_blocks(alerts: List[Alert]) -> Tuple[str, List[dict]]:
+    """
+    Text and blocks for one message covering several alerts, using the
+    single-alert layout for each entry
+    """
+    counts = Counter(alert.severity for alert in alerts)
+    breakdown = ", ".join(f"{counts[severity]} {severity}" for severity in SEVERITY_EMOJI if counts[severity])
+    emoji = next((SEVERITY_EMOJI[severity] for severity in SEVERITY_EMOJI if counts[severity]), ":information_source:")
+    
+    blocks = [
+        {
+            "type": "header",
+            "text": {
+                "type": "plain_text",
+                "text": f"{emoji} Security Alert Digest: {len(alerts)} alerts",
+                "emoji": True
+            }
+        },
+        {
+            "type": "context",
+            "elements": [
+                {
+                    "type": "mrkdwn",
+                    "text": f"{breakdown}, between {min(alert.created_at for alert in alerts).strftime('%H:%M:%S')} "
+                            f"and {max(alert.created_at for alert in alerts).strftime('%H:%M:%S UTC')}"
+                }
+            ]
+        }
+    ]
+    for alert in alerts:
+        summary = _alert_summary_blocks(alert)
+        # Severity and JIRA ticket go in the header field of each entry
+        summary[0]["fields"][1]["text"] = f"*Alert ID:*\n{alert.id} ({alert.severity})"
+        if alert.jira_ticket_id:
+            summary[0]["fields"][1]["text"] += f" <{os.getenv('JIRA_SERVER')}/browse/{alert.jira_ticket_id}|{alert.jira_ticket_id}>"
+        blocks.append({"type": "divider"})
+        blocks.extend(summary)
+    
+    return f"Security Alert Digest: {len(alerts)} alerts ({breakdown})", blocks
+
+# Shared dispatcher used for all outgoing Slack messages
+slack_dispatcher = SlackDispatcher(slack_client, build_digest_blocks)
+
+async def _post_message(text: str, blocks: List[dict], alert: Optional[Alert] = None) -> bool:
+    if SLACK_DISPATCHER_ENABLED:
+        return await slack_dispatcher.submit(SLACK_CHANNEL_ID, text, blocks, alert=alert)
     
     try:
-        # Send the message
-        response = slack_client.chat_postMessage(
-            channel=SLACK_CHANNEL_ID,
-            text=f"Security Alert: {alert.severity} severity from {alert.source}",
-            blocks=blocks
-        )
+        await slack_client.chat_postMessage(channel=SLACK_CHANNEL_ID, text=text, blocks=blocks)
         return True
     except SlackApiError as e:
         print(f"Error sending message to Slack: {e.response['error']}")
-        return False
\ No newline at end of file
+        return False
+
+async def send_slack_alert(alert: Alert):
+    """
+    Send security alert notification to Slack
+    """
+    # Timed by hand: a failed send is reported by the return value
+    outcome = "error"
+    started = time.perf_counter()
+    try:
+        sent = await _post_message(
+            f"Security Alert: {alert.severity} severity from {alert.source}",
+            build_alert_blocks(alert),
+            alert=alert
+        )
+        outcome = "ok" if sent else "error"
+        return sent
+    finally:
+        observe_stage("slack.send_alert", time.perf_counter() - started, outcome, "SlackApiError")
+
+async def send_slack_suppression_summary(alert: Alert):
+    """
+    Send a summary of the duplicates folded into an alert during its suppression window
+    """
+    suppressed = alert.occurrence_count - 1
+    blocks = [
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": (
+                    f":mute: *{suppressed} duplicate{'s' if suppressed != 1 else ''} suppressed* "
+                    f"for {alert.severity} alert {alert.id} from {alert.source}"
+                )
+            }
+        },
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": f"*Alert Message:*\n{alert.message}"
+            }
+        },
+        {
+            "type": "context",
+            "elements": [
+                {
+                    "type": "mrkdwn",
+                    "text": (
+                        f"First seen {alert.first_seen_at.strftime('%Y-%m-%d %H:%M:%S UTC')}, "
+                        f"last seen {alert.last_seen_at.strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    )
+                }
+            ]
+        }
+    ]
+    
+    return await _post_message(
+        f"{suppressed} duplicates suppressed for alert {alert.id} from {alert.source}",
+        blocks
+    )
@@ -0,0 +1,64 @@
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import AlertStatsBucket, AlertStatsResponse
+from app.repositories.stats_repository import get_alert_stats, bucket_start, to_naive_utc, GRANULARITIES
+
+# Load environment variables
+load_dotenv()
+
+# Largest number of buckets one /alerts/stats request may cover
+STATS_MAX_BUCKETS = int(os.getenv("STATS_MAX_BUCKETS", "10000"))
+
+BUCKET_SIZES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+async def get_alert_stats_summary(
+    db: AsyncSession,
+    granularity: str,
+    start_date: datetime,
+    end_date: datetime,
+    severity: Optional[str] = None,
+    source: Optional[str] = None
+) -> AlertStatsResponse:
+    """
+    Alert counts by severity, source and time bucket, read from the rollups
+    The cost depends on the number of buckets in the range, not on the size
+    of the alerts table. Buckets are included when they start inside the range.
+    """
+    start_date, end_date = to_naive_utc(start_date), to_naive_utc(end_date)
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if end_date <= start_date:
+        raise ValueError("end_date must be after start_date")
+    if (end_date - bucket_start(start_date, granularity)) / BUCKET_SIZES[granularity] > STATS_MAX_BUCKETS:
+        raise ValueError(f"Range covers more than {STATS_MAX_BUCKETS} {granularity} buckets; use a coarser granularity")
+
+    by_severity = Counter()
+    by_source = Counter()
+    buckets = defaultdict(Counter)
+    for start, row_severity, row_source, count in await get_alert_stats(
+        db, granularity, start_date, end_date, severity, source
+    ):
+        by_severity[row_severity] += count
+        by_source[row_source] += count
+        buckets[start][row_severity] += count
+
+    return AlertStatsResponse(
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        total=sum(by_severity.values()),
+        by_severity=dict(by_severity),
+        by_source=dict(by_source),
+        buckets=[
+            AlertStatsBucket(bucket_start=start, count=sum(counts.values()), by_severity=dict(counts))
+            for start, counts in sorted(buckets.items())
+        ]
+    )
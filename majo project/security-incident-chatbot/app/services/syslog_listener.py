@@ -0,0 +1,478 @@
+import os
+import re
+import asyncio
+import socket
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from app.database import AsyncSessionLocal
+from app.models import AlertCreate
+from app.services.alert_pipeline import ingest_alerts, BULK_INSERT_CHUNK_SIZE
+
+# Load environment variables
+load_dotenv()
+
+# Syslog listener configuration. A port of 0 turns that transport off.
+SYSLOG_ENABLED = os.getenv("SYSLOG_ENABLED", "false").lower() == "true"
+SYSLOG_HOST = os.getenv("SYSLOG_HOST", "0.0.0.0")
+SYSLOG_UDP_PORT = int(os.getenv("SYSLOG_UDP_PORT", "5514"))
+SYSLOG_TCP_PORT = int(os.getenv("SYSLOG_TCP_PORT", "5514"))
+# Parsed messages waiting to be stored. When it is full UDP datagrams are
+# dropped and TCP connections stop being read until there is room again.
+SYSLOG_QUEUE_SIZE = int(os.getenv("SYSLOG_QUEUE_SIZE", "20000"))
+# Messages stored per ingest_alerts call, and the longest a batch waits to fill
+SYSLOG_BATCH_SIZE = int(os.getenv("SYSLOG_BATCH_SIZE", str(BULK_INSERT_CHUNK_SIZE)))
+SYSLOG_BATCH_WAIT_MS = float(os.getenv("SYSLOG_BATCH_WAIT_MS", "200"))
+# Batches stored at the same time
+SYSLOG_WORKERS = int(os.getenv("SYSLOG_WORKERS", "2"))
+# Kernel receive buffer for the UDP socket (bytes; capped by net.core.rmem_max).
+# Bursts beyond it are dropped by the kernel before the listener sees them.
+SYSLOG_UDP_RECEIVE_BUFFER = int(os.getenv("SYSLOG_UDP_RECEIVE_BUFFER", str(8 * 1024 * 1024)))
+# Longest message accepted over TCP (bytes); UDP is bounded by the datagram
+SYSLOG_MAX_MESSAGE_BYTES = int(os.getenv("SYSLOG_MAX_MESSAGE_BYTES", "65536"))
+
+FACILITIES = [
+    "kern", "user", "mail", "daemon", "auth", "syslog", "lpr", "news", "uucp", "cron", "authpriv", "ftp",
+    "ntp", "security", "console", "solaris-cron", "local0", "local1", "local2", "local3", "local4", "local5",
+    "local6", "local7",
+]
+SEVERITIES = ["emerg", "alert", "crit", "err", "warning", "notice", "info", "debug"]
+
+# RFC 3164 timestamp ("Oct  7 21:04:05") and TAG[PID]: prefix
+BSD_TIMESTAMP = re.compile(r"([A-Z][a-z]{2}) {1,2}(\d{1,2}) (\d{2}):(\d{2}):(\d{2}) ")
+BSD_TAG = re.compile(r"([^\s\[\]:]{1,48})(?:\[([^\]]{1,128})\])?: ?")
+MONTHS = {name: number for number, name in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], start=1
+)}
+# RFC 5424 structured data escapes inside PARAM-VALUE
+SD_ESCAPES = re.compile(r'\\([\\"\]])')
+
+@dataclass
+class SyslogMessage:
+    facility: int
+    severity: int
+    message: str
+    # None when the sender left it out (RFC 3164 allows a bare message)
+    timestamp: Optional[datetime] = None
+    hostname: Optional[str] = None
+    app_name: Optional[str] = None
+    procid: Optional[str] = None
+    msgid: Optional[str] = None
+    # RFC 5424 structured data: {SD-ID: {PARAM-NAME: PARAM-VALUE}}
+    structured_data: Dict[str, Dict[str, str]] = field(default_factory=dict)
+
+def parse_syslog(data: bytes, now: Optional[datetime] = None) -> SyslogMessage:
+    """
+    Parse one RFC 5424 or RFC 3164 message; the format is told apart by the
+    version digit after PRI. A message without PRI is taken as RFC 3164
+    user.notice, as a relay would (RFC 3164 section 4.3.3).
+    Timestamps are returned as naive UTC. RFC 3164 timestamps carry no year
+    or zone: they are read as UTC in the year that puts them closest before now.
+    Raises ValueError for an empty or malformed message
+    """
+    text = data.decode("utf-8", errors="replace").rstrip("\r\n\x00")
+    if not text.strip():
+        raise ValueError("Empty syslog message")
+
+    facility, severity, rest = 1, 5, text
+    if text.startswith("<"):
+        end = text.find(">", 1, 5)
+        if end == -1 or not text[1:end].isdigit():
+            raise ValueError("Malformed syslog PRI")
+        pri = int(text[1:end])
+        if pri > 191:
+            raise ValueError(f"Syslog PRI out of range: {pri}")
+        facility, severity, rest = pri >> 3, pri & 7, text[end + 1:]
+
+    if rest.startswith("1 "):
+        return _parse_rfc5424(facility, severity, rest[2:])
+    return _parse_rfc3164(facility, severity, rest, now or datetime.utcnow())
+
+def _nil(value: str) -> Optional[str]:
+    return None if value == "-" else value
+
+def _parse_rfc5424(facility: int, severity: int, rest: str) -> SyslogMessage:
+    # TIMESTAMP HOSTNAME APP-NAME PROCID MSGID STRUCTURED-DATA [MSG]
+    parts = rest.split(" ", 5)
+    if len(parts) < 6:
+        raise ValueError("Truncated RFC 5424 header")
+    timestamp, hostname, app_name, procid, msgid, rest = parts
+
+    structured_data, message = _parse_structured_data(rest)
+    return SyslogMessage(
+        facility=facility,
+        severity=severity,
+        message=message.lstrip("\ufeff"),
+        timestamp=_parse_rfc3339(timestamp) if timestamp != "-" else None,
+        hostname=_nil(hostname),
+        app_name=_nil(app_name),
+        procid=_nil(procid),
+        msgid=_nil(msgid),
+        structured_data=structured_data
+    )
+
+def _parse_rfc3339(value: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Malformed RFC 5424 timestamp: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _parse_structured_data(rest: str) -> Tuple[Dict[str, Dict[str, str]], str]:
+    """
+    Split STRUCTURED-DATA from MSG
+    Returns: ({SD-ID: {PARAM-NAME: PARAM-VALUE}}, MSG)
+    """
+    if rest.startswith("-"):
+        return {}, rest[2:]
+    elements: Dict[str, Dict[str, str]] = {}
+    position = 0
+    while position < len(rest) and rest[position] == "[":
+        end = position + 1
+        # Find the closing bracket, skipping escaped ones and quoted values
+        in_value = False
+        while end < len(rest):
+            char = rest[end]
+            if char == "\\" and in_value:
+                end += 2
+                continue
+            if char == '"':
+                in_value = not in_value
+            elif char == "]" and not in_value:
+                break
+            end += 1
+        else:
+            raise ValueError("Unterminated RFC 5424 structured data")
+        sd_id, _, params = rest[position + 1:end].partition(" ")
+        elements[sd_id] = {
+            name: SD_ESCAPES.sub(r"\1", value)
+            for name, value in re.findall(r'([^\s=\]"]+)="((?:[^"\\]|\\.)*)"', params)
+        }
+        position = end + 1
+    if not elements:
+        raise ValueError("Malformed RFC 5424 structured data")
+    return elements, rest[position + 1:] if rest[position:position + 1] == " " else rest[position:]
+
+def _parse_rfc3164(facility: int, severity: int, rest: str, now: datetime) -> SyslogMessage:
+    timestamp = hostname = app_name = procid = None
+    match = BSD_TIMESTAMP.match(rest)
+    if match and match.group(1) in MONTHS:
+        month, day, hour, minute, second = MONTHS[match.group(1)], *map(int, match.groups()[1:])
+        try:
+            timestamp = datetime(now.year, month, day, hour, minute, second)
+        except ValueError:
+            raise ValueError(f"Malformed RFC 3164 timestamp: {match.group(0).strip()}")
+        # Sent late in December and received in January
+        if timestamp > now + timedelta(days=1):
+            timestamp = timestamp.replace(year=now.year - 1)
+        rest = rest[match.end():]
+        # HOSTNAME follows the timestamp; without one the next token is the TAG
+        host, separator, remainder = rest.partition(" ")
+        if separator and not BSD_TAG.fullmatch(host + " "):
+            hostname, rest = host, remainder
+
+    tag = BSD_TAG.match(rest)
+    if tag:
+        app_name, procid, rest = tag.group(1), tag.group(2), rest[tag.end():]
+    return SyslogMessage(
+        facility=facility,
+        severity=severity,
+        message=rest,
+        timestamp=timestamp,
+        hostname=hostname,
+        app_name=app_name,
+        procid=procid
+    )
+
+def syslog_alert(message: SyslogMessage, peer_host: Optional[str] = None) -> AlertCreate:
+    """
+    The alert for a syslog message. The source is the APP-NAME/TAG (for
+    example %ASA-4-106023 or suricata), the host the HOSTNAME or else the
+    sender's address; the syslog header fields go into metadata.
+    Raises ValueError (ValidationError) when the message has no text or a
+    metadata field fails validation
+    """
+    metadata = {
+        "host": message.hostname or peer_host,
+        "syslog_facility": FACILITIES[message.facility] if message.facility < len(FACILITIES) else str(message.facility),
+        "syslog_severity": SEVERITIES[message.severity],
+    }
+    if message.timestamp:
+        metadata["syslog_timestamp"] = message.timestamp.isoformat()
+    if message.procid:
+        metadata["syslog_procid"] = message.procid
+    if message.msgid:
+        metadata["syslog_msgid"] = message.msgid
+    if message.structured_data:
+        metadata["structured_data"] = message.structured_data
+    if not message.message.strip():
+        raise ValueError("Syslog message has no text")
+    return AlertCreate(
+        source=(message.app_name or "syslog")[:100],
+        message=message.message,
+        metadata={key: value for key, value in metadata.items() if value is not None}
+    )
+
+async def ingest_syslog_batch(alerts: List[AlertCreate]) -> int:
+    """
+    Store a batch through the bulk ingest path (dedup, classification,
+    correlation, enrichment)
+    Returns the number of alerts that failed
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            results = await ingest_alerts(db, alerts)
+        except Exception:
+            await db.rollback()
+            raise
+    return sum(1 for result in results if isinstance(result, Exception))
+
+class _SyslogDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener: "SyslogListener"):
+        self.listener = listener
+
+    def datagram_received(self, data: bytes, addr):
+        self.listener.received["udp"] += 1
+        # Nothing can slow a UDP sender down: drop before spending time parsing
+        if self.listener.queue_full():
+            self.listener.dropped += 1
+            return
+        self.listener.submit_nowait(data, addr[0])
+
+class SyslogListener:
+    """
+    Syslog receiver for RFC 5424 and RFC 3164 messages over UDP and TCP
+    (RFC 6587 octet-counted or newline-delimited framing).
+
+    Messages are parsed on arrival into AlertCreate items and put on a
+    bounded queue; workers take up to SYSLOG_BATCH_SIZE at a time and store
+    them with ingest_alerts, the same path as /process_alerts/bulk. When the
+    queue is full, UDP datagrams are dropped and counted, and TCP
+    connections are not read until there is room, so TCP senders are slowed
+    by flow control rather than losing messages.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = SYSLOG_ENABLED,
+        host: str = SYSLOG_HOST,
+        udp_port: int = SYSLOG_UDP_PORT,
+        tcp_port: int = SYSLOG_TCP_PORT,
+        queue_size: int = SYSLOG_QUEUE_SIZE,
+        batch_size: int = SYSLOG_BATCH_SIZE,
+        batch_wait_ms: float = SYSLOG_BATCH_WAIT_MS,
+        workers: int = SYSLOG_WORKERS,
+        udp_receive_buffer: int = SYSLOG_UDP_RECEIVE_BUFFER,
+        max_message_bytes: int = SYSLOG_MAX_MESSAGE_BYTES,
+        ingest: Callable[[List[AlertCreate]], Awaitable[int]] = ingest_syslog_batch
+    ):
+        self.enabled = enabled
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait_ms / 1000
+        self.workers = workers
+        self.udp_receive_buffer = udp_receive_buffer
+        self.max_message_bytes = max_message_bytes
+        self.ingest = ingest
+        # (monotonic receive time, alert)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.received = {"udp": 0, "tcp": 0}
+        self.connections = 0
+        self.parse_errors = 0
+        self.dropped = 0
+        self.stored = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_lag_seconds = 0.0
+        self.max_batch_lag_seconds = 0.0
+
+    async def start(self):
+        """
+        Bind the UDP and TCP listeners and start the batch workers
+        """
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"syslog-worker-{i}")
+            for i in range(self.workers)
+        ]
+        if self.udp_port:
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _SyslogDatagramProtocol(self), local_addr=(self.host, self.udp_port)
+            )
+            try:
+                self._transport.get_extra_info("socket").setsockopt(
+                    socket.SOL_SOCKET, socket.SO_RCVBUF, self.udp_receive_buffer
+                )
+            except OSError as e:
+                print(f"Could not set the syslog UDP receive buffer: {e}")
+        if self.tcp_port:
+            self._server = await asyncio.start_server(
+                self._handle_connection, self.host, self.tcp_port, limit=self.max_message_bytes
+            )
+
+    async def stop(self):
+        """
+        Stop accepting messages and store what is already queued
+        """
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._queue is not None:
+            await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def ports(self) -> Dict[str, int]:
+        """
+        The ports bound by start()
+        """
+        ports = {}
+        if self._transport:
+            ports["udp"] = self._transport.get_extra_info("sockname")[1]
+        if self._server:
+            ports["tcp"] = self._server.sockets[0].getsockname()[1]
+        return ports
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def queue_full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    def _parse(self, data: bytes, peer_host: str) -> Optional[AlertCreate]:
+        try:
+            return syslog_alert(parse_syslog(data), peer_host)
+        except (ValueError, ValidationError):
+            self.parse_errors += 1
+            return None
+
+    def submit_nowait(self, data: bytes, peer_host: str):
+        """
+        Parse and queue a message, dropping it if the queue is full
+        """
+        alert = self._parse(data, peer_host)
+        if alert is None:
+            return
+        try:
+            self._queue.put_nowait((time.monotonic(), alert))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer_host = writer.get_extra_info("peername")[0]
+        self.connections += 1
+        try:
+            while True:
+                data = await self._read_frame(reader)
+                if data is None:
+                    break
+                self.received["tcp"] += 1
+                alert = self._parse(data, peer_host)
+                if alert is not None:
+                    # Waits while the queue is full, which stops reading this socket
+                    await self._queue.put((time.monotonic(), alert))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError) as e:
+            print(f"Syslog connection from {peer_host} closed: {e}")
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _read_frame(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        The next message on a TCP stream: "LEN MSG" when it starts with a
+        digit (octet counting), otherwise everything up to the next newline
+        Returns: None at end of stream
+        """
+        first = await reader.read(1)
+        if not first:
+            return None
+        if first.isdigit():
+            length = first + await reader.readuntil(b" ")
+            size = int(length[:-1])
+            if size > self.max_message_bytes:
+                raise ValueError(f"Syslog frame of {size} bytes exceeds {self.max_message_bytes}")
+            return await reader.readexactly(size)
+        try:
+            return first + await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            # Last message without a trailing newline
+            return first + e.partial if e.partial else None
+
+    async def _next_batch(self) -> List[Tuple[float, AlertCreate]]:
+        """
+        Wait for a message, then take up to batch_size, waiting at most
+        batch_wait for the batch to fill
+        """
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            if self._queue.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                failed = await self.ingest([alert for _, alert in batch])
+                self.stored += len(batch) - failed
+                self.failed += failed
+            except Exception as e:
+                print(f"Syslog batch of {len(batch)} failed: {e}")
+                self.failed += len(batch)
+            finally:
+                self.batches += 1
+                # Time the oldest message in the batch waited to be stored
+                self.last_batch_lag_seconds = time.monotonic() - batch[0][0]
+                self.max_batch_lag_seconds = max(self.max_batch_lag_seconds, self.last_batch_lag_seconds)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ports": self.ports,
+            "received": dict(self.received),
+            "connections": self.connections,
+            "parse_errors": self.parse_errors,
+            "dropped": self.dropped,
+            "stored": self.stored,
+            "failed": self.failed,
+            "batches": self.batches,
+            "queued": self.qsize(),
+            "queue_size": self.queue_size,
+            "last_batch_lag_seconds": round(self.last_batch_lag_seconds, 3),
+            "max_batch_lag_seconds": round(self.max_batch_lag_seconds, 3),
+        }
+
+# Shared listener
+syslog_listener = SyslogListener()
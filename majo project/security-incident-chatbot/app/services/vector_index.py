@@ -0,0 +1,225 @@
+"""
+Approximate nearest-neighbour search over unit-length embedding vectors.
+
+IVFIndex is an inverted-file index: k-means splits the vectors into `nlist`
+lists around centroids, and a query only scores the vectors in the `nprobe`
+lists whose centroids are closest to it. Vectors are kept as int8 codes
+with one float32 scale each, in one contiguous array ordered by list, so 1M
+256-dimension vectors take about 260 MB and are cheap to score.
+
+Nothing in this module imports the rest of the app.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    int8 codes and the per-vector factor that turns them back into floats
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    factors = np.abs(vectors).max(axis=1) / 127.0
+    factors[factors == 0] = 1.0
+    codes = np.rint(vectors / factors[:, None]).astype(np.int8)
+    return codes, factors.astype(np.float32)
+
+class IVFIndex:
+    """
+    Inverted-file index for inner-product (cosine) search over unit vectors
+
+    Below `train_threshold` vectors the index is a flat array searched
+    exhaustively. Vectors added after build() are kept in a pending buffer
+    that is searched exhaustively too, until the index is rebuilt.
+    """
+
+    def __init__(
+        self,
+        dimensions: int,
+        nprobe: int = 10,
+        train_threshold: int = 10000,
+        seed: int = 0
+    ):
+        self.dimensions = dimensions
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        # Vectors ordered by list; list i is codes[offsets[i]:offsets[i + 1]]
+        self._ids = np.empty(0, dtype=np.int64)
+        self._codes = np.empty((0, dimensions), dtype=np.int8)
+        self._factors = np.empty(0, dtype=np.float32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._pending_ids: List[np.ndarray] = []
+        self._pending_codes: List[np.ndarray] = []
+        self._pending_factors: List[np.ndarray] = []
+        self._pending_count = 0
+
+    def __len__(self) -> int:
+        return len(self._ids) + self._pending_count
+
+    @property
+    def pending(self) -> int:
+        return self._pending_count
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    def memory_bytes(self) -> int:
+        size = self._ids.nbytes + self._codes.nbytes + self._factors.nbytes + self._offsets.nbytes
+        for pending in [self._pending_ids, self._pending_codes, self._pending_factors]:
+            size += sum(array.nbytes for array in pending)
+        if self.centroids is not None:
+            size += self.centroids.nbytes
+        return size
+
+    def build(self, ids: np.ndarray, vectors: np.ndarray, nlist: Optional[int] = None, iterations: int = 10):
+        """
+        Replace the contents of the index, training the centroids when there
+        are enough vectors. Default nlist is sqrt(n).
+        CPU-bound: run it in an executor from async code.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors).reshape(-1, self.dimensions)
+        self._pending_ids, self._pending_codes, self._pending_factors, self._pending_count = [], [], [], 0
+
+        if len(ids) < self.train_threshold:
+            self.centroids = None
+            self._ids = ids
+            self._codes, self._factors = quantize(vectors)
+            self._offsets = np.array([0, len(ids)], dtype=np.int64)
+            return
+
+        nlist = nlist or max(1, int(np.sqrt(len(ids))))
+        self.centroids = self._train(vectors, nlist, iterations)
+        assignments = self._nearest_centroid(vectors)
+        order = np.argsort(assignments, kind="stable")
+        self._ids = ids[order]
+        self._codes, self._factors = quantize(vectors[order])
+        counts = np.bincount(assignments, minlength=nlist)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray):
+        """
+        Add vectors without retraining; they are searched exhaustively until the next build()
+        """
+        if len(ids) == 0:
+            return
+        codes, factors = quantize(np.asarray(vectors).reshape(-1, self.dimensions))
+        self._pending_ids.append(np.asarray(ids, dtype=np.int64))
+        self._pending_codes.append(codes)
+        self._pending_factors.append(factors)
+        self._pending_count += len(ids)
+        if len(self._pending_ids) > 64:
+            self._compact_pending()
+
+    def contents(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every (ids, vectors) pair in the index, for rebuilding it
+        """
+        self._compact_pending()
+        if not self._pending_count:
+            return self._ids, self._decode(self._codes, self._factors)
+        return (
+            np.concatenate([self._ids, self._pending_ids[0]]),
+            np.concatenate([
+                self._decode(self._codes, self._factors),
+                self._decode(self._pending_codes[0], self._pending_factors[0])
+            ])
+        )
+
+    def added_since(self, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The vectors added after the index held `size` vectors
+        """
+        self._compact_pending()
+        skip = size - len(self._ids)
+        if not self._pending_count or skip >= self._pending_count:
+            return np.empty(0, dtype=np.int64), np.empty((0, self.dimensions), dtype=np.float32)
+        return self._pending_ids[0][skip:], self._decode(self._pending_codes[0][skip:], self._pending_factors[0][skip:])
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        nprobe: Optional[int] = None,
+        exclude: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        The k vectors with the highest inner product with the query
+        Returns: [(id, score)] best first
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(self.dimensions)
+        self._compact_pending()
+
+        if self.centroids is None:
+            ranges = [(0, len(self._ids))]
+        else:
+            nprobe = min(nprobe or self.nprobe, self.nlist)
+            probe = np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]
+            ranges = [(self._offsets[i], self._offsets[i + 1]) for i in probe]
+        blocks = [(self._ids[a:b], self._codes[a:b], self._factors[a:b]) for a, b in ranges if b > a]
+        if self._pending_count:
+            blocks.append((self._pending_ids[0], self._pending_codes[0], self._pending_factors[0]))
+        if not blocks:
+            return []
+
+        ids = np.concatenate([block[0] for block in blocks])
+        codes = np.concatenate([block[1] for block in blocks])
+        factors = np.concatenate([block[2] for block in blocks])
+        scores = (codes.astype(np.float32) @ query) * factors
+        if exclude is not None:
+            scores[ids == exclude] = -np.inf
+
+        # A few extra candidates in case an id was added more than once
+        top = min(k * 2, len(ids))
+        best = np.argpartition(scores, -top)[-top:]
+        best = best[np.argsort(scores[best])[::-1]]
+
+        results, seen = [], set()
+        for i in best:
+            if scores[i] == -np.inf or ids[i] in seen:
+                continue
+            seen.add(ids[i])
+            results.append((int(ids[i]), float(scores[i])))
+            if len(results) == k:
+                break
+        return results
+
+    def _compact_pending(self):
+        if len(self._pending_ids) > 1:
+            self._pending_ids = [np.concatenate(self._pending_ids)]
+            self._pending_codes = [np.concatenate(self._pending_codes)]
+            self._pending_factors = [np.concatenate(self._pending_factors)]
+
+    @staticmethod
+    def _decode(codes: np.ndarray, factors: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * factors[:, None]
+
+    def _train(self, vectors: np.ndarray, nlist: int, iterations: int) -> np.ndarray:
+        """
+        Spherical k-means on a sample of the vectors
+        """
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(vectors), nlist * 64)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)].astype(np.float32)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=nlist)
+            # Restart empty lists from random sample vectors
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+        return centroids.astype(np.float32)
+
+    def _nearest_centroid(self, vectors: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size].astype(np.float32)
+            assignments[start:start + chunk_size] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return assignments
@@ -0,0 +1 @@
+# This file can be empty - it's just to make the 'benchmarks' directory a proper package
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Bulk ingestion benchmark: /process_alert/ vs /process_alerts/bulk
+
+Sends the same alerts through the single-alert route (with N requests in
+flight) and through the bulk route as JSON arrays and as an NDJSON stream,
+then reports rows/sec for each. The messages match pre-classifier rules, so
+the numbers measure the API and database path rather than the LLM. Each
+alert and run gets its own source so none of them are deduplicated.
+
+Usage:
+    python benchmarks/bulk_ingest_benchmark.py --url http://localhost:8000 --alerts 5000 --batch-size 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+MESSAGES = [
+    "Port scan detected from 10.1.{i}.7",
+    "Failed login for svc_backup{i} from 172.16.0.{i}",
+    "Successful login for analyst{i} from 10.2.0.{i}",
+]
+
+def make_alerts(count: int, run: str):
+    return [
+        {"source": f"benchmark-{run}-{i}", "message": MESSAGES[i % len(MESSAGES)].format(i=i % 250)}
+        for i in range(count)
+    ]
+
+async def single_route(client: httpx.AsyncClient, alerts, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(alert):
+        async with semaphore:
+            (await client.post("/process_alert/", json=alert)).raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(alert) for alert in alerts))
+    return time.perf_counter() - started
+
+async def bulk_json(client: httpx.AsyncClient, alerts, batch_size: int) -> float:
+    started = time.perf_counter()
+    for i in range(0, len(alerts), batch_size):
+        response = await client.post("/process_alerts/bulk", json=alerts[i:i + batch_size])
+        response.raise_for_status()
+    return time.perf_counter() - started
+
+async def bulk_ndjson(client: httpx.AsyncClient, alerts) -> float:
+    async def body():
+        for alert in alerts:
+            yield (json.dumps(alert) + "\n").encode()
+
+    started = time.perf_counter()
+    response = await client.post(
+        "/process_alerts/bulk", content=body(), headers={"Content-Type": "application/x-ndjson"}
+    )
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+async def run(url: str, count: int, batch_size: int, concurrency: int):
+    run_id = uuid.uuid4().hex[:8]
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        for name, elapsed in [
+            ("single", await single_route(client, make_alerts(count, f"{run_id}-s"), concurrency)),
+            ("bulk-json", await bulk_json(client, make_alerts(count, f"{run_id}-j"), batch_size)),
+            ("bulk-ndjson", await bulk_ndjson(client, make_alerts(count, f"{run_id}-n"))),
+        ]:
+            print(f"{name:>12}: {count} rows in {elapsed:.2f}s -> {count / elapsed:,.0f} rows/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Single vs bulk alert ingestion throughput")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--alerts", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.alerts, args.batch_size, args.concurrency))
+
+if __name__ == "__main__":
+    main()
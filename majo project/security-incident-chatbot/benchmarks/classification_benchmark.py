@@ -0,0 +1,91 @@
+"""
+Severity classification benchmark: one call per alert vs micro-batching
+
+Starts the stub LLM server in-process, then classifies the same burst of
+alerts through both paths of app.services.openai_service and reports wall
+time, alerts/sec and the number of upstream LLM requests each path made.
+
+Usage:
+    python benchmarks/classification_benchmark.py --alerts 500 --batch-size 20 --window-ms 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_llm_server import create_app
+
+SAMPLE_MESSAGES = [
+    "Ransomware signature detected on host FS-{i}",
+    "Brute force attempt: 300 failed logins for admin from 10.0.{i}.4",
+    "Port scan detected from 192.168.1.{i}",
+    "User jdoe{i} logged in from a new device",
+]
+
+def start_stub_server(port: int, latency_ms: float, max_concurrency: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(latency_ms, max_concurrency), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def run_path(messages, batched: bool, stats_url: str) -> dict:
+    from app.services import openai_service
+
+    openai_service.CLASSIFIER_BATCHING = batched
+    before = httpx.get(stats_url).json()["requests"]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(openai_service.classify_alert_severity(m) for m in messages))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "path": "batched" if batched else "per-alert",
+        "alerts": len(messages),
+        "elapsed_s": round(elapsed, 3),
+        "alerts_per_s": round(len(messages) / elapsed, 1),
+        "llm_requests": httpx.get(stats_url).json()["requests"] - before,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-alert vs batched severity classification")
+    parser.add_argument("--alerts", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--window-ms", type=float, default=50)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--max-concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    start_stub_server(args.port, args.latency_ms, args.max_concurrency)
+
+    # Configure the service before it is imported
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+    os.environ["CLASSIFIER_BATCH_SIZE"] = str(args.batch_size)
+    os.environ["CLASSIFIER_BATCH_WINDOW_MS"] = str(args.window_ms)
+
+    messages = [SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)].format(i=i) for i in range(args.alerts)]
+    stats_url = f"http://127.0.0.1:{args.port}/stats"
+
+    async def run_all():
+        return [
+            await run_path(messages, batched=False, stats_url=stats_url),
+            await run_path(messages, batched=True, stats_url=stats_url),
+        ]
+
+    for result in asyncio.run(run_all()):
+        print("  ".join(f"{key}={value}" for key, value in result.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Concurrency benchmark for /process_alert/
+
+Fires a fixed number of alerts at a running API with N requests in flight
+at once and reports throughput and latency percentiles. Run it against the
+app with OpenAI/JIRA/Slack pointed at local stand-ins so the numbers reflect
+this service rather than the SaaS endpoints.
+
+Usage:
+    python benchmarks/concurrency_benchmark.py --url http://localhost:8000 --requests 1000 --concurrency 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+async def run(url: str, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        async def send(i: int):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/process_alert/", json={
+                        "source": "benchmark",
+                        "message": f"Benchmark alert {i}: failed login for admin from 10.0.0.{i % 255}"
+                    })
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for /process_alert/")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.requests, args.concurrency))
+    for key, value in result.items():
+        print(f"{key:>16}: {value}")
+
+if __name__ == "__main__":
+    main()
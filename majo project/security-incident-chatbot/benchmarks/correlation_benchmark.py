@@ -0,0 +1,200 @@
+"""
+Incident correlation benchmark: an attack of many related alerts at 10k alerts/sec
+
+Generates a synthetic stream: a number of attack campaigns, each with its
+own attacker IPs, victim hosts, users and malware hashes, mixed with
+unrelated background alerts, timestamped at --rate alerts per second.
+Measures:
+- in-memory correlation throughput (alerts/sec, per-alert latency)
+- incidents formed and index size
+- the JIRA tickets, Slack posts and LLM recommendations the High/Critical
+  alerts need when handled per alert and when handled per incident
+
+With --with-db the stream is also stored and correlated in batches, as the
+bulk ingest route does, in a throwaway database on the DATABASE_URL server
+(created with the app's migrations and dropped afterwards):
+    python benchmarks/correlation_benchmark.py --alerts 200000 --rate 10000
+    DATABASE_URL=postgresql://... python benchmarks/correlation_benchmark.py --alerts 50000 --with-db
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CAMPAIGN_TEMPLATES = [
+    ("Mimikatz credential dump detected on host {host} by user {user}", "High"),
+    ("Beacon from {host} to {ip} every 60s", "Critical"),
+    ("Port scan detected from {ip} targeting {n} ports on {host}", "Medium"),
+    ("Failed login for {user} from {ip}", "Low"),
+    ("Malware hash {hash} executed on {host}", "High"),
+    ("Ransomware behaviour: {n} files encrypted on {host}", "Critical"),
+]
+NOISE_TEMPLATES = [
+    ("Successful login for {user} from {ip}", "Low"),
+    ("Outbound connection to {ip} blocked by proxy policy", "Medium"),
+    ("Suspicious powershell executed by {user} on {host}", "High"),
+]
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+
+def make_stream(count: int, campaigns: int, noise: float, seed: int):
+    """
+    (source, message, severity) for each alert, and the campaign it belongs to (None for noise)
+    """
+    rng = random.Random(seed)
+    pools = []
+    for c in range(campaigns):
+        pools.append({
+            "ip": [f"185.{c % 250}.{rng.randrange(256)}.{rng.randrange(256)}" for _ in range(3)],
+            "host": [f"srv-{c}-{h}" for h in range(4)],
+            "user": [f"svc_{c}_{u}" for u in range(2)],
+            "hash": ["%064x" % rng.getrandbits(256)],
+        })
+
+    stream = []
+    for _ in range(count):
+        if rng.random() < noise:
+            template, severity = rng.choice(NOISE_TEMPLATES)
+            values = {
+                "ip": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                "host": f"ws-{rng.randrange(1_000_000)}",
+                "user": f"user{rng.randrange(1_000_000)}",
+            }
+            campaign = None
+        else:
+            campaign = rng.randrange(campaigns)
+            template, severity = rng.choice(CAMPAIGN_TEMPLATES)
+            values = {key: rng.choice(pool) for key, pool in pools[campaign].items()}
+        values["n"] = rng.randrange(10, 5000)
+        stream.append((f"sensor-{rng.randrange(8)}", template.format(**values), severity, campaign))
+    return stream
+
+def external_calls(assignments):
+    """
+    JIRA tickets, Slack posts and recommendations for the High/Critical alerts,
+    per alert and per incident (one ticket, a post per severity increase,
+    a recommendation per severity)
+    """
+    enriched = [(incident, severity) for incident, severity in assignments if severity in ("High", "Critical")]
+    announced = {}
+    slack = 0
+    for incident, severity in enriched:
+        if SEVERITIES.index(severity) > announced.get(incident, -1):
+            announced[incident] = SEVERITIES.index(severity)
+            slack += 1
+    per_alert = len(enriched)
+    return {
+        "per_alert": {"jira": per_alert, "slack": per_alert, "llm": per_alert},
+        "per_incident": {
+            "jira": len({incident for incident, _ in enriched}),
+            "slack": slack,
+            "llm": len(set(enriched)),
+        },
+    }
+
+def run_in_memory(stream, rate: float, window_seconds: float) -> dict:
+    from app.services.correlation import IncidentCorrelator
+
+    correlator = IncidentCorrelator(window_seconds=window_seconds)
+    start = datetime(2026, 10, 18)
+    step = timedelta(seconds=1 / rate)
+    assignments = []
+    latencies = []
+    began = time.perf_counter()
+    for n, (source, message, severity, _) in enumerate(stream):
+        started = time.perf_counter()
+        incident, _ = correlator.assign(source, message, severity, start + step * n)
+        latencies.append(time.perf_counter() - started)
+        assignments.append((incident, severity))
+    elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    stats = correlator.stats()
+    return {
+        "alerts": len(stream),
+        "elapsed_s": round(elapsed, 2),
+        "alerts_per_s": round(len(stream) / elapsed),
+        "p50_us": round(statistics.median(latencies) * 1e6, 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+        "incidents": stats["incidents_created"],
+        "indexed_entities": stats["indexed_entities"],
+        "external_calls": external_calls(assignments),
+    }
+
+async def run_with_db(stream, batch_size: int) -> dict:
+    from app.database import AsyncSessionLocal
+    from app.repositories.alert_repository import create_alerts_bulk
+    from app.services.correlation import IncidentCorrelator
+
+    correlator = IncidentCorrelator()
+    correlate_seconds = 0.0
+    began = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for i in range(0, len(stream), batch_size):
+            rows = [
+                {"source": source, "message": message, "severity": severity, "enrichment_status": "skipped"}
+                for source, message, severity, _ in stream[i:i + batch_size]
+            ]
+            alerts = await create_alerts_bulk(db, rows)
+            started = time.perf_counter()
+            await correlator.correlate(db, alerts)
+            correlate_seconds += time.perf_counter() - started
+    elapsed = time.perf_counter() - began
+    return {
+        "alerts": len(stream),
+        "batch_size": batch_size,
+        "ingest_and_correlate_s": round(elapsed, 2),
+        "correlate_s": round(correlate_seconds, 2),
+        "correlated_alerts_per_s": round(len(stream) / correlate_seconds),
+        "incidents": correlator.stats()["incidents_created"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Incident correlation throughput")
+    parser.add_argument("--alerts", type=int, default=200000)
+    parser.add_argument("--rate", type=float, default=10000, help="Alerts per second of the simulated stream")
+    parser.add_argument("--campaigns", type=int, default=50)
+    parser.add_argument("--noise", type=float, default=0.2, help="Fraction of unrelated background alerts")
+    parser.add_argument("--window-seconds", type=float, default=900)
+    parser.add_argument("--with-db", action="store_true", help="Also store and correlate the stream in a throwaway database")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    stream = make_stream(args.alerts, args.campaigns, args.noise, args.seed)
+
+    if args.with_db:
+        if not os.getenv("DATABASE_URL"):
+            parser.error("--with-db needs DATABASE_URL pointing at a Postgres server")
+        from benchmarks.load_suite import EphemeralDatabase
+        from sqlalchemy.engine import make_url
+
+        with EphemeralDatabase(os.environ["DATABASE_URL"]) as database:
+            # The app's engines read the URL on import
+            os.environ["DATABASE_URL"] = database.url
+            os.environ["ASYNC_DATABASE_URL"] = make_url(database.url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+            from app.database import async_engine, engine, run_migrations
+            run_migrations()
+            print(run_in_memory(stream, args.rate, args.window_seconds))
+
+            async def run():
+                try:
+                    return await run_with_db(stream, args.batch_size)
+                finally:
+                    await async_engine.dispose()
+
+            result = asyncio.run(run())
+            engine.dispose()
+            print(result)
+        return
+
+    os.environ.setdefault("DATABASE_URL", "postgresql://localhost/unused")
+    print(run_in_memory(stream, args.rate, args.window_seconds))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Local stand-in for the JIRA REST API endpoints used by app/services/jira_service.py
+
+Serves serverInfo, field, issue lookup, single and bulk issue creation and
+label search, each after a configurable delay, and counts requests per
+endpoint so a benchmark can see how many round trips a workload needed.
+--error-rate answers that fraction of issue creation and search requests
+with a 503. Point the app at it with JIRA_SERVER=http://localhost:8003.
+
+Usage:
+    python benchmarks/fake_jira_server.py --port 8003 --latency-ms 50
+"""
+import argparse
+import asyncio
+import random
+import re
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+def create_app(latency_ms: float = 50, project_key: str = "SEC", error_rate: float = 0) -> FastAPI:
+    app = FastAPI(title="Fake JIRA server")
+    app.state.requests = Counter()
+    app.state.errors = 0
+    app.state.issues = {}
+
+    async def handle(endpoint: str):
+        app.state.requests[endpoint] += 1
+        await asyncio.sleep(latency_ms / 1000)
+
+    def injected_error():
+        if error_rate and random.random() < error_rate:
+            app.state.errors += 1
+            return JSONResponse({"errorMessages": ["Service unavailable"], "errors": {}}, status_code=503)
+        return None
+
+    def store_issue(request: Request, fields: dict) -> dict:
+        number = len(app.state.issues) + 1
+        key = f"{project_key}-{number}"
+        app.state.issues[key] = fields
+        return {"id": str(10000 + number), "key": key, "self": f"{request.base_url}rest/api/2/issue/{10000 + number}"}
+
+    @app.get("/rest/api/2/serverInfo")
+    async def server_info(request: Request):
+        await handle("serverInfo")
+        return {
+            "baseUrl": str(request.base_url).rstrip("/"),
+            "version": "9.4.0",
+            "versionNumbers": [9, 4, 0],
+            "deploymentType": "Server",
+            "serverTitle": "Fake JIRA",
+        }
+
+    @app.get("/rest/api/2/field")
+    async def fields():
+        await handle("field")
+        return [
+            {"id": "summary", "name": "Summary", "clauseNames": ["summary"]},
+            {"id": "labels", "name": "Labels", "clauseNames": ["labels"]},
+        ]
+
+    @app.post("/rest/api/2/issue", status_code=201)
+    async def create_issue(request: Request):
+        body = await request.json()
+        await handle("issue")
+        return injected_error() or store_issue(request, body["fields"])
+
+    @app.post("/rest/api/2/issue/bulk", status_code=201)
+    async def create_issues(request: Request):
+        body = await request.json()
+        await handle("issue/bulk")
+        error = injected_error()
+        if error:
+            return error
+        return {
+            "issues": [store_issue(request, update["fields"]) for update in body["issueUpdates"]],
+            "errors": [],
+        }
+
+    @app.get("/rest/api/2/issue/{key}")
+    async def get_issue(request: Request, key: str):
+        await handle("issue (get)")
+        if key not in app.state.issues:
+            return JSONResponse({"errorMessages": ["Issue does not exist"]}, status_code=404)
+        return {"id": key, "key": key, "self": f"{request.base_url}rest/api/2/issue/{key}", "fields": app.state.issues[key]}
+
+    @app.get("/rest/api/2/search")
+    async def search(request: Request, jql: str = "", maxResults: int = 50):
+        await handle("search")
+        error = injected_error()
+        if error:
+            return error
+        match = re.search(r'labels\s*=\s*"?([\w.-]+)"?', jql)
+        keys = [
+            key for key, fields in app.state.issues.items()
+            if match and match.group(1) in fields.get("labels", [])
+        ]
+        return {
+            "startAt": 0,
+            "maxResults": maxResults,
+            "total": len(keys),
+            "issues": [{"id": key, "key": key, "fields": {}} for key in keys[:maxResults]],
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {"issues": len(app.state.issues), "requests": dict(app.state.requests), "errors": app.state.errors}
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake JIRA REST API server")
+    parser.add_argument("--port", type=int, default=8003)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of issue creation and search requests answered with HTTP 503")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency_ms, error_rate=args.error_rate), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
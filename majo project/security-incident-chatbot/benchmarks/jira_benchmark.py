@@ -0,0 +1,118 @@
+"""
+JIRA ticket creation: new client per ticket vs shared client and bulk API
+
+Starts the fake JIRA server in-process and creates tickets for the same
+burst of alerts three ways: the old path (new JIRA client per ticket, one
+create call each), the shared client with one create call per ticket, and
+the shared client with the bulk issue API. Also checks that racing
+create_jira_ticket calls for one alert produce a single ticket.
+
+Usage:
+    python benchmarks/jira_benchmark.py --alerts 200 --latency-ms 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_jira_server import create_app
+
+def start_fake_server(port: int, latency_ms: float) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(latency_ms), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def make_alerts(count: int, first_id: int):
+    from app.models import Alert
+
+    return [
+        Alert(
+            id=first_id + i,
+            source="benchmark",
+            severity="Critical" if i % 3 == 0 else "High",
+            message=f"Privilege escalation detected on host SRV-{i:04d}",
+            created_at=datetime.utcnow(),
+        )
+        for i in range(count)
+    ]
+
+async def legacy(alerts):
+    from jira import JIRA
+    from app.services import jira_service
+
+    def create(alert):
+        # What every ticket used to do: a new client, then create + prefetch
+        client = JIRA(server=jira_service.JIRA_SERVER, basic_auth=(jira_service.JIRA_USERNAME, jira_service.JIRA_API_TOKEN))
+        fields = jira_service.build_issue_fields(alert)
+        return client.create_issue(fields=fields).key
+
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(jira_service.jira_executor, create, alert) for alert in alerts))
+
+async def shared(alerts, bulk: bool):
+    from app.services import jira_service
+
+    jira_service.JIRA_BULK_ENABLED = bulk
+    await asyncio.gather(*(jira_service.create_jira_ticket(alert) for alert in alerts))
+
+async def race(alert) -> set:
+    from app.services import jira_service
+
+    keys = await asyncio.gather(*(jira_service.create_jira_ticket(alert) for _ in range(5)))
+    # A retry after a lost key finds the ticket through its idempotency label
+    keys.append(await jira_service.create_jira_ticket(alert, check_existing=True))
+    return set(keys)
+
+def run(name: str, coroutine, count: int, stats_url: str):
+    before = httpx.get(stats_url).json()
+    started = time.perf_counter()
+    asyncio.run(coroutine)
+    elapsed = time.perf_counter() - started
+    after = httpx.get(stats_url).json()
+    requests = {
+        endpoint: after["requests"].get(endpoint, 0) - before["requests"].get(endpoint, 0)
+        for endpoint in after["requests"]
+    }
+    print(
+        f"{name:>14}: {count} tickets in {elapsed:.2f}s -> {count / elapsed:,.0f} tickets/s"
+        f"  requests {sum(requests.values())} {dict((k, v) for k, v in requests.items() if v)}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="JIRA ticket creation throughput")
+    parser.add_argument("--alerts", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--port", type=int, default=8003)
+    args = parser.parse_args()
+
+    start_fake_server(args.port, args.latency_ms)
+
+    # Configure the service before it is imported
+    os.environ["JIRA_SERVER"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("JIRA_USERNAME", "benchmark")
+    os.environ.setdefault("JIRA_API_TOKEN", "benchmark")
+    os.environ.setdefault("JIRA_PROJECT_KEY", "SEC")
+    os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+    stats_url = f"http://127.0.0.1:{args.port}/stats"
+    run("per-ticket", legacy(make_alerts(args.alerts, 1)), args.alerts, stats_url)
+    run("shared client", shared(make_alerts(args.alerts, 100_001), bulk=False), args.alerts, stats_url)
+    run("bulk", shared(make_alerts(args.alerts, 200_001), bulk=True), args.alerts, stats_url)
+
+    keys = asyncio.run(race(make_alerts(1, 300_001)[0]))
+    print(f"{'race':>14}: 6 create_jira_ticket calls for one alert -> tickets {sorted(keys)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+LLM gateway benchmark: an alert storm against an upstream that answers 429
+
+Starts the stub LLM server in-process with --throttle-above (429 beyond that
+many requests in flight) and classifies a burst of alerts that no
+pre-classifier rule matches, through app.services.classification_service:
+- direct: gateway disabled, the OpenAI client's own retries (2, short backoff)
+- gateway: AIMD concurrency limit, retries within the deadline, breaker
+
+For each it reports wall time, how many alerts the LLM classified, how many
+fell back to the local heuristic or failed outright, the 429s the stub sent,
+latency percentiles and the gateway's final concurrency limit. --error-rate
+adds 500s; --error-rate 1 shows the circuit breaker failing fast.
+
+Usage:
+    python benchmarks/llm_gateway_benchmark.py --alerts 500 --throttle-above 16 --latency-ms 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from openai import AsyncOpenAI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_llm_server import create_app
+
+MESSAGE = "Unusual outbound transfer to an unknown host from build server {tag}"
+
+def tag(n: int) -> str:
+    letters = ""
+    while True:
+        n, digit = divmod(n, 26)
+        letters += chr(ord("a") + digit)
+        if not n:
+            return letters
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def start_stub_server(port: int, latency_ms: float, throttle_above: int, error_rate: float) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(latency_ms, 0, 0, error_rate, 0, throttle_above), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def run_mode(mode: str, alerts: int, run: int, stats_url: str) -> dict:
+    from app.services import classification_service, openai_service
+    from app.services.llm_gateway import LLMGateway
+
+    # Fresh gateway and client per mode so state doesn't carry over
+    gateway_enabled = mode == "gateway"
+    openai_service.llm_gateway = LLMGateway(
+        openai_service._overload,
+        enabled=gateway_enabled,
+        initial_concurrency=openai_service.LLM_INITIAL_CONCURRENCY,
+        min_concurrency=openai_service.LLM_MIN_CONCURRENCY,
+        max_concurrency=openai_service.LLM_MAX_CONCURRENCY,
+        max_retries=openai_service.LLM_MAX_RETRIES,
+        breaker_failures=openai_service.LLM_BREAKER_FAILURES,
+        breaker_reset_seconds=openai_service.LLM_BREAKER_RESET_SECONDS,
+        slow_call_seconds=openai_service.LLM_SLOW_CALL_SECONDS
+    )
+    # A new client too: the direct run's failed requests can leave the shared connection pool unusable
+    openai_service.client = AsyncOpenAI(
+        api_key=os.environ["OPENAI_API_KEY"], base_url=os.environ["OPENAI_BASE_URL"], max_retries=0 if gateway_enabled else 2
+    )
+
+    before = httpx.get(stats_url).json()
+    latencies, stages, failures = [], {}, 0
+
+    async def classify(n: int):
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            _, stage = await classification_service.classify_alert(MESSAGE.format(tag=f"{run}{mode}{tag(n)}"))
+            stages[stage] = stages.get(stage, 0) + 1
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(classify(n) for n in range(alerts)))
+    elapsed = time.perf_counter() - started
+    after = httpx.get(stats_url).json()
+
+    gateway = openai_service.llm_gateway.stats()
+    return {
+        "mode": mode,
+        "elapsed_s": round(elapsed, 2),
+        "llm_classified": stages.get("llm", 0),
+        "fallback": stages.get("fallback", 0),
+        "failed": failures,
+        "upstream_429s": after["ratelimited"] - before["ratelimited"],
+        "upstream_500s": after["errors"] - before["errors"],
+        "p50_ms": round(statistics.median(latencies) * 1000),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000),
+        "final_limit": gateway["concurrency_limit"] if gateway_enabled else None,
+        "circuit": gateway["circuit"] if gateway_enabled else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert storm against a rate-limited LLM, with and without the gateway")
+    parser.add_argument("--alerts", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--throttle-above", type=int, default=16, help="Upstream answers 429 beyond this many requests in flight")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of upstream requests answered with 500")
+    parser.add_argument("--port", type=int, default=8011)
+    args = parser.parse_args()
+
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ["CLASSIFICATION_CACHE_ENABLED"] = "false"
+    start_stub_server(args.port, args.latency_ms, args.throttle_above, args.error_rate)
+
+    stats_url = f"http://127.0.0.1:{args.port}/stats"
+    run = str(int(time.time()))
+
+    # One event loop for both modes: the OpenAI client's connections belong to it
+    async def run_modes():
+        for mode in ["direct", "gateway"]:
+            result = await run_mode(mode, args.alerts, run, stats_url)
+            print("  ".join(f"{key}={value}" for key, value in result.items()))
+
+    asyncio.run(run_modes())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Alert metadata filter latency: message text scan vs JSONB metadata indexes
+
+Seeds the alerts table with synthetic rows (server-side, via
+generate_series) whose metadata carries src_ip, dst_ip, host, user and
+rule_id and whose message mentions the host, then times the same lookups as
+a scan of message (the only option before alerts had metadata), as an
+equality filter on an expression index (ix_alerts_metadata_<field>) and as
+a containment match on the GIN index (ix_alerts_metadata).
+
+Run it against a scratch database that has been migrated to head:
+    DATABASE_URL=postgresql://.../alerts_bench alembic upgrade head
+    DATABASE_URL=postgresql://.../alerts_bench python benchmarks/metadata_query_benchmark.py --rows 5000000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+
+# (field, value, text the message contains for the same alerts)
+LOOKUPS = [
+    ("host", "fin-ws-1234", "on fin-ws-1234 "),
+    ("user", "svc_backup77", "by svc_backup77 "),
+    ("src_ip", "10.3.17.42", "from 10.3.17.42 "),
+    ("rule_id", "4625", "rule 4625 "),
+]
+
+MESSAGE_SCAN = """
+    SELECT id FROM alerts WHERE message ILIKE :pattern
+    ORDER BY created_at DESC, id DESC LIMIT 100
+"""
+
+# The shapes get_alerts_by_filter issues for /alerts/?host=... and ?metadata={...}
+EXPRESSION = """
+    SELECT id FROM alerts WHERE (metadata ->> '{field}') = :value
+    ORDER BY created_at DESC, id DESC LIMIT 100
+"""
+
+CONTAINMENT = """
+    SELECT id FROM alerts WHERE metadata @> CAST(:document AS jsonb)
+    ORDER BY created_at DESC, id DESC LIMIT 100
+"""
+
+def seed(rows: int):
+    with engine.begin() as conn:
+        existing = conn.execute(text("SELECT count(*) FROM alerts")).scalar()
+        if existing >= rows:
+            print(f"alerts already has {existing:,} rows, skipping seed")
+            return
+        print(f"seeding {rows - existing:,} rows ...")
+        conn.execute(text("""
+            INSERT INTO alerts (source, severity, message, metadata, created_at, enrichment_status, enrichment_attempts, slack_notified)
+            SELECT
+                (ARRAY['firewall', 'ids', 'edr', 'proxy'])[1 + g % 4],
+                (ARRAY['Low', 'Low', 'Low', 'Medium', 'Medium', 'High', 'Critical'])[1 + g % 7],
+                'Suspicious activity on fin-ws-' || (g % 20000) || ' by svc_backup' || (g % 5000)
+                    || ' from 10.' || (g % 7) || '.' || (g % 251) || '.' || (g % 241)
+                    || ' rule ' || (4600 + g % 100) || ' ' || repeat('x', 200),
+                jsonb_build_object(
+                    'src_ip', '10.' || (g % 7) || '.' || (g % 251) || '.' || (g % 241),
+                    'dst_ip', '172.16.' || (g % 229) || '.' || (g % 227),
+                    'host', 'fin-ws-' || (g % 20000),
+                    'user', 'svc_backup' || (g % 5000),
+                    'rule_id', (4600 + g % 100)::text
+                ),
+                now() - interval '365 days' + (g * (interval '365 days' / :rows)),
+                'skipped', 0, false
+            FROM generate_series(1, :count) AS g
+        """), {"rows": rows, "count": rows - existing})
+        conn.execute(text("ANALYZE alerts"))
+
+def time_query(conn, sql: str, params: dict, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def plan_index(conn, sql: str, params: dict) -> str:
+    """
+    The index the plan reads, or "seq scan"
+    """
+    plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql), params).scalar()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            return node["Index Name"]
+        nodes.extend(node.get("Plans", []))
+    return "seq scan"
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert metadata filter latency with and without the metadata indexes")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+
+    with engine.connect() as conn:
+        print(f"\n{'filter':<22}{'message scan ms':>17}{'expression ms':>15}{'containment ms':>16}  plans")
+        for field, value, substring in LOOKUPS:
+            scan_params = {"pattern": f"%{substring}%"}
+            expression = EXPRESSION.format(field=field)
+            containment = {"document": json.dumps({field: value})}
+
+            # The message scan is what /alerts/ had to do before metadata existed
+            conn.execute(text("SET enable_bitmapscan = off"))
+            scan = time_query(conn, MESSAGE_SCAN, scan_params, args.repeat)
+            conn.execute(text("RESET enable_bitmapscan"))
+
+            by_expression = time_query(conn, expression, {"value": value}, args.repeat)
+            by_containment = time_query(conn, CONTAINMENT, containment, args.repeat)
+            plans = f"{plan_index(conn, expression, {'value': value})}, {plan_index(conn, CONTAINMENT, containment)}"
+
+            print(f"{field + '=' + value:<22}{scan:>17.1f}{by_expression:>15.2f}{by_containment:>16.2f}  {plans}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Local stand-in for the Slack Web API chat.postMessage method
+
+Enforces a per-channel rate limit the way Slack does: requests over the
+limit get HTTP 429 with a Retry-After header and {"ok": false, "error":
+"ratelimited"}. --error-rate answers that fraction of requests with a 500
+"internal_error". Accepted messages are counted per channel. Point the app
+at it with SLACK_API_URL=http://localhost:8002/api/.
+
+Usage:
+    python benchmarks/mock_slack_server.py --port 8002 --rate 1 --burst 3
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import defaultdict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+def create_app(rate: float = 1, burst: float = 3, latency_ms: float = 20, error_rate: float = 0) -> FastAPI:
+    app = FastAPI(title="Mock Slack API")
+    app.state.messages = defaultdict(int)
+    app.state.blocks = 0
+    app.state.ratelimited = 0
+    app.state.errors = 0
+    # Per-channel token buckets: channel -> (tokens, updated)
+    buckets = {}
+
+    @app.post("/api/chat.postMessage")
+    async def post_message(request: Request):
+        if request.headers.get("content-type", "").startswith("application/json"):
+            body = await request.json()
+        else:
+            body = dict(await request.form())
+        channel = body.get("channel") or "default"
+
+        await asyncio.sleep(latency_ms / 1000)
+
+        if error_rate and random.random() < error_rate:
+            app.state.errors += 1
+            return JSONResponse({"ok": False, "error": "internal_error"}, status_code=500)
+
+        now = time.monotonic()
+        tokens, updated = buckets.get(channel, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            buckets[channel] = (tokens, now)
+            app.state.ratelimited += 1
+            return JSONResponse(
+                {"ok": False, "error": "ratelimited"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil((1 - tokens) / rate))}
+            )
+        buckets[channel] = (tokens - 1, now)
+
+        app.state.messages[channel] += 1
+        app.state.blocks += len(body.get("blocks") or [])
+        return {"ok": True, "channel": channel, "ts": f"{time.time():.6f}"}
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "messages": sum(app.state.messages.values()),
+            "per_channel": dict(app.state.messages),
+            "blocks": app.state.blocks,
+            "ratelimited": app.state.ratelimited,
+            "errors": app.state.errors,
+        }
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock Slack chat.postMessage server")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--rate", type=float, default=1)
+    parser.add_argument("--burst", type=float, default=3)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.rate, args.burst, args.latency_ms, args.error_rate), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
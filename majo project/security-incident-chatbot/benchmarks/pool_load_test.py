@@ -0,0 +1,108 @@
+"""
+Connection pooling load test
+
+Runs short primary-key lookups (the shape of /alert/{id}) from concurrent
+workers, once opening a new connection per request as the legacy
+get_db_connection() did, and once through the shared pools in
+app/pooling.py. Covers both the raw psycopg2 path (threads) and the async
+SQLAlchemy engine used by the API.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/pool_load_test.py --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_URL, ASYNC_DATABASE_URL
+from app.pooling import Psycopg2ConnectionPool, InstrumentedAsyncAdaptedQueuePool, engine_pool_kwargs
+
+LOOKUP = "SELECT id, severity FROM alerts WHERE id = 1"
+
+def summarize(name: str, latencies, elapsed: float):
+    latencies.sort()
+    print(
+        f"{name:<28} {len(latencies) / elapsed:>8.0f} req/s"
+        f"  p50 {statistics.median(latencies) * 1000:>7.2f} ms"
+        f"  p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:>7.2f} ms"
+        f"  p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:>7.2f} ms"
+    )
+
+def run_threads(lookup, requests: int, concurrency: int):
+    def timed(_):
+        started = time.perf_counter()
+        lookup()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed, range(requests)))
+    return latencies, time.perf_counter() - started
+
+def psycopg2_unpooled():
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(LOOKUP)
+            cursor.fetchall()
+    finally:
+        conn.close()
+
+async def run_async(engine, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def lookup():
+        async with semaphore:
+            started = time.perf_counter()
+            async with engine.connect() as conn:
+                (await conn.execute(text(LOOKUP))).fetchall()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(lookup() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return latencies, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency with and without connection pooling")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    summarize("psycopg2 connect-per-request", *run_threads(psycopg2_unpooled, args.requests, args.concurrency))
+
+    pool = Psycopg2ConnectionPool(DATABASE_URL)
+
+    def psycopg2_pooled():
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(LOOKUP)
+                cursor.fetchall()
+
+    summarize("psycopg2 pooled", *run_threads(psycopg2_pooled, args.requests, args.concurrency))
+    print(f"{'':<28} pool: {pool.stats()}")
+    pool.close()
+
+    unpooled_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    summarize("asyncpg engine, NullPool", *asyncio.run(run_async(unpooled_engine, args.requests, args.concurrency)))
+
+    pooled_engine = create_async_engine(
+        ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncAdaptedQueuePool, **engine_pool_kwargs()
+    )
+    summarize("asyncpg engine, pooled", *asyncio.run(run_async(pooled_engine, args.requests, args.concurrency)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Pre-classifier benchmark
+
+Runs a synthetic mix of SIEM alert messages (or one message per line from
+--input) through the local pre-classifier and reports which stage decided
+each alert, the share that skips the LLM and the per-alert cost.
+
+Usage:
+    python benchmarks/preclassifier_benchmark.py --alerts 100000
+    python benchmarks/preclassifier_benchmark.py --input exported_messages.txt
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.preclassifier import preclassifier
+
+TEMPLATES = [
+    "Ransomware behaviour detected on {host}: files encrypted in C:\\Users\\{user}",
+    "Brute force attack: {n} failed logins for {user} from {ip}",
+    "Port scan detected from {ip} against {n} ports",
+    "Failed login for {user} from {ip}",
+    "User {user} logged in from {ip}",
+    "Mimikatz execution detected on {host}",
+    "Outbound connection from {host} to {ip}:443 flagged by proxy",
+    "Unusual process tree: winword.exe spawned powershell.exe on {host}",
+    "Firewall rule change by {user} on {host}",
+    "Scheduled vulnerability scan completed on {host}",
+]
+
+def synthetic_messages(count: int):
+    rng = random.Random(42)
+    for _ in range(count):
+        yield rng.choice(TEMPLATES).format(
+            host=f"srv-{rng.randint(1, 500)}",
+            user=f"user{rng.randint(1, 2000)}",
+            ip=f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            n=rng.randint(5, 5000),
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Share of alerts decided without the LLM")
+    parser.add_argument("--alerts", type=int, default=100000)
+    parser.add_argument("--input", help="file with one alert message per line")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            messages = [line.strip() for line in f if line.strip()]
+    else:
+        messages = list(synthetic_messages(args.alerts))
+
+    stages = Counter()
+    started = time.perf_counter()
+    for message in messages:
+        decision = preclassifier.classify(message)
+        stages[decision.stage if decision else "llm"] += 1
+    elapsed = time.perf_counter() - started
+
+    total = len(messages)
+    print(f"alerts: {total}  model loaded: {preclassifier.model is not None}")
+    for stage in ("rules", "model", "llm"):
+        print(f"{stage:>6}: {stages[stage]:>8}  ({stages[stage] / total:.1%})")
+    print(f"skipped LLM: {(total - stages['llm']) / total:.1%}")
+    print(f"per alert: {elapsed / total * 1e6:.1f} us")
+
+if __name__ == "__main__":
+    main()
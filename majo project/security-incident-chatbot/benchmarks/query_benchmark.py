@@ -0,0 +1,109 @@
+"""
+Alert query latency before and after the query-path indexes
+
+Seeds the alerts table with synthetic rows (server-side, via
+generate_series), runs the /alerts/ query shapes without the indexes from
+migration 0003, builds them, and runs the same queries again.
+
+Run it against a scratch database that has been migrated to head:
+    DATABASE_URL=postgresql://.../alerts_bench alembic upgrade head
+    DATABASE_URL=postgresql://.../alerts_bench python benchmarks/query_benchmark.py --rows 10000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+
+INDEXES = {
+    "ix_alerts_created_at_id": "CREATE INDEX ix_alerts_created_at_id ON alerts (created_at, id)",
+    "ix_alerts_severity_created_at": "CREATE INDEX ix_alerts_severity_created_at ON alerts (severity, created_at, id)",
+    "ix_alerts_source_created_at": "CREATE INDEX ix_alerts_source_created_at ON alerts (source, created_at, id)",
+    "ix_alerts_created_at_brin": "CREATE INDEX ix_alerts_created_at_brin ON alerts USING brin (created_at)",
+}
+
+# The query shapes issued by get_alerts_by_filter for the history view
+QUERIES = {
+    "newest page": """
+        SELECT * FROM alerts ORDER BY created_at DESC, id DESC LIMIT 100
+    """,
+    "severity page": """
+        SELECT * FROM alerts WHERE severity = 'Critical'
+        ORDER BY created_at DESC, id DESC LIMIT 100
+    """,
+    "source + 1 day range": """
+        SELECT * FROM alerts WHERE source = 'firewall'
+          AND created_at >= now() - interval '30 days' AND created_at < now() - interval '29 days'
+        ORDER BY created_at DESC, id DESC LIMIT 100
+    """,
+    "count over 1 week": """
+        SELECT count(*) FROM alerts
+        WHERE created_at >= now() - interval '60 days' AND created_at < now() - interval '53 days'
+    """,
+}
+
+def seed(rows: int):
+    with engine.begin() as conn:
+        existing = conn.execute(text("SELECT count(*) FROM alerts")).scalar()
+        if existing >= rows:
+            print(f"alerts already has {existing:,} rows, skipping seed")
+            return
+        print(f"seeding {rows - existing:,} rows ...")
+        # Rows are spread over the last 365 days in insertion order, like real ingest
+        conn.execute(text("""
+            INSERT INTO alerts (source, severity, message, created_at, enrichment_status, enrichment_attempts, slack_notified)
+            SELECT
+                (ARRAY['firewall', 'ids', 'edr', 'proxy', 'web_interface'])[1 + g % 5],
+                (ARRAY['Low', 'Low', 'Low', 'Medium', 'Medium', 'High', 'Critical'])[1 + g % 7],
+                'Synthetic alert ' || g || ' from 10.0.' || (g % 255) || '.' || (g % 253),
+                now() - interval '365 days' + (g * (interval '365 days' / :rows)),
+                'skipped', 0, false
+            FROM generate_series(1, :count) AS g
+        """), {"rows": rows, "count": rows - existing})
+        conn.execute(text("ANALYZE alerts"))
+
+def time_queries(repeat: int) -> dict:
+    timings = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(text(sql)).fetchall()
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[name] = statistics.median(samples)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert query latency with and without indexes")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+
+    with engine.begin() as conn:
+        for name in INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text("ANALYZE alerts"))
+    before = time_queries(args.repeat)
+
+    print("building indexes ...")
+    with engine.begin() as conn:
+        for sql in INDEXES.values():
+            conn.execute(text(sql))
+        conn.execute(text("ANALYZE alerts"))
+    after = time_queries(args.repeat)
+
+    print(f"\n{'query':<24}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in QUERIES:
+        print(f"{name:<24}{before[name]:>12.1f}{after[name]:>12.2f}{before[name] / after[name]:>9.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Alert retention: archive throughput, lock impact on ingest, archive reads
+
+Seeds a throwaway database on the DATABASE_URL server with alerts spread
+over --days days (server-side, via generate_series), then runs one
+retention pass that moves everything older than --hot-days to Parquet
+files in a temporary directory while a writer keeps inserting alerts.
+Reports:
+- alerts archived per second, and the longest single delete transaction
+- insert latency of the concurrent writer during the pass
+- alerts table size and Parquet bytes
+- archive query latency for a day range and for a metadata filter
+
+    DATABASE_URL=postgresql://... python benchmarks/retention_benchmark.py --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(engine, rows: int, days: int):
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO alerts (source, severity, message, metadata, created_at, first_seen_at, last_seen_at,
+                                enrichment_status, enrichment_attempts, slack_notified, occurrence_count)
+            SELECT
+                (ARRAY['firewall', 'ids', 'edr', 'proxy'])[1 + g % 4],
+                (ARRAY['Low', 'Low', 'Low', 'Medium', 'Medium', 'High', 'Critical'])[1 + g % 7],
+                'Suspicious activity on fin-ws-' || (g % 20000) || ' by svc_backup' || (g % 5000)
+                    || ' from 10.' || (g % 7) || '.' || (g % 251) || '.' || (g % 241),
+                jsonb_build_object('host', 'fin-ws-' || (g % 20000), 'user', 'svc_backup' || (g % 5000)),
+                ts, ts, ts, 'skipped', 0, false, 1
+            FROM generate_series(1, :rows) AS g,
+                 LATERAL (SELECT now() at time zone 'utc' - (:days * interval '1 day') * (1 - g::float / :rows) AS ts) AS t
+        """), {"rows": rows, "days": days})
+        conn.execute(text("ANALYZE alerts"))
+
+def table_bytes(engine) -> int:
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT pg_total_relation_size('alerts')")).scalar()
+
+def directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+async def write_alerts(stop: asyncio.Event, latencies: list):
+    """
+    Insert alerts one at a time until stopped, recording each insert's latency
+    """
+    from sqlalchemy import insert
+    from app.database import AsyncSessionLocal
+    from app.models import Alert
+
+    async with AsyncSessionLocal() as db:
+        n = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            await db.execute(insert(Alert).values(
+                source="writer", severity="Low", message=f"Concurrent alert {n}", created_at=datetime.utcnow(),
+                enrichment_status="skipped", enrichment_attempts=0, slack_notified=False, occurrence_count=1
+            ))
+            await db.commit()
+            latencies.append(time.perf_counter() - started)
+            n += 1
+
+async def run(args, archive_dir: str) -> dict:
+    from app.database import async_engine
+    from app.services import retention
+    from app.services.alert_archive import AlertArchive
+    from app.services.retention import AlertRetention
+
+    deletes = []
+    delete_alerts = retention.delete_alerts
+
+    async def timed_delete(db, alert_ids):
+        started = time.perf_counter()
+        try:
+            return await delete_alerts(db, alert_ids)
+        finally:
+            deletes.append(time.perf_counter() - started)
+
+    retention.delete_alerts = timed_delete
+    job = AlertRetention(
+        AlertArchive(archive_dir), enabled=True, hot_days=args.hot_days, batch_size=args.batch_size,
+        delete_chunk_size=args.delete_chunk_size, delete_pause_seconds=0
+    )
+
+    stop = asyncio.Event()
+    latencies = []
+    writer = asyncio.create_task(write_alerts(stop, latencies))
+    try:
+        started = time.perf_counter()
+        archived = await job.run_once()
+        elapsed = time.perf_counter() - started
+    finally:
+        stop.set()
+        await writer
+
+    now = datetime.utcnow()
+    queries = {}
+    for name, kwargs in {
+        "one day, High": {"severity": "High", "start_date": now - timedelta(days=args.days - 1), "end_date": now - timedelta(days=args.days - 2)},
+        "host, whole archive": {"start_date": now - timedelta(days=args.days), "metadata": {"host": "fin-ws-1234"}},
+    }.items():
+        samples = []
+        for _ in range(3):
+            started = time.perf_counter()
+            rows = await job.query_archive(limit=100, **kwargs)
+            samples.append(time.perf_counter() - started)
+        queries[name] = {"rows": len(rows), "ms": round(statistics.median(samples) * 1000, 1)}
+
+    await async_engine.dispose()
+    latencies.sort()
+    return {
+        "archived": archived,
+        "elapsed_s": round(elapsed, 1),
+        "archived_per_s": round(archived / elapsed),
+        "delete_transactions": len(deletes),
+        "longest_delete_ms": round(max(deletes) * 1000, 1) if deletes else None,
+        "concurrent_inserts": len(latencies),
+        "insert_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "insert_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        "archive_queries": queries,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert retention throughput and impact")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--hot-days", type=float, default=30)
+    parser.add_argument("--batch-size", type=int, default=20000)
+    parser.add_argument("--delete-chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        parser.error("DATABASE_URL must point at a Postgres server")
+
+    from benchmarks.load_suite import EphemeralDatabase
+    from sqlalchemy.engine import make_url
+
+    with EphemeralDatabase(os.environ["DATABASE_URL"]) as database, tempfile.TemporaryDirectory() as archive_dir:
+        # The app's engines read the URL on import
+        os.environ["DATABASE_URL"] = database.url
+        os.environ["ASYNC_DATABASE_URL"] = make_url(database.url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+        from app.database import engine, run_migrations
+        run_migrations()
+
+        print(f"seeding {args.rows:,} alerts over {args.days} days ...")
+        seed(engine, args.rows, args.days)
+        before = table_bytes(engine)
+
+        result = asyncio.run(run(args, archive_dir))
+
+        result["alerts_table_mb_before"] = round(before / 2**20)
+        result["parquet_mb"] = round(directory_bytes(archive_dir) / 2**20, 1)
+        engine.dispose()
+        print(result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Alert message search latency: ILIKE scan vs full-text and trigram indexes
+
+Seeds the alerts table with synthetic messages (server-side, via
+generate_series) that mention IPs, hosts, users and tools, then times the
+same searches as an unindexed ILIKE scan (the legacy fetch_alerts shape),
+as a ranked full-text query over ix_alerts_search_vector, and as a substring
+match over ix_alerts_message_trgm when pg_trgm is installed.
+
+Run it against a scratch database that has been migrated to head:
+    DATABASE_URL=postgresql://.../alerts_bench alembic upgrade head
+    DATABASE_URL=postgresql://.../alerts_bench python benchmarks/search_benchmark.py --rows 5000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+
+# (full-text query, substring) pairs an analyst would look for
+SEARCHES = [
+    ("mimikatz", "mimikatz"),
+    ("10.0.4.22", "10.0.4.22"),
+    ("svc_backup17 or svc_backup18", "svc_backup17"),
+    ('"dumped lsass"', "dumped lsass"),
+]
+
+FULL_TEXT = """
+    SELECT id, ts_rank_cd(search_vector, websearch_to_tsquery('english', :q)) AS rank
+    FROM alerts
+    WHERE search_vector @@ websearch_to_tsquery('english', :q)
+    ORDER BY rank DESC, created_at DESC, id DESC
+    LIMIT 50
+"""
+
+SUBSTRING = """
+    SELECT id FROM alerts WHERE message ILIKE :pattern
+    ORDER BY created_at DESC, id DESC LIMIT 50
+"""
+
+def seed(rows: int):
+    with engine.begin() as conn:
+        existing = conn.execute(text("SELECT count(*) FROM alerts")).scalar()
+        if existing >= rows:
+            print(f"alerts already has {existing:,} rows, skipping seed")
+            return
+        print(f"seeding {rows - existing:,} rows ...")
+        conn.execute(text("""
+            INSERT INTO alerts (source, severity, message, created_at, enrichment_status, enrichment_attempts, slack_notified)
+            SELECT
+                (ARRAY['firewall', 'ids', 'edr', 'proxy', 'web_interface'])[1 + g % 5],
+                (ARRAY['Low', 'Low', 'Low', 'Medium', 'Medium', 'High', 'Critical'])[1 + g % 7],
+                CASE g % 5
+                    WHEN 0 THEN 'Failed login for svc_backup' || (g % 5000) || ' from 10.' || (g % 7) || '.' || (g % 251) || '.' || (g % 241)
+                    WHEN 1 THEN 'Outbound connection to 10.' || (g % 11) || '.' || (g % 239) || '.' || (g % 233) || ' blocked on port ' || (g % 65000)
+                    WHEN 2 THEN 'Port scan detected from 172.16.' || (g % 229) || '.' || (g % 227)
+                    WHEN 3 THEN 'Process ' || (ARRAY['powershell.exe', 'rundll32.exe', 'psexec.exe', 'certutil.exe'])[1 + g % 4] || ' spawned on host-' || (g % 20000)
+                    ELSE 'Disk usage at ' || (g % 100) || '% on db-' || (g % 300)
+                END
+                || CASE WHEN g % 100003 = 0 THEN ' mimikatz.exe dumped lsass' ELSE '' END,
+                now() - interval '365 days' + (g * (interval '365 days' / :rows)),
+                'skipped', 0, false
+            FROM generate_series(1, :count) AS g
+        """), {"rows": rows, "count": rows - existing})
+        conn.execute(text("ANALYZE alerts"))
+
+def time_query(conn, sql: str, params: dict, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert search latency with and without search indexes")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+
+    with engine.connect() as conn:
+        has_trigram = conn.execute(
+            text("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_alerts_message_trgm'")
+        ).scalar() is not None
+
+        print(f"\n{'search':<32}{'ILIKE scan ms':>15}{'full-text ms':>14}{'trigram ms':>12}")
+        for query, substring in SEARCHES:
+            pattern = {"pattern": f"%{substring}%"}
+
+            # Force the scan the legacy endpoint got, then let the planner use the indexes
+            conn.execute(text("SET enable_bitmapscan = off"))
+            scan = time_query(conn, SUBSTRING, pattern, args.repeat)
+            conn.execute(text("RESET enable_bitmapscan"))
+
+            full_text = time_query(conn, FULL_TEXT, {"q": query}, args.repeat)
+            trigram = f"{time_query(conn, SUBSTRING, pattern, args.repeat):.2f}" if has_trigram else "n/a"
+
+            print(f"{query:<32}{scan:>15.1f}{full_text:>14.2f}{trigram:>12}")
+
+        if not has_trigram:
+            print("\nix_alerts_message_trgm is missing (pg_trgm not installed); trigram column skipped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Similar-alert index benchmark at 1M vectors
+
+Embeds synthetic alert messages with the local hashing provider, builds the
+IVF index, and measures:
+- embedding throughput and index build time
+- index memory
+- query latency for several nprobe settings
+- recall@k against an exact scan
+
+Recall counts a returned neighbour as correct when its score reaches the
+k-th exact score, because many synthetic messages normalize to the same
+vector and tie.
+
+No database or network is needed:
+    python benchmarks/similarity_benchmark.py --vectors 1000000 --queries 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embeddings import HashingEmbeddingProvider
+from app.services.vector_index import IVFIndex, quantize
+
+TEMPLATES = [
+    "Mimikatz credential dump detected on host {host} by user {user}",
+    "Brute force attack against {service} from {ip}: {n} failed logins for {user}",
+    "Port scan detected from {ip} targeting {n} ports on {host}",
+    "Outbound connection to {ip} blocked by {service} policy",
+    "Ransomware behaviour: {n} files encrypted on {host}",
+    "Suspicious powershell download cradle executed by {user} on {host}",
+    "Successful login for {user} from {ip} via {service}",
+    "Malware detected in attachment sent to {user}: {family}",
+    "Privilege escalation: {user} added to domain admins on {host}",
+    "Data exfiltration suspected: {n} MB uploaded to {ip} from {host}",
+    "Phishing email reported by {user} with link to {domain}",
+    "SQL injection attempt against {service} from {ip}",
+]
+SERVICES = ["vpn", "owa", "ssh", "rdp", "sso", "firewall", "proxy", "api-gateway"]
+FAMILIES = ["emotet", "qakbot", "agent tesla", "formbook", "redline", "cobalt strike"]
+DEPARTMENTS = ["fin", "hr", "eng", "ops", "sales", "legal"]
+
+def make_messages(count: int, seed: int):
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, 1 << 30, size=(count, 8))
+    messages = []
+    for row in picks:
+        messages.append(TEMPLATES[row[0] % len(TEMPLATES)].format(
+            host=f"{DEPARTMENTS[row[1] % len(DEPARTMENTS)]}-ws-{row[2] % 5000}",
+            user=f"{DEPARTMENTS[row[3] % len(DEPARTMENTS)]}_user{row[4] % 2000}",
+            ip=f"10.{row[5] % 256}.{row[6] % 256}.{row[7] % 256}",
+            service=SERVICES[row[2] % len(SERVICES)],
+            family=FAMILIES[row[4] % len(FAMILIES)],
+            domain=f"login-{DEPARTMENTS[row[1] % len(DEPARTMENTS)]}{row[6] % 300}.example",
+            n=row[7] % 10000,
+        ))
+    return messages
+
+def exact_kth_scores(vectors: np.ndarray, queries: np.ndarray, k: int, chunk_size: int = 100000) -> np.ndarray:
+    """
+    Score of the k-th best vector for each query, by scanning everything with
+    the index's own int8 scoring
+    """
+    best = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    for start in range(0, len(vectors), chunk_size):
+        codes, factors = quantize(vectors[start:start + chunk_size])
+        scores = (queries @ codes.astype(np.float32).T) * factors
+        merged = np.concatenate([best, scores], axis=1)
+        best = -np.sort(-merged, axis=1)[:, :k]
+    return best[:, -1]
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Similar-alert index latency and recall")
+    parser.add_argument("--vectors", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,5,10,20,50")
+    args = parser.parse_args()
+
+    provider = HashingEmbeddingProvider()
+
+    messages = make_messages(args.vectors, seed=1)
+    started = time.perf_counter()
+    vectors = np.concatenate([
+        provider.embed_sync(messages[i:i + 10000]).astype(np.float16) for i in range(0, len(messages), 10000)
+    ])
+    elapsed = time.perf_counter() - started
+    print(f"embedded {len(messages):,} messages in {elapsed:.1f}s ({len(messages) / elapsed:,.0f}/s)")
+    del messages
+
+    index = IVFIndex(provider.dimensions)
+    started = time.perf_counter()
+    index.build(np.arange(len(vectors), dtype=np.int64), vectors)
+    print(
+        f"built index in {time.perf_counter() - started:.1f}s: {index.nlist} lists, "
+        f"{index.memory_bytes() / 2**20:.0f} MB"
+    )
+
+    queries = provider.embed_sync(make_messages(args.queries, seed=2))
+    thresholds = exact_kth_scores(vectors, queries, args.k)
+
+    # The same int8 storage without lists, scanning every vector
+    flat = IVFIndex(provider.dimensions, train_threshold=len(vectors) + 1)
+    flat.build(np.arange(len(vectors), dtype=np.int64), vectors)
+    started = time.perf_counter()
+    for query in queries[:20]:
+        flat.search(query, args.k)
+    print(f"exact scan: {(time.perf_counter() - started) / 20 * 1000:.1f} ms/query")
+    del flat
+
+    print(f"\n{'nprobe':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'recall@' + str(args.k):>12}")
+    for nprobe in [int(value) for value in args.nprobe.split(",")]:
+        latencies, hits = [], 0
+        for query, threshold in zip(queries, thresholds):
+            started = time.perf_counter()
+            results = index.search(query, args.k, nprobe=nprobe)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += sum(1 for _, score in results if score >= threshold - 1e-4)
+        print(
+            f"{nprobe:>8}{statistics.median(latencies):>10.2f}{percentile(latencies, 0.95):>10.2f}"
+            f"{percentile(latencies, 0.99):>10.2f}{hits / (len(queries) * args.k):>12.3f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Slack delivery under a burst: one post per alert vs the dispatcher
+
+Starts the mock Slack server in-process and sends the same burst of alert
+notifications once straight through chat_postMessage (the old behaviour,
+where rate-limited posts were dropped) and once through the dispatcher in
+app.services.slack_service. Reports delivered and dropped alerts, Slack
+messages used and rate-limited responses for each.
+
+Usage:
+    python benchmarks/slack_dispatch_benchmark.py --alerts 60 --rate 1 --burst 3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_slack_server import create_app
+
+SEVERITIES = ["Critical", "High", "High", "Medium"]
+
+def start_mock_server(port: int, rate: float, burst: float) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(rate, burst), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def make_alerts(count: int):
+    from app.models import Alert
+
+    return [
+        Alert(
+            id=i + 1,
+            source=f"sensor-{i % 5}",
+            severity=SEVERITIES[i % len(SEVERITIES)],
+            message=f"Malware beacon detected on host WS-{i:04d}",
+            created_at=datetime.utcnow(),
+        )
+        for i in range(count)
+    ]
+
+async def direct(alerts) -> int:
+    from slack_sdk.errors import SlackApiError
+    from app.services import slack_service
+
+    async def post(alert):
+        try:
+            await slack_service.slack_client.chat_postMessage(
+                channel=slack_service.SLACK_CHANNEL_ID,
+                text=f"Security Alert: {alert.severity} severity from {alert.source}",
+                blocks=slack_service.build_alert_blocks(alert)
+            )
+            return True
+        except SlackApiError:
+            return False
+
+    return sum(await asyncio.gather(*(post(alert) for alert in alerts)))
+
+async def dispatched(alerts) -> int:
+    from app.services import slack_service
+
+    delivered = sum(await asyncio.gather(*(slack_service.send_slack_alert(alert) for alert in alerts)))
+    await slack_service.slack_dispatcher.stop()
+    return delivered
+
+def run(name: str, send, alerts, stats_url: str):
+    before = httpx.get(stats_url).json()
+    started = time.perf_counter()
+    delivered = asyncio.run(send(alerts))
+    elapsed = time.perf_counter() - started
+    after = httpx.get(stats_url).json()
+    print(
+        f"{name:>10}: delivered {delivered}/{len(alerts)}  dropped {len(alerts) - delivered}"
+        f"  slack messages {after['messages'] - before['messages']}"
+        f"  ratelimited {after['ratelimited'] - before['ratelimited']}  in {elapsed:.1f}s"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Direct Slack posts vs the rate-limited dispatcher")
+    parser.add_argument("--alerts", type=int, default=60)
+    parser.add_argument("--rate", type=float, default=1)
+    parser.add_argument("--burst", type=float, default=3)
+    parser.add_argument("--port", type=int, default=8002)
+    args = parser.parse_args()
+
+    start_mock_server(args.port, args.rate, args.burst)
+
+    # Configure the service before it is imported
+    os.environ["SLACK_API_URL"] = f"http://127.0.0.1:{args.port}/api/"
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-mock")
+    os.environ.setdefault("SLACK_CHANNEL_ID", "C0MOCK")
+    os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+    os.environ["SLACK_RATE_PER_SECOND"] = str(args.rate)
+    os.environ["SLACK_BURST"] = str(args.burst)
+
+    alerts = make_alerts(args.alerts)
+    stats_url = f"http://127.0.0.1:{args.port}/stats"
+    run("direct", direct, alerts, stats_url)
+    time.sleep(args.burst / args.rate)
+    run("dispatcher", dispatched, alerts, stats_url)
+
+if __name__ == "__main__":
+    main()
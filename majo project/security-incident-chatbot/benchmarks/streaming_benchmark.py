@@ -0,0 +1,79 @@
+"""
+Time to first token for /automated_response/: buffered vs streamed
+
+Creates fresh alerts (a unique source each, so no stored or similar
+recommendation can be reused) and fetches each recommendation once through
+the buffered route and once through the SSE route, reporting time to first
+byte of the recommendation text and total time.
+
+Run the app against the stub LLM server:
+    python benchmarks/stub_llm_server.py --port 8001 --latency-ms 400 --token-ms 20
+    OPENAI_BASE_URL=http://localhost:8001/v1 uvicorn main:app --port 8000
+    python benchmarks/streaming_benchmark.py --url http://localhost:8000 --alerts 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+async def create_alerts(client: httpx.AsyncClient, count: int, label: str):
+    ids = []
+    for i in range(count):
+        response = await client.post("/process_alert/", json={
+            "source": f"ttft-{label}-{i}",
+            "message": f"Port scan detected from 10.9.0.{i % 250}",
+        })
+        response.raise_for_status()
+        ids.append(response.json()["id"])
+    return ids
+
+async def buffered(client: httpx.AsyncClient, alert_id: int):
+    started = time.perf_counter()
+    response = await client.get(f"/automated_response/{alert_id}")
+    response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed
+
+async def streamed(client: httpx.AsyncClient, alert_id: int):
+    started = time.perf_counter()
+    first_token = None
+    async with client.stream("GET", f"/automated_response/{alert_id}/stream") as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if first_token is None and line == "event: token":
+                first_token = time.perf_counter() - started
+            if line == "event: error":
+                raise RuntimeError(f"Stream failed for alert {alert_id}")
+    return first_token, time.perf_counter() - started
+
+def summarize(name: str, samples):
+    first = sorted(sample[0] for sample in samples)
+    total = sorted(sample[1] for sample in samples)
+    print(
+        f"{name:>9}: first token p50 {statistics.median(first) * 1000:>7.0f} ms"
+        f"  max {first[-1] * 1000:>7.0f} ms"
+        f"  | complete p50 {statistics.median(total) * 1000:>7.0f} ms"
+    )
+
+async def run(url: str, count: int):
+    async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+        label = uuid.uuid4().hex[:8]
+        buffered_ids = await create_alerts(client, count, f"{label}-b")
+        streamed_ids = await create_alerts(client, count, f"{label}-s")
+
+        summarize("buffered", [await buffered(client, alert_id) for alert_id in buffered_ids])
+        summarize("streamed", [await streamed(client, alert_id) for alert_id in streamed_ids])
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first token, buffered vs streamed recommendations")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--alerts", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.alerts))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Local stand-in for the OpenAI chat completions API
+
+Answers single-alert and batched severity classification prompts with a
+keyword heuristic after a configurable delay, and counts the requests it
+served. Response recommendation prompts get a canned recommendation,
+produced at --token-ms per token and streamed as chunks when the request
+sets stream=True. --error-rate answers that fraction of requests with a
+500 server error. Rate limits answer HTTP 429 with a Retry-After header, like
+the real API: --rpm caps requests per rolling minute and --throttle-above
+rejects requests beyond that many in flight. Point the app at it with
+OPENAI_BASE_URL=http://localhost:8001/v1.
+
+Usage:
+    python benchmarks/stub_llm_server.py --port 8001 --latency-ms 400 --max-concurrency 10 --token-ms 20
+    python benchmarks/stub_llm_server.py --port 8001 --latency-ms 200 --max-concurrency 0 --throttle-above 16 --rpm 3000
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from collections import deque
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SEVERITY_KEYWORDS = [
+    ("Critical", ["ransomware", "exfiltration", "breach", "rootkit"]),
+    ("High", ["brute force", "malware", "privilege escalation", "mimikatz"]),
+    ("Medium", ["port scan", "failed login", "suspicious"]),
+]
+
+def guess_severity(message: str) -> str:
+    lowered = message.lower()
+    for severity, keywords in SEVERITY_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return severity
+    return "Low"
+
+RECOMMENDATION_TEMPLATE = """1. Initial assessment
+The {severity} alert from {source} indicates activity that needs immediate review. Confirm the affected assets, the time window and whether the activity is still ongoing.
+
+2. Recommended immediate actions
+- Isolate the affected hosts from the network while preserving volatile evidence.
+- Disable or reset any credentials involved and revoke active sessions.
+- Block the related indicators at the firewall, proxy and EDR.
+- Open an incident ticket and notify the on-call incident commander.
+
+3. Follow-up steps
+- Collect logs from the affected systems and the surrounding timeframe.
+- Scope for lateral movement using the same indicators across the fleet.
+- Restore from known-good backups where integrity cannot be confirmed.
+- Hold a post-incident review and update detection rules and playbooks."""
+
+def recommendation_tokens(prompt: str):
+    match = re.search(r"Alert \(JSON\): (\{.*\})", prompt)
+    fields = json.loads(match.group(1)) if match else {}
+    text = RECOMMENDATION_TEMPLATE.format(
+        severity=fields.get("severity", "security"),
+        source=fields.get("source", "the monitoring system"),
+    )
+    # Roughly one token per word, keeping the whitespace in front of it
+    return re.findall(r"\s*\S+", text)
+
+def create_app(
+    latency_ms: float = 400,
+    max_concurrency: int = 0,
+    token_ms: float = 0,
+    error_rate: float = 0,
+    rpm: int = 0,
+    throttle_above: int = 0
+) -> FastAPI:
+    app = FastAPI(title="Stub LLM server")
+    app.state.requests = 0
+    app.state.errors = 0
+    app.state.ratelimited = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    # Arrival times of the requests accepted in the last minute
+    recent = deque()
+    # Upstream providers cap concurrent requests per key; emulate that so
+    # the benchmark shows queueing when one call is made per alert
+    limiter = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        model = body.get("model", "gpt-4")
+
+        now = time.monotonic()
+        while recent and now - recent[0] >= 60:
+            recent.popleft()
+        if rpm and len(recent) >= rpm:
+            return rate_limited(math.ceil(60 - (now - recent[0])))
+        if throttle_above and app.state.in_flight >= throttle_above:
+            return rate_limited(1)
+        recent.append(now)
+
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            return await answer(body, prompt, model)
+        finally:
+            app.state.in_flight -= 1
+
+    def rate_limited(retry_after: int):
+        app.state.ratelimited += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"Retry-After": str(max(1, retry_after))}
+        )
+
+    async def answer(body: dict, prompt: str, model: str):
+        if error_rate and random.random() < error_rate:
+            app.state.errors += 1
+            await asyncio.sleep(latency_ms / 1000)
+            return JSONResponse(
+                {"error": {"message": "Injected server error", "type": "server_error", "code": None}},
+                status_code=500
+            )
+
+        if "Initial assessment" in prompt:
+            tokens = recommendation_tokens(prompt)
+            if body.get("stream"):
+                return StreamingResponse(stream_tokens(tokens, model), media_type="text/event-stream")
+            content = "".join(tokens)
+            await timed(latency_ms + token_ms * len(tokens))
+            return completion(content, model, prompt)
+
+        await timed(latency_ms)
+
+        match = re.search(r"Alerts \(JSON\): (\[.*\])", prompt)
+        if match:
+            alerts = json.loads(match.group(1))
+            content = json.dumps({"results": [
+                {"index": alert["index"], "severity": guess_severity(alert["message"])}
+                for alert in alerts
+            ]})
+        else:
+            message = re.search(r'Alert message: "(.*)"', prompt, re.S)
+            content = guess_severity(message.group(1) if message else prompt)
+
+        return completion(content, model, prompt)
+
+    async def timed(delay_ms: float):
+        if limiter:
+            await limiter.acquire()
+        try:
+            app.state.requests += 1
+            await asyncio.sleep(delay_ms / 1000)
+        finally:
+            if limiter:
+                limiter.release()
+
+    def completion(content: str, model: str, prompt: str) -> dict:
+        return {
+            "id": f"chatcmpl-stub-{app.state.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": (len(prompt) + len(content)) // 4}
+        }
+
+    async def stream_tokens(tokens, model: str):
+        # The limiter slot is held for the whole stream, like a real provider
+        if limiter:
+            await limiter.acquire()
+        try:
+            app.state.requests += 1
+            request_id = f"chatcmpl-stub-{app.state.requests}"
+            await asyncio.sleep(latency_ms / 1000)
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(token_ms / 1000)
+                yield stream_chunk(request_id, model, {"content": token} if i else {"role": "assistant", "content": token}, None)
+            yield stream_chunk(request_id, model, {}, "stop")
+            yield "data: [DONE]\n\n"
+        finally:
+            if limiter:
+                limiter.release()
+
+    def stream_chunk(request_id: str, model: str, delta: dict, finish_reason) -> str:
+        return "data: " + json.dumps({
+            "id": request_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }) + "\n\n"
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "requests": app.state.requests,
+            "errors": app.state.errors,
+            "ratelimited": app.state.ratelimited,
+            "max_in_flight": app.state.max_in_flight,
+        }
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub OpenAI chat completions server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--max-concurrency", type=int, default=10)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per rolling minute before HTTP 429")
+    parser.add_argument("--throttle-above", type=int, default=0, help="Requests in flight before HTTP 429")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(
+        args.latency_ms, args.max_concurrency, args.token_ms, args.error_rate, args.rpm, args.throttle_above
+    ), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
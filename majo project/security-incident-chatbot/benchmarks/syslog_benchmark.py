@@ -0,0 +1,145 @@
+"""
+Syslog listener throughput on one core
+
+Measures:
+- parsing alone: RFC 5424 / RFC 3164 / Cisco ASA style messages turned into
+  AlertCreate items per second
+- the listener end to end over TCP (octet-counted frames) and UDP: a sender
+  process streams --messages messages at the listener, which parses,
+  queues and batches them into a counting sink in place of ingest_alerts.
+  Reports sustained events/sec, messages dropped on a full queue (UDP) or
+  lost in the kernel socket buffer, and the batch lag. UDP is sent at
+  --udp-rate messages/sec; raise it until messages start getting lost.
+
+The listener runs pinned to one CPU (where the OS allows it) and the sender
+on another. Storing the batches is measured by bulk_ingest_benchmark.py.
+
+    python benchmarks/syslog_benchmark.py --messages 200000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMPLATES = [
+    "<165>1 2026-10-18T10:14:{s:02d}.003Z fw{h}.example.com suricata {n} ALERT "
+    '[alert@32473 src_ip="10.0.{h}.{s}" sig_id="2010935"] ET SCAN Suspicious inbound to port {p} from 10.0.{h}.{s}',
+    "<38>Oct 18 10:14:{s:02d} bastion{h} sshd[{n}]: Failed password for invalid user admin{s} from 203.0.113.{s} port {p} ssh2",
+    "<164>%ASA-4-106023: Deny tcp src outside:198.51.100.{s}/{p} dst inside:10.1.{h}.{s}/443 by access-group \"outside_in\"",
+]
+
+def make_messages(count: int):
+    return [
+        TEMPLATES[n % len(TEMPLATES)].format(n=n, h=n % 50, s=n % 60, p=1024 + n % 60000).encode()
+        for n in range(count)
+    ]
+
+def pin(cpu: int):
+    if hasattr(os, "sched_setaffinity") and cpu < os.cpu_count():
+        os.sched_setaffinity(0, {cpu})
+
+def send(transport: str, port: int, messages, cpu: int, udp_rate: float):
+    pin(cpu)
+    if transport == "tcp":
+        payload = b"".join(str(len(message)).encode() + b" " + message for message in messages)
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            sock.sendall(payload)
+        return
+    # Paced in 1 ms slices: an unpaced sender only measures the kernel buffer
+    per_slice = max(1, round(udp_rate / 1000)) if udp_rate else len(messages)
+    started = time.perf_counter()
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for start in range(0, len(messages), per_slice):
+            for message in messages[start:start + per_slice]:
+                sock.sendto(message, ("127.0.0.1", port))
+            if udp_rate:
+                delay = started + (start + per_slice) / udp_rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+def run_parse(messages) -> dict:
+    from app.services.syslog_listener import parse_syslog, syslog_alert
+
+    started = time.perf_counter()
+    for message in messages:
+        syslog_alert(parse_syslog(message), "127.0.0.1")
+    elapsed = time.perf_counter() - started
+    return {"messages": len(messages), "parsed_per_s": round(len(messages) / elapsed), "us_per_message": round(elapsed / len(messages) * 1e6, 1)}
+
+async def run_listener(transport: str, messages, args) -> dict:
+    from app.services.syslog_listener import SyslogListener
+
+    async def ingest(alerts):
+        return 0
+
+    port = free_port(socket.SOCK_DGRAM if transport == "udp" else socket.SOCK_STREAM)
+    listener = SyslogListener(
+        enabled=True, host="127.0.0.1",
+        udp_port=port if transport == "udp" else 0, tcp_port=port if transport == "tcp" else 0,
+        queue_size=args.queue_size, batch_size=args.batch_size, batch_wait_ms=50, workers=1, ingest=ingest
+    )
+    await listener.start()
+    sender = multiprocessing.Process(target=send, args=(transport, port, messages, args.sender_cpu, args.udp_rate))
+    started = time.perf_counter()
+    sender.start()
+
+    # Done once everything sent is stored, or nothing more arrives for a second
+    last_progress, last_received = time.perf_counter(), 0
+    while True:
+        await asyncio.sleep(0.01)
+        received = sum(listener.received.values())
+        if received != last_received:
+            last_progress, last_received = time.perf_counter(), received
+        finished = not sender.is_alive() and listener.qsize() == 0 and listener.stored + listener.dropped + listener.parse_errors >= received
+        if finished and (received == len(messages) or time.perf_counter() - last_progress > 1):
+            break
+    elapsed = (last_progress if received < len(messages) else time.perf_counter()) - started
+    sender.join()
+    await listener.stop()
+    stats = listener.stats()
+    return {
+        "transport": transport,
+        **({"offered_per_s": args.udp_rate} if transport == "udp" else {}),
+        "sent": len(messages),
+        "received": received,
+        "lost_in_kernel": len(messages) - received,
+        "dropped_queue_full": stats["dropped"],
+        "stored": stats["stored"],
+        "batches": stats["batches"],
+        "events_per_s": round(stats["stored"] / elapsed),
+        "max_batch_lag_ms": round(stats["max_batch_lag_seconds"] * 1000, 1),
+    }
+
+def free_port(kind) -> int:
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Syslog listener throughput")
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--queue-size", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--transports", default="tcp,udp")
+    parser.add_argument("--udp-rate", type=float, default=20000, help="UDP messages per second sent (0: as fast as possible)")
+    parser.add_argument("--listener-cpu", type=int, default=0)
+    parser.add_argument("--sender-cpu", type=int, default=1)
+    args = parser.parse_args()
+
+    # The app modules build their clients on import; nothing is sent
+    os.environ.setdefault("DATABASE_URL", "postgresql://localhost/unused")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    messages = make_messages(args.messages)
+    pin(args.listener_cpu)
+    print(run_parse(messages))
+    for transport in args.transports.split(","):
+        print(asyncio.run(run_listener(transport, messages, args)))
+
+if __name__ == "__main__":
+    main()
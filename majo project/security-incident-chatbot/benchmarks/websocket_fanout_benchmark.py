@@ -0,0 +1,119 @@
+"""
+Live alert feed fan-out benchmark
+
+Opens many /ws/alerts clients with a mix of severity filters, posts batches
+of alerts through /process_alerts/bulk and measures, for every alert.created
+event a client should see:
+- delivery latency from the start of the batch's POST
+- events delivered vs expected (from the severities the API returned)
+- events delivered per second across all clients
+
+The messages match pre-classifier rules, so the LLM is not involved. Run
+the app once with each backend to compare them:
+    ALERT_EVENTS_BACKEND=memory uvicorn main:app --port 8000
+    python benchmarks/websocket_fanout_benchmark.py --url http://localhost:8000 --clients 500
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+import websockets
+
+MESSAGES = [
+    "Port scan detected from 10.1.{i}.7",
+    "Failed login for svc_backup{i} from 172.16.0.{i}",
+    "Successful login for analyst{i} from 10.2.0.{i}",
+]
+# Severity filters handed out to clients in turn; None receives everything
+FILTERS = [None, "High", "High,Critical", "Low,Medium"]
+
+def wants(severity_filter, severity: str) -> bool:
+    return severity_filter is None or severity in severity_filter.split(",")
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def client(url: str, severity_filter, run: str, batch_started: dict, latencies: list, connected: asyncio.Event, counts: dict):
+    query = f"?severity={severity_filter}" if severity_filter else ""
+    async with websockets.connect(f"{url}/ws/alerts{query}", max_queue=None) as websocket:
+        counts["connected"] += 1
+        if counts["connected"] == counts["clients"]:
+            connected.set()
+        async for text in websocket:
+            received = time.perf_counter()
+            event = json.loads(text)
+            source = event["alert"]["source"]
+            if event["type"] != "alert.created" or not source.startswith(f"fanout-{run}-"):
+                continue
+            batch = int(source.split("-")[2])
+            latencies.append(received - batch_started[batch])
+
+async def run(url: str, clients: int, batches: int, batch_size: int, pause: float):
+    ws_url = url.replace("http://", "ws://").replace("https://", "wss://")
+    run_id = uuid.uuid4().hex[:8]
+    batch_started, latencies = {}, []
+    counts = {"connected": 0, "clients": clients}
+    connected = asyncio.Event()
+    filters = [FILTERS[i % len(FILTERS)] for i in range(clients)]
+    tasks = [
+        asyncio.create_task(client(ws_url, severity_filter, run_id, batch_started, latencies, connected, counts))
+        for severity_filter in filters
+    ]
+    await asyncio.wait_for(connected.wait(), timeout=60)
+    print(f"{clients} clients connected")
+
+    expected = 0
+    async with httpx.AsyncClient(base_url=url, timeout=120) as http:
+        started = time.perf_counter()
+        for batch in range(batches):
+            alerts = [
+                {"source": f"fanout-{run_id}-{batch}-{i}", "message": MESSAGES[i % len(MESSAGES)].format(i=i % 250)}
+                for i in range(batch_size)
+            ]
+            batch_started[batch] = time.perf_counter()
+            response = await http.post("/process_alerts/bulk", json=alerts)
+            response.raise_for_status()
+            for result in response.json()["results"]:
+                if result.get("error") is None and not result.get("deduplicated"):
+                    expected += sum(1 for severity_filter in filters if wants(severity_filter, result["severity"]))
+            await asyncio.sleep(pause)
+
+        # Wait for stragglers, up to 10 seconds after the last batch
+        deadline = time.perf_counter() + 10
+        while len(latencies) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+
+        stats = (await http.get("/alert_events/stats")).json()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"backend: {stats['backend']}, dropped subscribers: {stats['dropped_subscribers']}")
+    print(f"delivered {len(latencies):,} of {expected:,} expected events in {elapsed:.1f}s ({len(latencies) / elapsed:,.0f}/s)")
+    if latencies:
+        print(
+            f"latency p50 {statistics.median(latencies) * 1000:.0f} ms"
+            f"  p95 {percentile(latencies, 0.95) * 1000:.0f} ms"
+            f"  p99 {percentile(latencies, 0.99) * 1000:.0f} ms"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Fan-out latency of the /ws/alerts live feed")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--pause", type=float, default=0.2, help="Seconds between batches")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.clients, args.batches, args.batch_size, args.pause))
+
+if __name__ == "__main__":
+    main()
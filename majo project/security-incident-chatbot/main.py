@@ -1,22 +1,74 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi import Request
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from pydantic import ValidationError
+import json
+import os
+import asyncio
 
-from app.database import get_db, Base, engine
-from app.models import Alert, AlertCreate, AlertResponse
-from app.services.openai_service import classify_alert_severity, generate_response_recommendation
+from app.database import get_db, get_pool_metrics, run_migrations, AsyncSessionLocal
+from app.models import (
+    Alert,
+    AlertCreate,
+    AlertResponse,
+    AlertPage,
+    AlertStatusResponse,
+    AlertStatsResponse,
+    AlertSearchHit,
+    AlertSearchResponse,
+    SimilarAlert,
+    SimilarAlertsResponse,
+    BulkAlertResponse,
+    BulkAlertResult,
+    ProcessedAlertResponse,
+    IncidentPage,
+    IncidentResponse,
+    IncidentDetailResponse,
+    ALERT_METADATA_FIELDS,
+    normalize_metadata_field
+)
+from app.services.recommendation_service import recommendation_store
+from app.services.stats_service import get_alert_stats_summary
+from app.services.similarity import similar_alert_index, SIMILARITY_ENABLED
+from app.repositories.recommendation_repository import get_latest_recommendations
+from app.services.alert_pipeline import ingest_alert, ingest_alerts, BULK_INSERT_CHUNK_SIZE, BULK_MAX_LINE_BYTES
 from app.services.jira_service import create_jira_ticket
-from app.services.slack_service import send_slack_alert
-from app.repositories.alert_repository import create_alert, get_alert_by_id, get_alerts_by_filter
-from sqlalchemy.orm import Session
+from app.services.slack_service import send_slack_alert, slack_dispatcher
+from app.services.enrichment_queue import enrichment_queue
+from app.services.classification_cache import classification_cache
+from app.services.preclassifier import load_preclassifier_model
+from app.services.deduplication import alert_deduplicator
+from app.services.alert_events import alert_events
+from app.services.correlation import incident_correlator
+from app.services.retention import alert_retention
+from app.services.syslog_listener import syslog_listener
+from app.services.openai_service import llm_gateway
+from app.services.llm_gateway import LLMUnavailableError
+from app.observability import (
+    METRICS_ENABLED, METRICS_CONTENT_TYPE, RequestContextMiddleware, configure_logging, register_queue_depth,
+    register_llm_gateway_state, render_metrics
+)
+from app.repositories.alert_repository import (
+    get_alert_by_id,
+    get_alerts_by_filter,
+    stream_alerts_by_filter,
+    encode_alert_cursor,
+    decode_alert_cursor,
+    search_alerts,
+    set_alert_jira_ticket_if_missing,
+    SEARCH_MAX_OFFSET
+)
+from app.repositories.incident_repository import get_incident_by_id, get_incidents, get_incident_alerts
+from sqlalchemy.ext.asyncio import AsyncSession
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Bring the database schema up to date (disable to run `alembic upgrade head` separately)
+if os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() == "true":
+    run_migrations()
 
 app = FastAPI(title="Security Incident Management Chatbot")
 
@@ -35,6 +87,100 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request id (X-Request-ID) on every request and log line, and HTTP latency metrics
+app.add_middleware(RequestContextMiddleware)
+configure_logging()
+
+# In-process queues reported as alert_pipeline_queue_depth on /metrics
+register_queue_depth("enrichment", enrichment_queue.qsize)
+register_queue_depth("similarity_embedding", similar_alert_index.qsize)
+register_queue_depth("slack_dispatcher", slack_dispatcher.queued)
+register_queue_depth("alert_events_outgoing", lambda: alert_events.stats()["buffered_events"])
+register_queue_depth("db_pool_waiters", lambda: get_pool_metrics()["async_engine"]["waiting"])
+register_queue_depth("llm_gateway", lambda: llm_gateway.limiter.queued)
+register_queue_depth("syslog", syslog_listener.qsize)
+
+# LLM gateway state reported as llm_gateway_state on /metrics
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+register_llm_gateway_state("concurrency_limit", lambda: llm_gateway.limiter.limit)
+register_llm_gateway_state("in_flight", lambda: llm_gateway.limiter.in_flight)
+register_llm_gateway_state("circuit", lambda: CIRCUIT_STATES[llm_gateway.breaker.state])
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, error: LLMUnavailableError):
+    """
+    The LLM is overloaded or down (classification falls back locally; this
+    covers recommendations): 503 with a Retry-After hint
+    """
+    headers = {"Retry-After": str(max(1, round(error.retry_after)))} if error.retry_after else None
+    return JSONResponse({"detail": f"LLM unavailable: {error}"}, status_code=503, headers=headers)
+
+@app.on_event("startup")
+async def load_preclassifier():
+    load_preclassifier_model()
+
+@app.on_event("startup")
+async def start_enrichment_workers():
+    await enrichment_queue.start()
+
+@app.on_event("startup")
+async def start_deduplicator():
+    await alert_deduplicator.start()
+
+@app.on_event("startup")
+async def start_incident_correlator():
+    await incident_correlator.start()
+
+@app.on_event("startup")
+async def start_alert_retention():
+    await alert_retention.start()
+
+@app.on_event("startup")
+async def start_similarity_index():
+    if SIMILARITY_ENABLED:
+        await similar_alert_index.start()
+
+@app.on_event("startup")
+async def start_alert_events():
+    await alert_events.start()
+
+@app.on_event("startup")
+async def start_syslog_listener():
+    await syslog_listener.start()
+
+@app.on_event("shutdown")
+async def stop_syslog_listener():
+    # First, so the messages it still holds are stored and queued for enrichment
+    await syslog_listener.stop()
+
+@app.on_event("shutdown")
+async def stop_enrichment_workers():
+    await enrichment_queue.stop()
+
+@app.on_event("shutdown")
+async def stop_deduplicator():
+    await alert_deduplicator.stop()
+
+@app.on_event("shutdown")
+async def stop_incident_correlator():
+    await incident_correlator.stop()
+
+@app.on_event("shutdown")
+async def stop_alert_retention():
+    await alert_retention.stop()
+
+@app.on_event("shutdown")
+async def stop_slack_dispatcher():
+    await slack_dispatcher.stop()
+
+@app.on_event("shutdown")
+async def stop_similarity_index():
+    await similar_alert_index.stop()
+
+@app.on_event("shutdown")
+async def stop_alert_events():
+    await alert_events.stop()
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """
@@ -42,105 +188,580 @@ async def root(request: Request):
     """
     return templates.TemplateResponse("index.html", {"request": request})
 
-@app.post("/process_alert/", response_model=AlertResponse)
-async def process_alert(alert: AlertCreate, db: Session = Depends(get_db)):
+@app.post("/process_alert/", response_model=ProcessedAlertResponse)
+async def process_alert(alert: AlertCreate, db: AsyncSession = Depends(get_db)):
     """
     Process an incoming security alert:
-    1. Classify severity using OpenAI
-    2. Store in database
-    3. Trigger JIRA ticket for High/Critical alerts
-    4. Send Slack notification for High/Critical alerts
+    1. Fold it into the original alert if it repeats one inside its suppression window
+    2. Classify severity (local pre-classifier, cache, then OpenAI)
+    3. Store in database
+    4. Group it into an incident with related alerts (shared IPs, hosts, users, hashes)
+    5. Queue JIRA ticket creation and Slack notification for High/Critical alerts,
+       made once per incident
+
+    The JIRA and Slack steps run in the background; poll /alert/{id}/status
+    to follow their progress. Classification stays on the request path
+    because the response carries the severity: clients (the web UI
+    included) use it to decide whether to fetch a response recommendation,
+    and it decides whether enrichment is queued at all.
     """
-    # Classify severity using OpenAI
-    severity = await classify_alert_severity(alert.message)
-    
-    # Create the alert in the database
-    new_alert = create_alert(db, alert, severity)
-    
-    # For High or Critical alerts, create JIRA ticket and send Slack notification
-    if severity in ["High", "Critical"]:
-        jira_ticket_id = await create_jira_ticket(new_alert)
-        new_alert.jira_ticket_id = jira_ticket_id
-        db.commit()
-        
-        # Send Slack notification
-        await send_slack_alert(new_alert)
-    
-    return AlertResponse(
-        id=new_alert.id,
-        source=new_alert.source,
-        severity=new_alert.severity,
-        message=new_alert.message,
-        created_at=new_alert.created_at,
-        jira_ticket_id=new_alert.jira_ticket_id
+    ingested = await ingest_alert(db, alert)
+    return ProcessedAlertResponse(
+        **AlertResponse.model_validate(ingested.alert, from_attributes=True).model_dump(),
+        deduplicated=ingested.deduplicated
     )
 
-@app.get("/alerts/", response_model=List[AlertResponse])
+@app.post("/process_alerts/bulk", response_model=BulkAlertResponse)
+async def process_alerts_bulk(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Process many alerts in one request, either as a JSON array or as an NDJSON
+    stream (Content-Type: application/x-ndjson, one alert per line).
+
+    Alerts are deduplicated, classified in parallel and stored with multi-row
+    inserts of up to BULK_INSERT_CHUNK_SIZE rows. NDJSON bodies are consumed as they arrive,
+    one chunk at a time. Returns a result for every item, in input order.
+    """
+    results: List[BulkAlertResult] = []
+    chunk = []
+
+    async def flush():
+        try:
+            stored = await ingest_alerts(db, [alert for _, alert in chunk])
+        except Exception as e:
+            # Earlier chunks are already stored; report the failure on this chunk's items
+            print(f"Bulk ingest chunk failed: {e}")
+            await db.rollback()
+            stored = [e] * len(chunk)
+        for (index, _), outcome in zip(chunk, stored):
+            if isinstance(outcome, Exception):
+                results.append(BulkAlertResult(index=index, error=f"Ingest failed: {outcome}"))
+            else:
+                results.append(BulkAlertResult(
+                    index=index,
+                    id=outcome.alert.id,
+                    severity=outcome.alert.severity,
+                    classified_by=outcome.alert.classified_by,
+                    enrichment_status=outcome.alert.enrichment_status,
+                    deduplicated=outcome.deduplicated
+                ))
+        chunk.clear()
+
+    async for index, item in iter_bulk_items(request):
+        try:
+            if isinstance(item, Exception):
+                raise item
+            chunk.append((index, AlertCreate.model_validate(item)))
+        except (ValueError, ValidationError) as e:
+            results.append(BulkAlertResult(index=index, error=str(e)))
+            continue
+
+        if len(chunk) >= BULK_INSERT_CHUNK_SIZE:
+            await flush()
+
+    if chunk:
+        await flush()
+
+    results.sort(key=lambda result: result.index)
+    accepted = sum(1 for result in results if result.error is None)
+    return BulkAlertResponse(accepted=accepted, rejected=len(results) - accepted, results=results)
+
+async def iter_bulk_items(request: Request):
+    """
+    Yield (index, item) for each alert in a bulk request body. Items that are
+    not valid JSON are yielded as the parsing exception. An NDJSON line
+    longer than BULK_MAX_LINE_BYTES ends the request with 413.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type or "jsonl" in content_type:
+        index = 0
+        buffer = bytearray()
+        async for data in request.stream():
+            # Only the new data can hold the end of the buffered line
+            scan_from = len(buffer)
+            buffer += data
+            line_start = 0
+            position = buffer.find(b"\n", scan_from)
+            while position != -1:
+                line = buffer[line_start:position]
+                _check_line_length(line)
+                if line.strip():
+                    yield index, _parse_ndjson_line(line)
+                    index += 1
+                line_start = position + 1
+                position = buffer.find(b"\n", line_start)
+            del buffer[:line_start]
+            _check_line_length(buffer)
+        if buffer.strip():
+            yield index, _parse_ndjson_line(buffer)
+        return
+
+    try:
+        items = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of alerts or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of alerts or NDJSON")
+    for index, item in enumerate(items):
+        yield index, item
+
+def _check_line_length(line: bytearray):
+    if len(line) > BULK_MAX_LINE_BYTES:
+        raise HTTPException(status_code=413, detail=f"NDJSON line exceeds {BULK_MAX_LINE_BYTES} bytes")
+
+def _parse_ndjson_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+
+def metadata_filters(
+    src_ip: Optional[str] = None,
+    dst_ip: Optional[str] = None,
+    host: Optional[str] = None,
+    user: Optional[str] = None,
+    rule_id: Optional[str] = None,
+    metadata: Optional[str] = Query(None, max_length=2000, description='JSON object the alert metadata must contain, e.g. {"process": "psexec.exe"}')
+) -> Optional[Dict[str, Any]]:
+    """
+    Alert metadata filters shared by the list, search and export routes
+    """
+    filters = {}
+    if metadata:
+        try:
+            filters = json.loads(metadata)
+        except ValueError:
+            filters = None
+        if not isinstance(filters, dict):
+            raise HTTPException(status_code=400, detail="metadata must be a JSON object")
+    for field, value in [("src_ip", src_ip), ("dst_ip", dst_ip), ("host", host), ("user", user), ("rule_id", rule_id)]:
+        if value is not None:
+            filters[field] = value
+    # Rejected here rather than when an export stream has already started
+    try:
+        for field in ALERT_METADATA_FIELDS:
+            if field in filters:
+                filters[field] = normalize_metadata_field(field, filters[field])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return filters or None
+
+@app.get("/alerts/", response_model=AlertPage)
 async def get_alerts(
     severity: Optional[str] = None,
     source: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = Depends(metadata_filters),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Fetch alerts with optional filtering by severity, source, date range or
+    metadata (src_ip, dst_ip, host, user, rule_id, or any keys as a JSON object)
+
+    Results are paginated newest first; pass the returned next_cursor back as
+    `cursor` to get the following page. When start_date reaches past the
+    retention hot window, archived alerts follow the ones still in the database.
+    """
+    try:
+        after = decode_alert_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Read one extra row to find out whether another page exists
+    alerts = await get_alerts_by_filter(db, severity, source, start_date, end_date, limit + 1, after, metadata)
+    if len(alerts) <= limit and alert_retention.reaches_archive(start_date):
+        # The archive continues after the last alert read from the table
+        archive_after = (alerts[-1].created_at, alerts[-1].id) if alerts else after
+        alerts += await alert_retention.query_archive(
+            severity, source, start_date, end_date, limit + 1 - len(alerts), archive_after, metadata
+        )
+    next_cursor = encode_alert_cursor(alerts[limit - 1]) if len(alerts) > limit else None
+    return AlertPage(
+        items=[AlertResponse.model_validate(alert, from_attributes=True) for alert in alerts[:limit]],
+        next_cursor=next_cursor
+    )
+
+@app.get("/alerts/search", response_model=AlertSearchResponse)
+async def search_alert_messages(
+    q: str = Query(..., min_length=1, max_length=500),
+    mode: str = "text",
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+    metadata: Optional[Dict[str, Any]] = Depends(metadata_filters),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Fetch alerts with optional filtering by severity, source, or date range
+    Search alert messages, best match first
+    mode: text (full-text, e.g. "mimikatz or 10.0.4.22"), substring or fuzzy.
+    Pass the returned next_offset back as `offset` to get the following page.
     """
-    alerts = get_alerts_by_filter(db, severity, source, start_date, end_date)
-    return alerts
+    try:
+        # Read one extra row to find out whether another page exists
+        hits = await search_alerts(db, q, mode, severity, source, start_date, end_date, limit + 1, offset, metadata)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return AlertSearchResponse(
+        query=q,
+        mode=mode,
+        items=[
+            AlertSearchHit(**AlertResponse.model_validate(alert, from_attributes=True).model_dump(), rank=rank)
+            for alert, rank in hits[:limit]
+        ],
+        next_offset=offset + limit if len(hits) > limit else None
+    )
+
+@app.get("/alerts/stats", response_model=AlertStatsResponse)
+async def get_alert_stats(
+    granularity: str = "hour",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Alert counts by severity, source and minute/hour/day bucket for a date
+    range (default: the last 24 hours), served from pre-aggregated rollups
+    """
+    end_date = end_date or datetime.utcnow()
+    start_date = start_date or end_date - timedelta(days=1)
+    try:
+        return await get_alert_stats_summary(db, granularity, start_date, end_date, severity, source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/alerts/export")
+async def export_alerts(
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    metadata: Optional[Dict[str, Any]] = Depends(metadata_filters)
+):
+    """
+    Stream every matching alert as NDJSON (one JSON object per line)
+    """
+    async def generate():
+        # The session lives as long as the stream, not the request handler
+        async with AsyncSessionLocal() as db:
+            async for alert in stream_alerts_by_filter(db, severity, source, start_date, end_date, metadata=metadata):
+                yield AlertResponse.model_validate(alert, from_attributes=True).model_dump_json() + "\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=alerts.ndjson"}
+    )
 
 @app.get("/alert/{alert_id}", response_model=AlertResponse)
-async def get_alert(alert_id: int, db: Session = Depends(get_db)):
+async def get_alert(alert_id: int, db: AsyncSession = Depends(get_db)):
     """
     Fetch a specific alert by ID
     """
-    alert = get_alert_by_id(db, alert_id)
+    alert = await get_alert_by_id(db, alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert
 
+@app.get("/alert/{alert_id}/similar", response_model=SimilarAlertsResponse)
+async def get_similar_alerts(
+    alert_id: int,
+    k: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    The k past alerts with the most similar messages, with their JIRA
+    tickets and most recent response recommendations
+
+    With the default EMBEDDING_PROVIDER=local, similarity is lexical (shared
+    words and word pairs), not semantic; set EMBEDDING_PROVIDER=openai to
+    match alerts that describe the same thing in different words.
+    """
+    if not SIMILARITY_ENABLED:
+        raise HTTPException(status_code=503, detail="Similar-alert lookup is disabled")
+    if not similar_alert_index.ready:
+        # Results would only cover the vectors loaded so far
+        raise HTTPException(status_code=503, detail="Similar-alert index is still loading")
+
+    alert = await get_alert_by_id(db, alert_id)
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+
+    neighbours = await similar_alert_index.similar(db, alert, k)
+    recommendations = await get_latest_recommendations(db, [neighbour.id for neighbour, _ in neighbours])
+    return SimilarAlertsResponse(
+        alert_id=alert_id,
+        model=similar_alert_index.model,
+        items=[
+            SimilarAlert(
+                **AlertResponse.model_validate(neighbour, from_attributes=True).model_dump(),
+                score=round(score, 4),
+                recommendation=recommendations.get(neighbour.id)
+            )
+            for neighbour, score in neighbours
+        ]
+    )
+
+@app.get("/alert/{alert_id}/status", response_model=AlertStatusResponse)
+async def get_alert_status(alert_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Fetch the state of an alert's background JIRA/Slack enrichment job
+    """
+    alert = await get_alert_by_id(db, alert_id)
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
+
+@app.get("/incidents/", response_model=IncidentPage)
+async def list_incidents(
+    status: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Incidents with the most recent activity first, optionally only open or closed ones
+    """
+    incidents = await get_incidents(db, status, limit)
+    return IncidentPage(items=[IncidentResponse.model_validate(incident, from_attributes=True) for incident in incidents])
+
+@app.get("/incident/{incident_id}", response_model=IncidentDetailResponse)
+async def get_incident(
+    incident_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    An incident with its most recent alerts
+    """
+    incident = await get_incident_by_id(db, incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    alerts = await get_incident_alerts(db, incident_id, limit)
+    return IncidentDetailResponse(
+        **IncidentResponse.model_validate(incident, from_attributes=True).model_dump(),
+        alerts=[AlertResponse.model_validate(alert, from_attributes=True) for alert in alerts]
+    )
+
 @app.post("/create_ticket/{alert_id}")
-async def trigger_jira_ticket(alert_id: int, db: Session = Depends(get_db)):
+async def trigger_jira_ticket(alert_id: int, db: AsyncSession = Depends(get_db)):
     """
     Manually trigger JIRA ticket creation for an alert
     """
-    alert = get_alert_by_id(db, alert_id)
+    alert = await get_alert_by_id(db, alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
     if alert.jira_ticket_id:
         return {"message": f"JIRA ticket already exists: {alert.jira_ticket_id}"}
     
-    jira_ticket_id = await create_jira_ticket(alert)
-    alert.jira_ticket_id = jira_ticket_id
-    db.commit()
+    # Shares the ticket with a concurrent enrichment job for the same alert,
+    # and reuses one an earlier attempt created without saving its key
+    jira_ticket_id = await create_jira_ticket(alert, check_existing=True)
+    jira_ticket_id = await set_alert_jira_ticket_if_missing(db, alert, jira_ticket_id)
+    alert_events.publish("alert.updated", [alert])
     
     return {"message": f"JIRA ticket created: {jira_ticket_id}"}
 
 @app.get("/automated_response/{alert_id}")
-async def get_automated_response(alert_id: int, db: Session = Depends(get_db)):
+async def get_automated_response(alert_id: int, db: AsyncSession = Depends(get_db)):
     """
-    Generate an automated incident response recommendation
+    Get the automated incident response recommendation for an alert,
+    generating it only if no stored or similar recommendation exists
     """
-    alert = get_alert_by_id(db, alert_id)
+    alert = await get_alert_by_id(db, alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    response = await generate_response_recommendation(alert)
-    return {"response": response}
+    response, source = await recommendation_store.get_or_generate(db, alert)
+    return {"response": response, "source": source}
+
+@app.get("/automated_response/{alert_id}/stream")
+async def stream_automated_response(alert_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Stream the automated incident response recommendation as Server-Sent Events:
+    "token" events carry text as it is generated, then one "done" event
+    """
+    alert = await get_alert_by_id(db, alert_id)
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+
+    async def generate():
+        # The session lives as long as the stream, not the request handler
+        async with AsyncSessionLocal() as stream_db:
+            source = None
+            try:
+                async for text, source in recommendation_store.stream(stream_db, alert):
+                    yield f"event: token\ndata: {json.dumps({'text': text})}\n\n"
+            except Exception as e:
+                print(f"Error streaming recommendation for alert {alert_id}: {e}")
+                yield f"event: error\ndata: {json.dumps({'detail': 'Recommendation generation failed'})}\n\n"
+                return
+            yield f"event: done\ndata: {json.dumps({'source': source})}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _parse_severities(value) -> Optional[List[str]]:
+    """
+    Severity filter from "High,Critical" or ["High", "Critical"]; None means all
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    severities = [severity.strip() for severity in value or [] if severity and severity.strip()]
+    return severities or None
+
+@app.websocket("/ws/alerts")
+async def alert_feed(websocket: WebSocket, severity: Optional[str] = None):
+    """
+    Live feed of alert.created / alert.updated events as JSON text frames:
+    {"type": "alert.created", "alert": {...}}
+
+    `severity` (e.g. "High,Critical") filters events on the server; send
+    {"severity": [...]} (or null for all) to change the filter. Clients that
+    fall too far behind are closed with code 1013 and should reconnect.
+    """
+    await websocket.accept()
+    subscription = alert_events.subscribe(_parse_severities(severity))
+
+    async def send_events():
+        while True:
+            text = await subscription.queue.get()
+            if text is None:
+                await websocket.close(code=1013 if subscription.overflowed else 1001)
+                return
+            await websocket.send_text(text)
+
+    async def receive_filters():
+        while True:
+            try:
+                update = await websocket.receive_json()
+            except (ValueError, KeyError):
+                continue
+            if isinstance(update, dict) and "severity" in update:
+                severities = _parse_severities(update["severity"])
+                subscription.severities = set(severities) if severities else None
+
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(receive_filters())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        alert_events.unsubscribe(subscription)
+        for task in tasks:
+            task.cancel()
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception) and not isinstance(result, (WebSocketDisconnect, RuntimeError)):
+                print(f"Alert feed error: {result}")
 
 @app.post("/slack_alert/{alert_id}")
-async def trigger_slack_alert(alert_id: int, db: Session = Depends(get_db)):
+async def trigger_slack_alert(alert_id: int, db: AsyncSession = Depends(get_db)):
     """
     Manually trigger a Slack notification for an alert
     """
-    alert = get_alert_by_id(db, alert_id)
+    alert = await get_alert_by_id(db, alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
     result = await send_slack_alert(alert)
     return {"message": "Slack notification sent successfully"}
 
+@app.get("/classification_cache/stats")
+async def get_classification_cache_stats():
+    """
+    Hit/miss/eviction counters for the severity classification cache
+    """
+    return classification_cache.stats()
+
+@app.get("/dedup/stats")
+async def get_dedup_stats():
+    """
+    Open suppression windows and folded-duplicate counters
+    """
+    return alert_deduplicator.stats()
+
+@app.get("/slack/metrics")
+async def get_slack_metrics():
+    """
+    Delivery, digest and rate-limit counters for outgoing Slack messages
+    """
+    return slack_dispatcher.stats()
+
+@app.get("/recommendations/stats")
+async def get_recommendation_stats():
+    """
+    Stored/reused/generated counters for response recommendations
+    """
+    return recommendation_store.stats()
+
+@app.get("/alert_events/stats")
+async def get_alert_event_stats():
+    """
+    Live feed subscribers and published/delivered event counters
+    """
+    return alert_events.stats()
+
+@app.get("/correlation/stats")
+async def get_correlation_stats():
+    """
+    Open incidents and entities in the correlation index, and correlation counters
+    """
+    return incident_correlator.stats()
+
+@app.get("/retention/stats")
+async def get_retention_stats():
+    """
+    Alerts archived and pruned by the retention job
+    """
+    return alert_retention.stats()
+
+@app.get("/syslog/stats")
+async def get_syslog_stats():
+    """
+    Messages received, dropped and stored by the syslog listener, and its queue lag
+    """
+    return syslog_listener.stats()
+
+@app.get("/similarity/stats")
+async def get_similarity_stats():
+    """
+    Size, memory and embedding/search counters for the similar-alert index
+    """
+    return similar_alert_index.stats()
+
+@app.get("/llm/stats")
+async def get_llm_stats():
+    """
+    LLM gateway state: concurrency limit, queue, budgets, circuit and call outcomes
+    """
+    return llm_gateway.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus metrics: per-stage latency and errors, LLM tokens, classification
+    stages, HTTP latency by route and queue depths
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/pool/metrics")
+async def get_connection_pool_metrics():
+    """
+    Database connection pool state: checked out connections, waiters and checkout wait times
+    """
+    return get_pool_metrics()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
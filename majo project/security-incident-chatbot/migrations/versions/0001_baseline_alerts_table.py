@@ -0,0 +1,39 @@
+"""baseline alerts table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+Matches the table previously created by Base.metadata.create_all, so
+databases that already have it are adopted as-is.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("alerts"):
+        return
+
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("source", sa.String(100), nullable=False),
+        sa.Column("severity", sa.String(50), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("jira_ticket_id", sa.String(50), nullable=True),
+    )
+    op.create_index("ix_alerts_id", "alerts", ["id"])
+
+
+def downgrade():
+    op.drop_index("ix_alerts_id", table_name="alerts")
+    op.drop_table("alerts")
@@ -0,0 +1,48 @@
+"""enrichment job state, classification stage and classification cache
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+NEW_ALERT_COLUMNS = [
+    sa.Column("classified_by", sa.String(20), nullable=True),
+    sa.Column("enrichment_status", sa.String(20), nullable=False, server_default="skipped"),
+    sa.Column("enrichment_attempts", sa.Integer(), nullable=False, server_default="0"),
+    sa.Column("enrichment_error", sa.Text(), nullable=True),
+    sa.Column("slack_notified", sa.Boolean(), nullable=False, server_default=sa.false()),
+    sa.Column("updated_at", sa.DateTime(), nullable=True),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # Tables created by create_all after these columns were added already have them
+    existing = {column["name"] for column in inspector.get_columns("alerts")}
+    for column in NEW_ALERT_COLUMNS:
+        if column.name not in existing:
+            op.add_column("alerts", column)
+
+    if not inspector.has_table("classification_cache"):
+        op.create_table(
+            "classification_cache",
+            sa.Column("fingerprint", sa.String(64), primary_key=True),
+            sa.Column("severity", sa.String(50), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table("classification_cache")
+    for column in reversed(NEW_ALERT_COLUMNS):
+        op.drop_column("alerts", column.name)
@@ -0,0 +1,59 @@
+"""indexes for the alert query paths
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:00
+
+- (created_at, id): newest-first keyset pages without filters
+- (severity, created_at, id) / (source, created_at, id): filtered pages
+- BRIN on created_at: cheap range scans over the append-only timeline
+- partial index on unfinished enrichment jobs for the startup re-queue
+
+Indexes are built CONCURRENTLY so existing tables stay writable.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_alerts_created_at_id", "alerts", ["created_at", "id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            "ix_alerts_severity_created_at", "alerts", ["severity", "created_at", "id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            "ix_alerts_source_created_at", "alerts", ["source", "created_at", "id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            "ix_alerts_created_at_brin", "alerts", ["created_at"],
+            postgresql_using="brin", postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            "ix_alerts_enrichment_pending", "alerts", ["id"],
+            postgresql_where=sa.text("enrichment_status IN ('queued', 'running', 'retrying')"),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in [
+            "ix_alerts_enrichment_pending",
+            "ix_alerts_created_at_brin",
+            "ix_alerts_source_created_at",
+            "ix_alerts_severity_created_at",
+            "ix_alerts_created_at_id",
+        ]:
+            op.drop_index(name, table_name="alerts", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,38 @@
+"""stored response recommendations
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:40:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "response_recommendations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("alert_id", sa.Integer(), sa.ForeignKey("alerts.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("prompt_version", sa.String(20), nullable=False),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("recommendation", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("alert_id", "prompt_version", name="uq_response_recommendations_alert_version"),
+    )
+    op.create_index(
+        "ix_response_recommendations_fingerprint",
+        "response_recommendations",
+        ["fingerprint", "prompt_version"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_response_recommendations_fingerprint", table_name="response_recommendations")
+    op.drop_table("response_recommendations")
@@ -0,0 +1,39 @@
+"""alert deduplication columns and open-window key
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:05:00
+
+dedup_key is only set while an alert's suppression window is open, so its
+unique index is partial and stays small.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("alerts", sa.Column("fingerprint", sa.String(64), nullable=True))
+    op.add_column("alerts", sa.Column("dedup_key", sa.String(64), nullable=True))
+    op.add_column("alerts", sa.Column("occurrence_count", sa.Integer(), nullable=False, server_default="1"))
+    op.add_column("alerts", sa.Column("first_seen_at", sa.DateTime(), nullable=True))
+    op.add_column("alerts", sa.Column("last_seen_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_alerts_dedup_key", "alerts", ["dedup_key"],
+        unique=True, postgresql_where=sa.text("dedup_key IS NOT NULL")
+    )
+
+
+def downgrade():
+    op.drop_index("ix_alerts_dedup_key", table_name="alerts")
+    op.drop_column("alerts", "last_seen_at")
+    op.drop_column("alerts", "first_seen_at")
+    op.drop_column("alerts", "occurrence_count")
+    op.drop_column("alerts", "dedup_key")
+    op.drop_column("alerts", "fingerprint")
@@ -0,0 +1,44 @@
+"""alert count rollups per minute, hour and day
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 15:30:00
+
+The rollups are backfilled from the existing alerts in one pass per
+granularity; new alerts are added at insert time.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+GRANULARITIES = ["minute", "hour", "day"]
+
+
+def upgrade():
+    op.create_table(
+        "alert_stats_rollups",
+        sa.Column("granularity", sa.String(10), primary_key=True),
+        sa.Column("bucket_start", sa.DateTime(), primary_key=True),
+        sa.Column("severity", sa.String(50), primary_key=True),
+        sa.Column("source", sa.String(100), primary_key=True),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+    )
+
+    for granularity in GRANULARITIES:
+        op.execute(f"""
+            INSERT INTO alert_stats_rollups (granularity, bucket_start, severity, source, count)
+            SELECT '{granularity}', date_trunc('{granularity}', created_at), severity, source, count(*)
+            FROM alerts
+            WHERE created_at IS NOT NULL
+            GROUP BY 2, 3, 4
+        """)
+
+
+def downgrade():
+    op.drop_table("alert_stats_rollups")
@@ -0,0 +1,57 @@
+"""full-text and trigram search over alert messages
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 18:40:00
+
+search_vector is a stored generated column, so adding it rewrites the alerts
+table once. The trigram index needs the pg_trgm extension; it is created only
+when the server ships the extension and the migration role may install it.
+Without it substring search still works, without an index.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+SEARCH_DOCUMENT = (
+    "to_tsvector('english'::regconfig, message) || "
+    "to_tsvector('simple'::regconfig, regexp_replace(message, '[[:punct:]]+', ' ', 'g'))"
+)
+
+
+def upgrade():
+    op.add_column(
+        "alerts",
+        sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(SEARCH_DOCUMENT, persisted=True))
+    )
+    op.create_index("ix_alerts_search_vector", "alerts", ["search_vector"], postgresql_using="gin")
+
+    bind = op.get_bind()
+    available = bind.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar()
+    if not available:
+        print("pg_trgm is not available; skipping ix_alerts_message_trgm")
+        return
+
+    try:
+        with bind.begin_nested():
+            bind.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except sa.exc.DBAPIError as e:
+        print(f"Could not install pg_trgm, skipping ix_alerts_message_trgm: {e}")
+        return
+    op.execute("CREATE INDEX ix_alerts_message_trgm ON alerts USING gin (message gin_trgm_ops)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_alerts_message_trgm")
+    op.drop_index("ix_alerts_search_vector", table_name="alerts")
+    op.drop_column("alerts", "search_vector")
@@ -0,0 +1,32 @@
+"""alert message embeddings for similar-alert lookup
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 20:10:00
+
+Vectors are filled in by the app's background worker (new alerts) and its
+startup backfill (existing alerts), not by this migration.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "alert_embeddings",
+        sa.Column("model", sa.String(100), primary_key=True),
+        sa.Column("alert_id", sa.Integer(), sa.ForeignKey("alerts.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("embedding", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("alert_embeddings")
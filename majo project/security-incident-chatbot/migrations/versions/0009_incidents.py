@@ -0,0 +1,62 @@
+"""incidents table and alert incident links
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 21:30:00
+
+Existing alerts keep incident_id NULL; only alerts ingested from now on
+are correlated.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "incidents",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default="open"),
+        sa.Column("severity", sa.String(50), nullable=False),
+        sa.Column("source", sa.String(100), nullable=False),
+        sa.Column("title", sa.Text(), nullable=False),
+        sa.Column("lead_alert_id", sa.Integer(), nullable=True),
+        sa.Column("entities", postgresql.ARRAY(sa.String(255)), nullable=False, server_default="{}"),
+        sa.Column("alert_count", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("first_seen_at", sa.DateTime(), nullable=False),
+        sa.Column("last_seen_at", sa.DateTime(), nullable=False),
+        sa.Column("jira_ticket_id", sa.String(50), nullable=True),
+        sa.Column("slack_severity", sa.String(50), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_incidents_last_seen_at_id", "incidents", ["last_seen_at", "id"])
+    op.create_index(
+        "ix_incidents_open", "incidents", ["last_seen_at"], postgresql_where=sa.text("status = 'open'")
+    )
+
+    # Nullable without a default: adding the column doesn't rewrite the table
+    op.add_column(
+        "alerts",
+        sa.Column("incident_id", sa.Integer(), sa.ForeignKey("incidents.id", ondelete="SET NULL"), nullable=True)
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_alerts_incident_id", "alerts", ["incident_id", "id"],
+            postgresql_where=sa.text("incident_id IS NOT NULL"),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade():
+    op.drop_index("ix_alerts_incident_id", table_name="alerts")
+    op.drop_column("alerts", "incident_id")
+    op.drop_index("ix_incidents_open", table_name="incidents")
+    op.drop_index("ix_incidents_last_seen_at_id", table_name="incidents")
+    op.drop_table("incidents")
@@ -0,0 +1,48 @@
+"""structured alert metadata with GIN and expression indexes
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 23:10:00
+
+Existing alerts keep metadata NULL and stay out of the partial indexes.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+# Kept in step with ALERT_METADATA_FIELDS in app/models.py
+METADATA_FIELDS = ["src_ip", "dst_ip", "host", "user", "rule_id"]
+
+
+def upgrade():
+    # Nullable without a default: adding the column doesn't rewrite the table
+    op.add_column("alerts", sa.Column("metadata", postgresql.JSONB(), nullable=True))
+
+    # Built concurrently so ingest keeps writing to alerts meanwhile
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_alerts_metadata", "alerts", ["metadata"],
+            postgresql_using="gin", postgresql_ops={"metadata": "jsonb_path_ops"},
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        for field in METADATA_FIELDS:
+            op.create_index(
+                f"ix_alerts_metadata_{field}", "alerts",
+                [sa.text(f"(metadata ->> '{field}')"), "created_at", "id"],
+                postgresql_where=sa.text(f"(metadata ->> '{field}') IS NOT NULL"),
+                postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade():
+    for field in METADATA_FIELDS:
+        op.drop_index(f"ix_alerts_metadata_{field}", table_name="alerts")
+    op.drop_index("ix_alerts_metadata", table_name="alerts")
+    op.drop_column("alerts", "metadata")
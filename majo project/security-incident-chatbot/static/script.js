@@ -24,6 +24,10 @@ document.addEventListener('DOMContentLoaded', () => {
         if (severity && (severity === 'High' || severity === 'Critical')) {
             messageDiv.classList.add(`severity-${severity.toLowerCase()}`);
         }
+        if (alertId && severity) {
+            // Lets live updates find the alert's element
+            messageDiv.dataset.alertId = alertId;
+        }
 
         const alertInfo = document.createElement('div');
         alertInfo.className = 'alert-info';
@@ -116,52 +120,184 @@ document.addEventListener('DOMContentLoaded', () => {
         return loadingDiv;
     }
 
+    const HISTORY_PAGE_SIZE = 50;
+    let historyCursor = null;
+    let historyLoading = false;
+    // True while the history view is shown; live alerts are added to its top
+    let historyMode = false;
+
+    function historyFilterParams() {
+        const params = new URLSearchParams();
+
+        if (severityFilter.value) {
+            params.append('severity', severityFilter.value);
+        }
+        if (startDate.value) {
+            params.append('start_date', new Date(startDate.value).toISOString());
+        }
+        if (endDate.value) {
+            params.append('end_date', new Date(endDate.value).toISOString());
+        }
+        return params;
+    }
+
     async function loadAlertHistory() {
+        // Clear existing messages and start again from the newest alert
+        chatMessages.innerHTML = '';
+        historyCursor = null;
+        historyMode = true;
+        sendFeedFilter();
+        await loadHistoryPage();
+    }
+
+    async function loadHistoryPage() {
+        if (historyLoading) return;
+        historyLoading = true;
         const loadingIndicator = addLoadingIndicator();
         
         try {
-            let url = '/alerts/?';
-            const params = new URLSearchParams();
-            
-            if (severityFilter.value) {
-                params.append('severity', severityFilter.value);
-            }
-            if (startDate.value) {
-                params.append('start_date', new Date(startDate.value).toISOString());
-            }
-            if (endDate.value) {
-                params.append('end_date', new Date(endDate.value).toISOString());
+            const params = historyFilterParams();
+            params.append('limit', HISTORY_PAGE_SIZE);
+            if (historyCursor) {
+                params.append('cursor', historyCursor);
             }
 
-            const response = await fetch(url + params.toString());
-            const alerts = await response.json();
-
-            // Clear existing messages
-            chatMessages.innerHTML = '';
+            const response = await fetch('/alerts/?' + params.toString());
+            const page = await response.json();
 
             // Display alerts
-            alerts.forEach(alert => {
+            page.items.forEach(alert => {
                 const messageElement = createMessageElement(
                     alert.message,
                     false,
                     alert.severity,
                     alert.id
                 );
-                chatMessages.appendChild(messageElement);
-
-                if (alert.jira_ticket_id) {
-                    chatMessages.appendChild(
-                        createMessageElement(`JIRA ticket: ${alert.jira_ticket_id}`, false)
-                    );
-                }
+                chatMessages.insertBefore(messageElement, loadingIndicator);
+                updateAlertElements(alert);
             });
 
+            historyCursor = page.next_cursor;
+
         } catch (error) {
             console.error('Error loading history:', error);
+            historyCursor = null;
             chatMessages.appendChild(createMessageElement('Error loading alert history. Please try again.', false));
         } finally {
             loadingIndicator.remove();
+            historyLoading = false;
+        }
+    }
+
+    // Infinite scroll: fetch the next page of history when nearing the bottom
+    chatMessages.addEventListener('scroll', () => {
+        const nearBottom = chatMessages.scrollTop + chatMessages.clientHeight >= chatMessages.scrollHeight - 200;
+        if (nearBottom && historyCursor && !historyLoading) {
+            loadHistoryPage();
+        }
+    });
+
+    // Live feed: alert.created / alert.updated events pushed over a WebSocket
+    let alertFeed = null;
+
+    function feedSeverities() {
+        return severityFilter.value ? [severityFilter.value] : null;
+    }
+
+    function connectAlertFeed() {
+        const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const params = new URLSearchParams();
+        if (severityFilter.value) {
+            params.append('severity', severityFilter.value);
         }
+        alertFeed = new WebSocket(`${protocol}//${window.location.host}/ws/alerts?${params.toString()}`);
+
+        alertFeed.onmessage = (e) => {
+            const event = JSON.parse(e.data);
+            if (event.type === 'alert.created') {
+                showCreatedAlert(event.alert);
+            } else if (event.type === 'alert.updated') {
+                updateAlertElements(event.alert);
+            }
+        };
+        // Reconnect after server restarts, network drops or falling behind (1013)
+        alertFeed.onclose = () => {
+            alertFeed = null;
+            setTimeout(connectAlertFeed, 3000);
+        };
+    }
+
+    function sendFeedFilter() {
+        if (alertFeed && alertFeed.readyState === WebSocket.OPEN) {
+            alertFeed.send(JSON.stringify({ severity: feedSeverities() }));
+        }
+    }
+
+    function showCreatedAlert(alert) {
+        // Only the history view lists stored alerts, and only an open-ended range includes new ones
+        if (!historyMode || endDate.value) return;
+        if (chatMessages.querySelector(`[data-alert-id="${alert.id}"]`)) return;
+        if (severityFilter.value && alert.severity !== severityFilter.value) return;
+
+        const messageElement = createMessageElement(alert.message, false, alert.severity, alert.id);
+        chatMessages.insertBefore(messageElement, chatMessages.firstChild);
+        updateAlertElements(alert);
+    }
+
+    function updateAlertElements(alert) {
+        chatMessages.querySelectorAll(`[data-alert-id="${alert.id}"]`).forEach(element => {
+            element.classList.remove('severity-high', 'severity-critical');
+            if (alert.severity === 'High' || alert.severity === 'Critical') {
+                element.classList.add(`severity-${alert.severity.toLowerCase()}`);
+            }
+            const badge = element.querySelector('.severity-badge');
+            if (badge) {
+                badge.textContent = alert.severity;
+            }
+
+            let ticket = element.querySelector('.jira-ticket');
+            if (alert.jira_ticket_id && !ticket) {
+                ticket = document.createElement('span');
+                ticket.className = 'jira-ticket';
+                element.querySelector('.alert-info').appendChild(ticket);
+            }
+            if (ticket) {
+                ticket.textContent = alert.jira_ticket_id ? `JIRA: ${alert.jira_ticket_id}` : '';
+            }
+        });
+    }
+
+    function streamAutomatedResponse(alertId) {
+        // Render the recommendation as it is generated instead of waiting for all of it
+        return new Promise((resolve) => {
+            const messageElement = createMessageElement('', false);
+            const content = messageElement.querySelector('.message-content');
+            const loadingIndicator = addLoadingIndicator();
+            const events = new EventSource(`/automated_response/${alertId}/stream`);
+
+            function finish(errorMessage) {
+                events.close();
+                loadingIndicator.remove();
+                if (errorMessage && !content.textContent) {
+                    chatMessages.appendChild(createMessageElement(errorMessage, false));
+                }
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+                resolve();
+            }
+
+            events.addEventListener('token', (e) => {
+                if (!messageElement.isConnected) {
+                    loadingIndicator.before(messageElement);
+                }
+                content.textContent += JSON.parse(e.data).text;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            });
+            events.addEventListener('done', () => finish());
+            events.addEventListener('error', (e) => {
+                const detail = e.data ? JSON.parse(e.data).detail : 'Error loading automated response.';
+                finish(detail);
+            });
+        });
     }
 
     async function processAlert(message) {
@@ -197,14 +333,19 @@ document.addEventListener('DOMContentLoaded', () => {
             loadingIndicator.remove();
 
             // Add response to chat
-            const responseMessage = `Alert processed with severity: ${data.severity}${data.jira_ticket_id ? '\nJIRA ticket created: ' + data.jira_ticket_id : ''}`;
+            let responseMessage = `Alert processed with severity: ${data.severity}`;
+            if (data.deduplicated) {
+                responseMessage = `Duplicate of alert ${data.id} suppressed, severity: ${data.severity}`;
+            } else if (data.jira_ticket_id) {
+                responseMessage += '\nJIRA ticket created: ' + data.jira_ticket_id;
+            } else if (data.enrichment_status === 'queued') {
+                responseMessage += '\nJIRA ticket and Slack notification queued';
+            }
             chatMessages.appendChild(createMessageElement(responseMessage, false, data.severity, data.id));
 
             // If high or critical severity, get automated response
-            if (['High', 'Critical'].includes(data.severity)) {
-                const automatedResponse = await fetch(`/automated_response/${data.id}`);
-                const responseData = await automatedResponse.json();
-                chatMessages.appendChild(createMessageElement(responseData.response, false));
+            if (['High', 'Critical'].includes(data.severity) && !data.deduplicated) {
+                await streamAutomatedResponse(data.id);
             }
 
         } catch (error) {
@@ -234,4 +375,7 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 
     loadHistoryButton.addEventListener('click', loadAlertHistory);
+    severityFilter.addEventListener('change', sendFeedFilter);
+
+    connectAlertFeed();
 }); 
\ No newline at end of file
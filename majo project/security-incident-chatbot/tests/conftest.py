@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The app modules build their engines on import; nothing here connects to the database
+os.environ.setdefault("DATABASE_URL", "postgresql://postgres@localhost/postgres")
+# Clients are created on import but no request is sent
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
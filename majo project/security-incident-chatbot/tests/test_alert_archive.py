@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Alert
+from app.services import retention
+from app.services.alert_archive import AlertArchive
+from app.services.retention import AlertRetention
+
+START = datetime(2026, 1, 1)
+
+def make_alerts(first_id, count, minutes=30):
+    return [
+        Alert(
+            id=alert_id,
+            source="edr" if alert_id % 2 else "fw",
+            severity="High" if alert_id % 3 == 0 else "Low",
+            message=f"Alert {alert_id}",
+            created_at=START + timedelta(minutes=minutes * alert_id),
+            enrichment_status="skipped",
+            slack_notified=False,
+            occurrence_count=1,
+            alert_metadata={"host": f"ws-{alert_id % 4}", "process": "cmd.exe"} if alert_id % 5 else None,
+        )
+        for alert_id in range(first_id, first_id + count)
+    ]
+
+@pytest.fixture
+def archive(tmp_path):
+    return AlertArchive(str(tmp_path))
+
+def test_write_partitions_by_day_and_severity(archive, tmp_path):
+    # 100 alerts half an hour apart cover 3 days
+    assert archive.write(make_alerts(1, 100)) == 6
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["day=2026-01-01", "day=2026-01-02", "day=2026-01-03"]
+    assert {path.name for path in (tmp_path / "day=2026-01-02").iterdir()} == {"severity=High", "severity=Low"}
+
+def test_rewriting_a_batch_replaces_its_files(archive):
+    alerts = make_alerts(1, 50)
+    archive.write(alerts)
+    archive.write(alerts)
+    assert len(archive.query(limit=1000)) == 50
+
+def test_query_newest_first_with_filters(archive):
+    archive.write(make_alerts(1, 100))
+
+    newest = archive.query(limit=3)
+    assert [alert.id for alert in newest] == [100, 99, 98]
+    assert newest[0].alert_metadata is None
+    assert newest[1].alert_metadata == {"host": "ws-3", "process": "cmd.exe"}
+
+    day_two = archive.query(severity="High", start_date=datetime(2026, 1, 2), end_date=datetime(2026, 1, 2, 23, 59), limit=100)
+    assert {alert.created_at.date() for alert in day_two} == {datetime(2026, 1, 2).date()}
+    assert all(alert.severity == "High" and alert.id % 3 == 0 for alert in day_two)
+
+    by_metadata = archive.query(source="edr", metadata={"host": "WS-1", "process": "cmd.exe"}, limit=100)
+    assert by_metadata and all(alert.source == "edr" and alert.alert_metadata["host"] == "ws-1" for alert in by_metadata)
+
+def test_query_pages_with_the_alert_cursor(archive):
+    archive.write(make_alerts(1, 100))
+    first = archive.query(limit=60)
+    second = archive.query(limit=60, after=(first[-1].created_at, first[-1].id))
+    assert [alert.id for alert in first + second] == list(range(100, 0, -1))
+
+def test_empty_archive(archive):
+    assert archive.query(start_date=START) == []
+
+class FakeSession:
+    def __init__(self):
+        self.expunged = []
+
+    def expunge(self, alert):
+        self.expunged.append(alert.id)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+def test_retention_archives_before_deleting_in_chunks(archive, monkeypatch):
+    table = {alert.id: alert for alert in make_alerts(1, 25)}
+    deletes = []
+
+    async def get_alerts_to_archive(db, created_before, limit):
+        return sorted(table.values(), key=lambda alert: alert.id)[:limit]
+
+    async def delete_alerts(db, alert_ids):
+        # Every deleted alert is already readable from the archive
+        archived = {alert.id for alert in archive.query(limit=1000)}
+        assert set(alert_ids) <= archived
+        deletes.append(len(alert_ids))
+        for alert_id in alert_ids:
+            del table[alert_id]
+        return len(alert_ids)
+
+    monkeypatch.setattr(retention, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(retention, "get_alerts_to_archive", get_alerts_to_archive)
+    monkeypatch.setattr(retention, "delete_alerts", delete_alerts)
+    job = AlertRetention(archive, enabled=True, batch_size=10, delete_chunk_size=4, delete_pause_seconds=0)
+
+    assert asyncio.run(job.run_once()) == 25
+    assert not table
+    assert deletes == [4, 4, 2] * 2 + [4, 1]
+    assert job.alerts_deleted == 25
+
+def test_failed_archive_write_deletes_nothing(archive, monkeypatch):
+    async def get_alerts_to_archive(db, created_before, limit):
+        return make_alerts(1, 5)
+
+    async def delete_alerts(db, alert_ids):
+        raise AssertionError("deleted before archiving")
+
+    def failing_write(alerts):
+        raise OSError("archive unavailable")
+
+    monkeypatch.setattr(retention, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(retention, "get_alerts_to_archive", get_alerts_to_archive)
+    monkeypatch.setattr(retention, "delete_alerts", delete_alerts)
+    monkeypatch.setattr(archive, "write", failing_write)
+
+    with pytest.raises(OSError):
+        asyncio.run(AlertRetention(archive, enabled=True).run_once())
+
+def test_archive_is_queried_only_for_ranges_past_the_hot_window(archive):
+    job = AlertRetention(archive, enabled=True, hot_days=30)
+    assert job.reaches_archive(datetime.utcnow() - timedelta(days=31))
+    assert not job.reaches_archive(datetime.utcnow() - timedelta(days=1))
+    assert not job.reaches_archive(None)
+    assert not AlertRetention(archive, enabled=False).reaches_archive(START)
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+from app.models import Alert, AlertCreate
+from app.repositories.alert_repository import (
+    _alert_filters,
+    _escape_like,
+    alert_metadata_value,
+    decode_alert_cursor,
+    encode_alert_cursor,
+    search_alerts
+)
+
+def test_escape_like_escapes_wildcards_and_backslash():
+    assert _escape_like("50%_off\\now") == "50\\%\\_off\\\\now"
+    assert _escape_like("plain text") == "plain text"
+
+def test_substring_pattern_keeps_user_wildcards_literal():
+    clause = Alert.message.ilike(f"%{_escape_like('10.0.0.%')}%", escape="\\")
+    compiled = clause.compile(dialect=postgresql.dialect())
+    assert "ESCAPE" in str(compiled)
+    assert list(compiled.params.values()) == ["%10.0.0.\\%%"]
+
+def test_date_filters_are_naive_utc():
+    start = datetime(2026, 10, 17, 2, tzinfo=timezone(timedelta(hours=2)))
+    filters = _alert_filters(start_date=start, end_date=datetime(2026, 10, 17, 12))
+    values = [condition.right.value for condition in filters]
+    assert values == [datetime(2026, 10, 17), datetime(2026, 10, 17, 12)]
+
+def test_cursor_round_trip_and_rejects_garbage():
+    alert = SimpleNamespace(created_at=datetime(2026, 10, 17, 9, 30, 1, 5), id=42)
+    assert decode_alert_cursor(encode_alert_cursor(alert)) == (alert.created_at, 42)
+    with pytest.raises(ValueError):
+        decode_alert_cursor("not-a-cursor")
+
+def test_search_rejects_unknown_mode():
+    with pytest.raises(ValueError, match="mode must be one of"):
+        asyncio.run(search_alerts(None, "mimikatz", mode="regex"))
+
+def test_metadata_fields_match_their_expression_indexes():
+    filters = _alert_filters(metadata={"host": "WEB-01.", "src_ip": "2001:DB8::1", "process": "psexec.exe"})
+    compiled = [condition.compile(dialect=postgresql.dialect()) for condition in filters]
+    # The key is inline so the planner matches the index on (metadata ->> 'host')
+    assert [str(clause) for clause in compiled] == [
+        "(alerts.metadata ->> 'host') = %(param_1)s",
+        "(alerts.metadata ->> 'src_ip') = %(param_1)s",
+        "alerts.metadata @> %(metadata_1)s",
+    ]
+    assert [list(clause.params.values()) for clause in compiled] == [
+        ["web-01"], ["2001:db8::1"], [{"process": "psexec.exe"}]
+    ]
+
+def test_metadata_filter_rejects_invalid_ip():
+    with pytest.raises(ValueError):
+        _alert_filters(metadata={"dst_ip": "not-an-ip"})
+
+def test_incoming_metadata_is_normalized_and_stored_without_empty_fields():
+    alert = AlertCreate(source="edr", message="m", metadata={"src_ip": "10.0.0.7", "host": "Web-01", "rule_id": 4625})
+    assert alert_metadata_value(alert) == {"src_ip": "10.0.0.7", "host": "web-01", "rule_id": "4625"}
+    assert alert_metadata_value(AlertCreate(source="edr", message="m", metadata={})) is None
+    with pytest.raises(ValidationError):
+        AlertCreate(source="edr", message="m", metadata={"src_ip": "10.0.0.999"})
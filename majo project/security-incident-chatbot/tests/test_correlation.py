@@ -0,0 +1,152 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import correlation
+from app.services.correlation import IncidentCorrelator, extract_entities, metadata_entities
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+@pytest.mark.parametrize("message, entities", [
+    ("Port scan detected from 10.1.4.7 targeting 200 ports", {"ip:10.1.4.7"}),
+    ("Failed login for svc_backup3 from 172.16.0.3", {"user:svc_backup3", "ip:172.16.0.3"}),
+    ("Mimikatz credential dump detected on host eng-ws-4", {"host:eng-ws-4"}),
+    ("Beacon to c2.evil-domain.net from user=CORP\\carol", {"host:c2.evil-domain.net", "user:corp\\carol"}),
+    ("Dropped payload.exe, sha256 " + "ab" * 32, {"hash:" + "ab" * 32}),
+    ("Phishing mail opened by dave@corp.com", {"user:dave@corp.com"}),
+    ("Health check passed for api on 127.0.0.1", set()),
+    ("Scheduled scan finished on all hosts", set()),
+])
+def test_extract_entities(message, entities):
+    assert extract_entities(message) == entities
+
+def test_metadata_entities():
+    metadata = {"src_ip": "10.0.0.9", "dst_ip": "127.0.0.1", "host": "WEB-01", "user": "Bob", "rule_id": "4625"}
+    assert metadata_entities(metadata) == {"ip:10.0.0.9", "host:web-01", "user:bob"}
+    assert metadata_entities(None) == set()
+
+def test_metadata_links_alerts_without_shared_words():
+    correlator = IncidentCorrelator()
+    first, _ = correlator.assign("edr", "Credential dump detected", "High", NOW, {"host": "eng-ws-4"})
+    second, _ = correlator.assign("ids", "Beacon on eng-ws-4", "Critical", NOW)
+    assert first is second
+
+def test_alerts_sharing_entities_join_one_incident():
+    correlator = IncidentCorrelator()
+    first, created = correlator.assign("edr", "Mimikatz on host eng-ws-4 by user mallory", "High", NOW)
+    second, joined = correlator.assign("ids", "Beacon from eng-ws-4 to 185.22.33.44", "Critical", NOW)
+    third, _ = correlator.assign("fw", "Blocked 185.22.33.44", "Low", NOW)
+    other, _ = correlator.assign("edr", "Failed login for alice from 10.0.0.9", "Medium", NOW)
+
+    assert created and not joined
+    assert first is second is third
+    assert other is not first
+    assert first.severity == "Critical" and first.alert_count == 3
+    assert first.entities == {"host:eng-ws-4", "user:mallory", "ip:185.22.33.44"}
+
+def test_most_shared_entities_then_same_source_wins():
+    correlator = IncidentCorrelator()
+    by_host, _ = correlator.assign("edr", "Alert on host web-01", "Low", NOW)
+    by_ip, _ = correlator.assign("ids", "Alert from 10.0.0.5", "Low", NOW)
+    by_user, _ = correlator.assign("ids", "Alert for user bob", "Low", NOW + timedelta(seconds=1))
+
+    both, _ = correlator.assign("ids", "user bob logged in on host web-01 from 10.0.0.5", "Low", NOW + timedelta(seconds=2))
+    assert both is by_user
+
+    same_source, _ = correlator.assign("edr", "Alert from 10.0.0.77", "Low", NOW + timedelta(seconds=2))
+    tie, _ = correlator.assign("edr", "Traffic 10.0.0.77 to 10.0.0.5", "Low", NOW + timedelta(seconds=2))
+    assert tie is same_source
+    assert by_host is not by_ip
+
+def test_incidents_expire_after_the_window():
+    correlator = IncidentCorrelator(window_seconds=60)
+    first, _ = correlator.assign("edr", "Alert on host web-01", "Low", NOW)
+    later, created = correlator.assign("edr", "Alert on host web-01", "Low", NOW + timedelta(seconds=61))
+
+    assert created and later is not first
+    assert correlator.stats()["incidents_evicted"] == 1
+    assert correlator.stats()["indexed_entities"] == 1
+
+def test_incidents_stop_growing_at_max_age():
+    correlator = IncidentCorrelator(window_seconds=60, max_incident_seconds=100)
+    first, _ = correlator.assign("edr", "Alert on host web-01", "Low", NOW)
+    for seconds in range(30, 150, 30):
+        latest, _ = correlator.assign("edr", "Alert on host web-01", "Low", NOW + timedelta(seconds=seconds))
+
+    assert latest is not first
+    assert first.alert_count == 4
+
+def test_entities_per_incident_are_capped():
+    correlator = IncidentCorrelator(max_entities=2)
+    incident, _ = correlator.assign("fw", "Scan from 10.0.0.1 to 10.0.0.2 and 10.0.0.3", "Low", NOW)
+
+    assert len(incident.entities) == 2
+    assert correlator.stats()["indexed_entities"] == 2
+
+@pytest.fixture
+def fake_repository(monkeypatch):
+    store = SimpleNamespace(incidents=[], activity=[], links=[], release=asyncio.Event)
+
+    async def create_incidents(db, rows):
+        await store.release.wait()
+        store.incidents += rows
+        return list(range(len(store.incidents) - len(rows) + 1, len(store.incidents) + 1))
+
+    async def record_incident_activity(db, updates):
+        store.activity += updates
+
+    async def set_alert_incidents(db, links):
+        store.links += links
+
+    monkeypatch.setattr(correlation, "create_incidents", create_incidents)
+    monkeypatch.setattr(correlation, "record_incident_activity", record_incident_activity)
+    monkeypatch.setattr(correlation, "set_alert_incidents", set_alert_incidents)
+    return store
+
+class FakeSession:
+    async def commit(self):
+        pass
+
+def alert(alert_id, message, severity="High"):
+    return SimpleNamespace(
+        id=alert_id, source="edr", message=message, severity=severity, created_at=NOW, incident_id=None,
+        alert_metadata=None
+    )
+
+def test_correlate_waits_for_an_incident_being_stored(fake_repository):
+    async def run():
+        fake_repository.release = asyncio.Event()
+        correlator = IncidentCorrelator()
+        first = [alert(1, "Mimikatz on host eng-ws-4"), alert(2, "Dump on eng-ws-4")]
+        second = [alert(3, "Ransomware on eng-ws-4", "Critical")]
+        storing = asyncio.create_task(correlator.correlate(FakeSession(), first))
+        await asyncio.sleep(0)
+        joining = asyncio.create_task(correlator.correlate(FakeSession(), second))
+        await asyncio.sleep(0)
+        # The second call found the incident and waits for its id
+        assert not joining.done()
+        fake_repository.release.set()
+        await asyncio.gather(storing, joining)
+        return first + second
+
+    alerts = asyncio.run(run())
+    assert [alert.incident_id for alert in alerts] == [1, 1, 1]
+    assert [row["alert_count"] for row in fake_repository.incidents] == [2]
+    assert fake_repository.activity == [{
+        "id": 1, "count": 1, "last_seen": NOW, "severity": "Critical", "entities": ["host:eng-ws-4"]
+    }]
+    assert sorted(fake_repository.links) == [(1, 1), (2, 1), (3, 1)]
+
+def test_failed_store_forgets_the_incident(fake_repository, monkeypatch):
+    async def failing_create(db, rows):
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(correlation, "create_incidents", failing_create)
+    correlator = IncidentCorrelator()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(correlator.correlate(FakeSession(), [alert(1, "Mimikatz on host eng-ws-4")]))
+    assert correlator.stats()["open_incidents"] == 0
+    assert correlator.stats()["indexed_entities"] == 0
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.services import deduplication
+from app.services.deduplication import AlertDeduplicator, alert_fingerprint
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+class FakeAlerts:
+    """
+    In-memory stand-in for the alert repository functions used by flush()
+    """
+
+    def __init__(self, monkeypatch, alerts):
+        self.alerts = {alert.id: alert for alert in alerts}
+        self.writes = []
+        self.on_close = None
+        self.summaries = []
+        monkeypatch.setattr(deduplication, "AsyncSessionLocal", FakeSession)
+        monkeypatch.setattr(deduplication, "add_alert_occurrences", self.add_alert_occurrences)
+        monkeypatch.setattr(deduplication, "close_dedup_windows", self.close_dedup_windows)
+        monkeypatch.setattr(deduplication, "close_stale_dedup_windows", self.close_stale_dedup_windows)
+        monkeypatch.setattr(deduplication, "send_slack_suppression_summary", self.send_summary)
+
+    async def add_alert_occurrences(self, db, alert_id, count, last_seen_at):
+        self.writes.append((alert_id, count))
+        alert = self.alerts[alert_id]
+        alert.occurrence_count += count
+        alert.last_seen_at = last_seen_at
+        return SimpleNamespace(**vars(alert))
+
+    async def close_dedup_windows(self, db, alert_ids):
+        if self.on_close:
+            self.on_close()
+        closed = [self.alerts[alert_id] for alert_id in alert_ids if self.alerts[alert_id].dedup_key]
+        for alert in closed:
+            alert.dedup_key = None
+        return [SimpleNamespace(**vars(alert)) for alert in closed]
+
+    async def close_stale_dedup_windows(self, db, last_seen_before):
+        return []
+
+    async def send_summary(self, alert):
+        self.summaries.append((alert.id, alert.occurrence_count))
+        return True
+
+def make_alert(alert_id, fingerprint, seen):
+    return SimpleNamespace(
+        id=alert_id, fingerprint=fingerprint, dedup_key=fingerprint, severity="High",
+        occurrence_count=1, first_seen_at=seen, last_seen_at=seen
+    )
+
+async def flush_and_wait(deduplicator):
+    await deduplicator.flush()
+    await asyncio.gather(*deduplicator._summary_tasks)
+
+def test_fingerprint_ignores_volatile_values():
+    assert alert_fingerprint("ids", "Port scan from 10.0.0.1") == alert_fingerprint("ids", "Port scan from 10.0.0.2")
+    assert alert_fingerprint("ids", "Port scan from 10.0.0.1") != alert_fingerprint("vpn", "Port scan from 10.0.0.1")
+
+def test_fold_counts_only_tracked_windows():
+    deduplicator = AlertDeduplicator()
+    assert deduplicator.fold("abc") is None
+    deduplicator.track(make_alert(7, "abc", datetime.utcnow()))
+    assert deduplicator.fold("abc") == 7
+    assert deduplicator.fold("abc") == 7
+    assert deduplicator.windows["abc"].pending == 2
+
+def test_track_respects_max_tracked():
+    deduplicator = AlertDeduplicator(max_tracked=1)
+    deduplicator.track(make_alert(1, "a", datetime.utcnow()))
+    deduplicator.track(make_alert(2, "b", datetime.utcnow()))
+    assert list(deduplicator.windows) == ["a"]
+
+def test_flush_writes_counts_before_closing(monkeypatch):
+    stale = datetime.utcnow() - timedelta(minutes=10)
+    alert = make_alert(1, "abc", stale)
+    fake = FakeAlerts(monkeypatch, [alert])
+    deduplicator = AlertDeduplicator(window_seconds=60)
+    deduplicator.track(alert)
+    deduplicator.fold("abc")
+    deduplicator.fold("abc")
+    deduplicator.windows["abc"].last_seen = stale
+
+    asyncio.run(flush_and_wait(deduplicator))
+
+    assert fake.writes == [(1, 2)]
+    assert deduplicator.windows == {}
+    assert fake.summaries == [(1, 3)]
+
+def test_flush_keeps_occurrences_folded_while_closing(monkeypatch):
+    stale = datetime.utcnow() - timedelta(minutes=10)
+    alert = make_alert(1, "abc", stale)
+    fake = FakeAlerts(monkeypatch, [alert])
+    deduplicator = AlertDeduplicator(window_seconds=60)
+    deduplicator.track(alert)
+
+    def duplicate_arrives():
+        # The window already left memory, so the pipeline finds it open in
+        # the database and tracks it again before it is closed
+        assert deduplicator.fold("abc") is None
+        deduplicator.track(alert)
+        deduplicator.fold("abc")
+
+    fake.on_close = duplicate_arrives
+    asyncio.run(flush_and_wait(deduplicator))
+
+    assert fake.writes == [(1, 1)]
+    assert deduplicator.windows == {}
+    assert fake.summaries == [(1, 2)]
+
+def test_flush_keeps_open_windows(monkeypatch):
+    alert = make_alert(1, "abc", datetime.utcnow())
+    fake = FakeAlerts(monkeypatch, [alert])
+    deduplicator = AlertDeduplicator(window_seconds=60)
+    deduplicator.track(alert)
+    deduplicator.fold("abc")
+
+    asyncio.run(flush_and_wait(deduplicator))
+
+    assert fake.writes == [(1, 1)]
+    assert "abc" in deduplicator.windows
+    assert fake.summaries == []
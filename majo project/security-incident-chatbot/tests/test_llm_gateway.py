@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_gateway import (
+    AdaptiveLimiter, CircuitBreaker, CircuitOpenError, LLMDeadlineExceeded, LLMGateway, LLMUnavailableError, Overloaded
+)
+from app.services.preclassifier import Preclassifier
+from app.services.rate_limit import TokenBucket
+
+class Upstream:
+    """
+    A fake LLM call: raises the queued errors in turn, then answers "ok"
+    """
+
+    def __init__(self, *errors, delay: float = 0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, timeout):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+def overload(error):
+    return error if isinstance(error, Overloaded) else None
+
+def gateway(**kwargs) -> LLMGateway:
+    kwargs.setdefault("backoff_seconds", 0.001)
+    return LLMGateway(overload, **kwargs)
+
+def test_limiter_grows_on_success_and_halves_on_overload():
+    limiter = AdaptiveLimiter(4, 1, 8, decrease_interval=60)
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+
+    limiter.on_overload()
+    limiter.on_overload()
+    # One decrease per interval however many in-flight calls report overload
+    assert limiter.limit == pytest.approx(2.5, abs=0.1)
+    assert limiter.decreases == 1
+
+def test_limiter_queues_beyond_the_limit():
+    async def run():
+        limiter = AdaptiveLimiter(1, 1, 4)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1 and not waiter.done()
+        limiter.release()
+        await waiter
+        assert limiter.in_flight == 1 and limiter.queued == 0
+
+    asyncio.run(run())
+
+def test_breaker_opens_then_lets_one_probe_through(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.llm_gateway.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()
+    assert breaker.state == "half_open" and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.opens == 2
+
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+def test_overload_is_retried():
+    upstream = Upstream(Overloaded("rate_limited"), Overloaded("server_error"))
+    llm = gateway(max_retries=2)
+
+    assert asyncio.run(llm.call("test", upstream, 10, 5)) == "ok"
+    assert upstream.calls == 3
+    assert llm.retries == 2
+    assert llm.outcomes == {"rate_limited": 1, "server_error": 1, "ok": 1}
+
+def test_plain_errors_are_raised_without_retry():
+    upstream = Upstream(ValueError("bad request"))
+    llm = gateway()
+
+    with pytest.raises(ValueError):
+        asyncio.run(llm.call("test", upstream, 10, 5))
+    assert upstream.calls == 1
+    assert llm.breaker.failures == 0
+
+def test_exhausted_retries_open_the_circuit():
+    llm = gateway(max_retries=0, breaker_failures=2)
+
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(llm.call("test", Upstream(Overloaded("server_error")), 10, 5))
+    upstream = Upstream()
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(llm.call("test", upstream, 10, 5))
+    assert upstream.calls == 0
+
+def test_deadline_covers_waiting_for_capacity():
+    async def run():
+        llm = gateway(initial_concurrency=1, min_concurrency=1)
+        busy = asyncio.create_task(llm.call("test", Upstream(delay=0.5), 10, 5))
+        await asyncio.sleep(0)
+        with pytest.raises(LLMDeadlineExceeded):
+            await llm.call("test", Upstream(), 10, 0.05)
+        await busy
+        return llm
+
+    llm = asyncio.run(run())
+    assert llm.outcomes == {"deadline": 1, "ok": 1}
+    assert llm.breaker.failures == 0
+
+def test_short_timeouts_do_not_count_against_the_breaker():
+    llm = gateway(breaker_failures=1, slow_call_seconds=1)
+
+    with pytest.raises(LLMDeadlineExceeded):
+        asyncio.run(llm.call("test", Upstream(delay=1), 10, 0.05))
+    assert llm.breaker.state == "closed"
+
+def test_disabled_gateway_calls_straight_through():
+    upstream = Upstream(Overloaded("rate_limited"))
+    with pytest.raises(Overloaded):
+        asyncio.run(gateway(enabled=False).call("test", upstream, 10, 5))
+
+def test_stream_holds_the_slot_until_consumed():
+    async def open_stream(timeout):
+        async def items():
+            for item in ["a", "b"]:
+                yield item
+        return items()
+
+    async def run():
+        llm = gateway()
+        stream = llm.stream("test", open_stream, 10, 5)
+        first = await stream.__anext__()
+        in_flight = llm.limiter.in_flight
+        rest = [item async for item in stream]
+        return first, rest, in_flight, llm.limiter.in_flight
+
+    assert asyncio.run(run()) == ("a", ["b"], 1, 0)
+
+def test_token_bucket_adjust_is_capped():
+    bucket = TokenBucket(rate=0.001, capacity=10)
+    bucket.tokens = 2
+    bucket.adjust(-5)
+    assert bucket.available() == pytest.approx(-3, abs=0.01)
+    bucket.adjust(100)
+    assert bucket.available() == pytest.approx(10)
+
+def test_fallback_always_decides():
+    assert Preclassifier().fallback("Mimikatz credential dump detected on host eng-ws-4").severity == "High"
+    decision = Preclassifier().fallback("Something odd happened")
+    assert (decision.severity, decision.stage) == ("Medium", "fallback")
@@ -0,0 +1,42 @@
+from benchmarks.load_suite import alert_message, compare, letters, summarize
+
+def run(commit, **metrics):
+    settings = {"version": 1, "rate": 50}
+    return {"commit": commit, "timestamp": "t", "workloads": {"steady": {"settings": settings, **metrics}}}
+
+def test_summarize_percentiles():
+    summary = summarize([i / 1000 for i in range(1, 101)])
+
+    assert summary["requests"] == 100
+    assert summary["p50_ms"] == 50.5
+    assert summary["p95_ms"] == 96.0
+    assert summary["max_ms"] == 100.0
+
+def test_messages_differ_in_letters_not_just_numbers():
+    assert letters(0) == "a" and letters(26) == "ab"
+    assert alert_message(1) != alert_message(1 + 6 * 26)
+
+def test_compare_flags_regressions_against_latest_matching_run():
+    history = [
+        run("old", p95_ms=100.0, throughput_rps=50.0),
+        run("prev", p95_ms=20.0, throughput_rps=100.0),
+    ]
+    results = run("new", p95_ms=30.0, throughput_rps=80.0)["workloads"]
+
+    regressions = compare(results, history, tolerance=0.15)
+
+    assert len(regressions) == 2
+    assert all("prev" in regression for regression in regressions)
+
+def test_compare_ignores_runs_with_other_settings():
+    history = [run("prev", p95_ms=1.0)]
+    history[0]["workloads"]["steady"]["settings"]["rate"] = 10
+    results = run("new", p95_ms=30.0)["workloads"]
+
+    assert compare(results, history, tolerance=0.15) == []
+
+def test_compare_within_tolerance_is_not_a_regression():
+    history = [run("prev", p95_ms=100.0, throughput_rps=100.0, error_rate=0.0)]
+    results = run("new", p95_ms=110.0, throughput_rps=90.0, error_rate=0.001)["workloads"]
+
+    assert compare(results, history, tolerance=0.15) == []
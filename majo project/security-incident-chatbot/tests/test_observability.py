@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import observability
+from app.observability import (
+    instrumented, record_usage, register_queue_depth, registry, render_metrics, request_context, stage
+)
+
+def sample(name, **labels):
+    return registry.get_sample_value(name, labels) or 0
+
+def test_stage_records_latency_and_nests_spans():
+    before = sample("alert_pipeline_stage_seconds_count", stage="test.outer", outcome="ok")
+
+    with request_context("req-1"):
+        with stage("test.outer") as outer:
+            with stage("test.inner") as inner:
+                pass
+
+    assert sample("alert_pipeline_stage_seconds_count", stage="test.outer", outcome="ok") == before + 1
+    assert outer.trace_id == inner.trace_id == "req-1"
+    assert inner.parent_id == outer.span_id
+    assert outer.parent_id is None
+    assert observability.current_span() is None
+
+def test_stage_counts_errors_by_type():
+    with pytest.raises(ValueError):
+        with stage("test.failing"):
+            raise ValueError("boom")
+
+    assert sample("alert_pipeline_stage_errors_total", stage="test.failing", error="ValueError") == 1
+    assert sample("alert_pipeline_stage_seconds_count", stage="test.failing", outcome="error") == 1
+
+def test_instrumented_marks_cancellation():
+    @instrumented("test.cancelled")
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert sample("alert_pipeline_stage_seconds_count", stage="test.cancelled", outcome="cancelled") == 1
+    assert sample("alert_pipeline_stage_errors_total", stage="test.cancelled", error="CancelledError") == 0
+
+def test_disabled_stages_record_nothing(monkeypatch):
+    monkeypatch.setattr(observability, "METRICS_ENABLED", False)
+
+    with stage("test.disabled") as span:
+        assert span is None
+
+    assert sample("alert_pipeline_stage_seconds_count", stage="test.disabled", outcome="ok") == 0
+
+def test_record_usage_counts_prompt_and_completion_tokens():
+    response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=3))
+    record_usage("test_op", response)
+    record_usage("test_op", SimpleNamespace(usage=None))
+
+    assert sample("llm_tokens_total", operation="test_op", kind="prompt") == 120
+    assert sample("llm_tokens_total", operation="test_op", kind="completion") == 3
+    assert sample("llm_tokens_per_call_count", operation="test_op") == 1
+
+def test_queue_depth_is_read_at_scrape_time():
+    depth = [4]
+    register_queue_depth("test_queue", lambda: depth[0])
+    register_queue_depth("test_broken", lambda: 1 / 0)
+
+    assert sample("alert_pipeline_queue_depth", queue="test_queue") == 4
+    depth[0] = 9
+    assert b'alert_pipeline_queue_depth{queue="test_queue"} 9.0' in render_metrics()
+    # A failing callback is skipped instead of breaking the scrape
+    assert registry.get_sample_value("alert_pipeline_queue_depth", {"queue": "test_broken"}) is None
+
+def test_middleware_sets_request_id_and_times_route():
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["request_id"] = observability.request_id_var.get()
+        scope["route"] = SimpleNamespace(path="/alert/{alert_id}")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def run(headers):
+        scope = {"type": "http", "method": "GET", "headers": headers}
+        await observability.RequestContextMiddleware(app)(scope, None, send)
+
+    asyncio.run(run([(b"x-request-id", b"abc123")]))
+    assert seen["request_id"] == "abc123"
+    assert (b"x-request-id", b"abc123") in sent[0]["headers"]
+    assert observability.request_id_var.get() is None
+
+    asyncio.run(run([]))
+    assert len(seen["request_id"]) == 32
+    assert sample("http_request_duration_seconds_count", method="GET", route="/alert/{alert_id}", status="200") == 2
@@ -0,0 +1,37 @@
+import json
+from types import SimpleNamespace
+
+from app.services.openai_service import _parse_batch_severities, alert_prompt_fields, clip_message
+
+def response(results):
+    return json.dumps({"results": results})
+
+def test_parse_complete_batch():
+    content = "Here you go: " + response([{"index": 1, "severity": "Low"}, {"index": 0, "severity": "High"}])
+    assert _parse_batch_severities(content, 2) == ["High", "Low"]
+
+def test_parse_rejects_missing_entries():
+    assert _parse_batch_severities(response([{"index": 0, "severity": "High"}]), 2) is None
+
+def test_parse_rejects_repeated_or_extra_entries():
+    repeated = [{"index": 0, "severity": "High"}, {"index": 0, "severity": "Low"}]
+    assert _parse_batch_severities(response(repeated), 2) is None
+    extra = [{"index": 0, "severity": "High"}, {"index": 1, "severity": "Low"}, {"index": 2, "severity": "Low"}]
+    assert _parse_batch_severities(response(extra), 2) is None
+
+def test_parse_rejects_unknown_severity_and_garbage():
+    assert _parse_batch_severities(response([{"index": 0, "severity": "Urgent"}]), 1) is None
+    assert _parse_batch_severities("not json", 1) is None
+
+def test_clip_message_says_how_much_was_cut():
+    assert clip_message("short", 10) == "short"
+    assert clip_message("x" * 25, 10) == "x" * 10 + " [15 more characters]"
+
+def test_prompt_fields_keep_indexed_metadata_only():
+    alert = SimpleNamespace(
+        severity="High", source="edr", message="Credential dump",
+        alert_metadata={"host": "eng-ws-4", "user": "mallory", "raw_event": "<4KB of XML>"}
+    )
+    assert alert_prompt_fields(alert) == {
+        "severity": "High", "source": "edr", "host": "eng-ws-4", "user": "mallory", "message": "Credential dump"
+    }
@@ -0,0 +1,34 @@
+import pytest
+
+from app.services.preclassifier import Preclassifier, RuleMatcher
+
+@pytest.mark.parametrize("message, severity", [
+    ("Ransomware behaviour: 120 files encrypted on fin-ws-12", "Critical"),
+    ("Mimikatz credential dump detected on host eng-ws-4", "High"),
+    ("Port scan detected from 10.0.0.1 targeting 200 ports", "Medium"),
+    ("Successful login for analyst7 from 10.2.0.7", "Low"),
+    ("Suspicious powershell running mimikatz on hr-ws-2", "High"),
+])
+def test_rules_classify_clear_messages(message, severity):
+    assert Preclassifier().classify(message).severity == severity
+
+@pytest.mark.parametrize("message", [
+    "No ransomware found during scheduled scan",
+    "AV scan completed: no malware detected",
+    "Scan finished without malware detected on any host",
+    "Ransomware check: not detected",
+    "Brute force alert was a false positive",
+])
+def test_negated_messages_go_to_the_llm(message):
+    assert Preclassifier().classify(message) is None
+
+def test_failure_words_override_low_rules():
+    assert Preclassifier().classify("Health check failed: database server down") is None
+    assert Preclassifier().classify("Health check passed for api-gateway").severity == "Low"
+
+def test_vague_rule_does_not_skip_the_llm():
+    assert RuleMatcher().classify("Suspicious process started").confidence < 0.8
+    assert Preclassifier().classify("Suspicious process started") is None
+
+def test_no_rule_matches():
+    assert Preclassifier().classify("Quarterly report uploaded") is None
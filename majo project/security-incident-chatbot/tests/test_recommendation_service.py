@@ -0,0 +1,96 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import recommendation_service
+from app.services.recommendation_service import RecommendationStore
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    backend = SimpleNamespace(saved=[], generations=0, release=None)
+
+    async def get_recommendation_for_alert(db, alert_id, version):
+        return None
+
+    async def get_recommendation_by_fingerprint(db, fingerprint, version):
+        # Yield so a concurrent caller can run in between
+        await asyncio.sleep(0)
+        return None
+
+    async def save_recommendation(db, alert_id, version, fingerprint, recommendation):
+        backend.saved.append((alert_id, recommendation))
+
+    async def prompt_context(db, alert):
+        await asyncio.sleep(0)
+        return []
+
+    async def generate_response_recommendation(alert, similar):
+        backend.generations += 1
+        await backend.release.wait()
+        return "Isolate the host"
+
+    async def stream_response_recommendation(alert, similar):
+        backend.generations += 1
+        await backend.release.wait()
+        for part in ["Isolate ", "the host"]:
+            yield part
+
+    monkeypatch.setattr(recommendation_service, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(recommendation_service, "get_recommendation_for_alert", get_recommendation_for_alert)
+    monkeypatch.setattr(recommendation_service, "get_recommendation_by_fingerprint", get_recommendation_by_fingerprint)
+    monkeypatch.setattr(recommendation_service, "save_recommendation", save_recommendation)
+    monkeypatch.setattr(recommendation_service.similar_alert_index, "prompt_context", prompt_context)
+    monkeypatch.setattr(recommendation_service, "generate_response_recommendation", generate_response_recommendation)
+    monkeypatch.setattr(recommendation_service, "stream_response_recommendation", stream_response_recommendation)
+    return backend
+
+def alert(alert_id):
+    return SimpleNamespace(id=alert_id, severity="High", source="ids", message="Port scan from 10.0.0.1", incident_id=None)
+
+async def collect(store, db, item):
+    return [text async for text, _ in store.stream(db, item)]
+
+def test_stream_and_get_or_generate_share_one_generation(fake_backend):
+    async def run():
+        fake_backend.release = asyncio.Event()
+        store = RecommendationStore()
+        streamed = asyncio.create_task(collect(store, None, alert(1)))
+        await asyncio.sleep(0)
+        fetched = asyncio.create_task(store.get_or_generate(None, alert(2)))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        fake_backend.release.set()
+        return await streamed, await fetched, store
+
+    streamed, fetched, store = asyncio.run(run())
+    assert "".join(streamed) == "Isolate the host"
+    assert fetched == ("Isolate the host", "similar")
+    assert fake_backend.generations == 1
+    assert store._inflight == {}
+
+def test_cancelled_generation_releases_waiters(fake_backend):
+    async def run():
+        fake_backend.release = asyncio.Event()
+        store = RecommendationStore()
+        streamed = asyncio.create_task(collect(store, None, alert(1)))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        waiter = asyncio.create_task(store.get_or_generate(None, alert(2)))
+        await asyncio.sleep(0)
+        for task in list(store._tasks):
+            task.cancel()
+        results = await asyncio.wait_for(asyncio.gather(streamed, waiter, return_exceptions=True), timeout=1)
+        return results, store
+
+    (streamed, waiter), store = asyncio.run(run())
+    assert isinstance(streamed, RuntimeError)
+    assert isinstance(waiter, RuntimeError)
+    assert store._inflight == {}
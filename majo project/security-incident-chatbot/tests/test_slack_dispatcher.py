@@ -0,0 +1,104 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from slack_sdk.errors import SlackApiError
+
+from app.services.rate_limit import TokenBucket
+from app.services.slack_dispatcher import SlackDispatcher
+
+class FakeResponse(dict):
+    def __init__(self, status_code, error, headers=None):
+        super().__init__(ok=False, error=error)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class FakeSlack:
+    def __init__(self, failures=()):
+        self.posts = []
+        self.failures = list(failures)
+
+    async def chat_postMessage(self, channel, text, blocks):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.posts.append((channel, text))
+
+def digest(alerts):
+    return f"{len(alerts)} alerts", []
+
+def alert(alert_id):
+    return SimpleNamespace(id=alert_id)
+
+def test_token_bucket_bursts_then_waits():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+    # Two banked tokens, then one refill at 20/s
+    assert 0.03 < elapsed < 0.5
+
+def test_token_bucket_pause_blocks_and_drops_tokens():
+    async def run():
+        bucket = TokenBucket(rate=1000, capacity=5)
+        bucket.pause(0.05)
+        assert bucket.available() < 1
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.04
+
+def test_waiting_alerts_are_sent_as_one_digest():
+    async def run():
+        slack = FakeSlack()
+        dispatcher = SlackDispatcher(slack, digest, rate_per_second=100, burst=1, digest_threshold=3)
+        results = await asyncio.gather(*(
+            dispatcher.submit("C1", f"alert {i}", [], alert(i)) for i in range(5)
+        ))
+        await dispatcher.stop()
+        return slack, dispatcher, results
+
+    slack, dispatcher, results = asyncio.run(run())
+    assert results == [True] * 5
+    assert slack.posts == [("C1", "5 alerts")]
+    assert dispatcher.digests_sent == 1
+
+def test_plain_messages_are_not_coalesced():
+    async def run():
+        slack = FakeSlack()
+        dispatcher = SlackDispatcher(slack, digest, rate_per_second=100, burst=5, digest_threshold=2)
+        await asyncio.gather(*(dispatcher.submit("C1", f"summary {i}", []) for i in range(3)))
+        await dispatcher.stop()
+        return slack
+
+    assert [text for _, text in asyncio.run(run()).posts] == ["summary 0", "summary 1", "summary 2"]
+
+def test_rate_limited_message_is_retried_even_with_bad_retry_after():
+    async def run():
+        limited = SlackApiError("ratelimited", FakeResponse(429, "ratelimited", {"Retry-After": "soon"}))
+        slack = FakeSlack([limited])
+        dispatcher = SlackDispatcher(slack, digest, rate_per_second=100, burst=1)
+        sent = await asyncio.wait_for(dispatcher.submit("C1", "hello", []), timeout=5)
+        await dispatcher.stop()
+        return sent, slack, dispatcher
+
+    sent, slack, dispatcher = asyncio.run(run())
+    assert sent is True
+    assert slack.posts == [("C1", "hello")]
+    assert dispatcher.rate_limited == 1
+
+def test_message_fails_after_max_attempts():
+    async def run():
+        slack = FakeSlack([RuntimeError("boom")] * 2)
+        dispatcher = SlackDispatcher(slack, digest, rate_per_second=100, burst=5, max_attempts=2)
+        sent = await dispatcher.submit("C1", "hello", [])
+        await dispatcher.stop()
+        return sent, dispatcher
+
+    sent, dispatcher = asyncio.run(run())
+    assert sent is False
+    assert dispatcher.failures == 1 and dispatcher.retries == 1
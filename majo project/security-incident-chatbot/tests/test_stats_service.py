@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.repositories.stats_repository import bucket_start, to_naive_utc
+from app.services import stats_service
+
+def summary(monkeypatch, rows, **kwargs):
+    calls = []
+
+    async def fake_get_alert_stats(db, granularity, start_date, end_date, severity, source):
+        calls.append((start_date, end_date))
+        return rows
+
+    monkeypatch.setattr(stats_service, "get_alert_stats", fake_get_alert_stats)
+    result = asyncio.run(stats_service.get_alert_stats_summary(None, **kwargs))
+    return result, calls
+
+def test_bucket_start():
+    timestamp = datetime(2026, 10, 17, 13, 45, 30, 123)
+    assert bucket_start(timestamp, "minute") == datetime(2026, 10, 17, 13, 45)
+    assert bucket_start(timestamp, "hour") == datetime(2026, 10, 17, 13)
+    assert bucket_start(timestamp, "day") == datetime(2026, 10, 17)
+
+def test_to_naive_utc():
+    assert to_naive_utc(None) is None
+    assert to_naive_utc(datetime(2026, 10, 17, 12)) == datetime(2026, 10, 17, 12)
+    plus_two = timezone(timedelta(hours=2))
+    assert to_naive_utc(datetime(2026, 10, 17, 12, tzinfo=plus_two)) == datetime(2026, 10, 17, 10)
+
+def test_summary_totals(monkeypatch):
+    hour = datetime(2026, 10, 17, 10)
+    rows = [(hour, "High", "ids", 3), (hour, "Low", "vpn", 2), (hour + timedelta(hours=1), "High", "vpn", 1)]
+    result, _ = summary(
+        monkeypatch, rows, granularity="hour", start_date=hour, end_date=hour + timedelta(hours=2)
+    )
+    assert result.total == 6
+    assert result.by_severity == {"High": 4, "Low": 2}
+    assert result.by_source == {"ids": 3, "vpn": 3}
+    assert [bucket.count for bucket in result.buckets] == [5, 1]
+
+def test_summary_accepts_z_suffixed_start_with_naive_end(monkeypatch):
+    # What /alerts/stats?start_date=...Z produces with the utcnow() default end
+    start = datetime.fromisoformat("2026-10-17T00:00:00+00:00")
+    end = datetime(2026, 10, 17, 12)
+    result, calls = summary(monkeypatch, [], granularity="hour", start_date=start, end_date=end)
+    assert calls == [(datetime(2026, 10, 17), end)]
+    assert result.start_date.tzinfo is None
+
+def test_summary_converts_both_bounds_to_utc(monkeypatch):
+    plus_two = timezone(timedelta(hours=2))
+    _, calls = summary(
+        monkeypatch, [],
+        granularity="minute",
+        start_date=datetime(2026, 10, 17, 2, tzinfo=plus_two),
+        end_date=datetime(2026, 10, 17, 3, tzinfo=timezone.utc)
+    )
+    assert calls == [(datetime(2026, 10, 17), datetime(2026, 10, 17, 3))]
+
+@pytest.mark.parametrize("kwargs, error", [
+    ({"granularity": "week"}, "granularity"),
+    ({"end_date": datetime(2026, 10, 16)}, "after start_date"),
+    ({"granularity": "minute", "start_date": datetime(2000, 1, 1)}, "more than"),
+])
+def test_summary_rejects_bad_ranges(monkeypatch, kwargs, error):
+    arguments = {"granularity": "hour", "start_date": datetime(2026, 10, 17), "end_date": datetime(2026, 10, 18)}
+    arguments.update(kwargs)
+    with pytest.raises(ValueError, match=error):
+        summary(monkeypatch, [], **arguments)
@@ -0,0 +1,185 @@
+import asyncio
+import socket
+from datetime import datetime
+
+import pytest
+
+from app.services.syslog_listener import SyslogListener, parse_syslog, syslog_alert
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+def test_parse_rfc5424():
+    message = parse_syslog(
+        b'<165>1 2026-10-18T10:14:15.003+02:00 fw01.example.com suricata 8710 ALERT '
+        b'[alert@32473 src_ip="10.0.0.5" sig="ET \\"SCAN\\" [1\\]"][meta seq="1"] \xef\xbb\xbfPort scan from 10.0.0.5'
+    )
+    assert (message.facility, message.severity) == (20, 5)
+    assert message.timestamp == datetime(2026, 10, 18, 8, 14, 15, 3000)
+    assert (message.hostname, message.app_name, message.procid, message.msgid) == ("fw01.example.com", "suricata", "8710", "ALERT")
+    assert message.structured_data == {"alert@32473": {"src_ip": "10.0.0.5", "sig": 'ET "SCAN" [1]'}, "meta": {"seq": "1"}}
+    assert message.message == "Port scan from 10.0.0.5"
+
+def test_parse_rfc5424_nil_values():
+    message = parse_syslog(b"<34>1 - - - - - -")
+    assert (message.timestamp, message.hostname, message.app_name, message.structured_data, message.message) == (None, None, None, {}, "")
+
+def test_parse_rfc3164():
+    message = parse_syslog(b"<38>Oct  7 21:04:05 bastion sshd[4242]: Failed password for root from 203.0.113.9\n", now=NOW)
+    assert (message.facility, message.severity) == (4, 6)
+    assert message.timestamp == datetime(2026, 10, 7, 21, 4, 5)
+    assert (message.hostname, message.app_name, message.procid) == ("bastion", "sshd", "4242")
+    assert message.message == "Failed password for root from 203.0.113.9"
+
+def test_parse_rfc3164_without_hostname_or_timestamp():
+    no_hostname = parse_syslog(b"<38>Oct 17 21:04:05 sshd[1]: Accepted publickey", now=NOW)
+    assert (no_hostname.hostname, no_hostname.app_name) == (None, "sshd")
+
+    asa = parse_syslog(b"<164>%ASA-4-106023: Deny tcp src outside:198.51.100.7/443", now=NOW)
+    assert (asa.timestamp, asa.hostname, asa.app_name) == (None, None, "%ASA-4-106023")
+    assert asa.message == "Deny tcp src outside:198.51.100.7/443"
+
+def test_parse_rfc3164_year_rollover():
+    message = parse_syslog(b"<13>Dec 31 23:59:59 host app: bye", now=datetime(2027, 1, 1, 0, 0, 5))
+    assert message.timestamp == datetime(2026, 12, 31, 23, 59, 59)
+
+def test_message_without_pri_is_user_notice():
+    message = parse_syslog(b"plain text from a relay")
+    assert (message.facility, message.severity, message.message) == (1, 5, "plain text from a relay")
+
+@pytest.mark.parametrize("data", [b"", b"\n", b"<999>1 - - - - - -", b"<ab>x", b"<34>1 2026-10-18T10:14:15Z host", b"<34>1 - - - - - [unterminated x=\"1\""])
+def test_malformed_messages(data):
+    with pytest.raises(ValueError):
+        parse_syslog(data)
+
+def test_syslog_alert_fields():
+    alert = syslog_alert(parse_syslog(b'<165>1 2026-10-18T10:14:15Z FW01. suricata - ALERT [a x="1"] Port scan'), "192.0.2.1")
+    assert (alert.source, alert.message) == ("suricata", "Port scan")
+    metadata = alert.metadata.model_dump()
+    assert metadata["host"] == "fw01"
+    assert metadata["syslog_facility"] == "local4"
+    assert metadata["syslog_severity"] == "notice"
+    assert metadata["syslog_msgid"] == "ALERT"
+    assert metadata["structured_data"] == {"a": {"x": "1"}}
+
+    # No HOSTNAME: the sender's address; no TAG: "syslog"
+    alert = syslog_alert(parse_syslog(b"<13>something happened"), "192.0.2.1")
+    assert (alert.source, alert.metadata.model_dump()["host"]) == ("syslog", "192.0.2.1")
+
+    with pytest.raises(ValueError):
+        syslog_alert(parse_syslog(b"<13>1 - - - - - -"), "192.0.2.1")
+
+def free_port(kind):
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def make_listener(ingest, **kwargs):
+    options = {"enabled": True, "host": "127.0.0.1", "udp_port": 0, "tcp_port": 0, "batch_wait_ms": 20, "workers": 1}
+    options.update(kwargs)
+    return SyslogListener(ingest=ingest, **options)
+
+def test_udp_and_tcp_messages_are_batched_into_ingest():
+    batches = []
+
+    async def ingest(alerts):
+        batches.append([alert.message for alert in alerts])
+        return 0
+
+    async def run():
+        listener = make_listener(ingest, udp_port=free_port(socket.SOCK_DGRAM), tcp_port=free_port(socket.SOCK_STREAM), batch_size=3)
+        await listener.start()
+        ports = listener.ports
+
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=("127.0.0.1", ports["udp"]))
+        transport.sendto(b"<13>app: udp one")
+        transport.sendto(b"<13>")
+        transport.close()
+
+        _, writer = await asyncio.open_connection("127.0.0.1", ports["tcp"])
+        # Newline framing, then octet counting, then a last line without newline
+        writer.write(b"<13>app: tcp one\n<13>app: tcp two\n")
+        frame = b"<13>1 - host app - - - tcp\nthree"
+        writer.write(str(len(frame)).encode() + b" " + frame)
+        writer.write(b"<13>app: tcp four")
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+        for _ in range(100):
+            if listener.stored == 5:
+                break
+            await asyncio.sleep(0.01)
+        await listener.stop()
+        return listener.stats()
+
+    stats = asyncio.run(run())
+    assert sorted(message for batch in batches for message in batch) == ["tcp\nthree", "tcp four", "tcp one", "tcp two", "udp one"]
+    assert all(len(batch) <= 3 for batch in batches)
+    assert stats["received"] == {"udp": 2, "tcp": 4}
+    assert (stats["parse_errors"], stats["dropped"], stats["stored"], stats["failed"]) == (1, 0, 5, 0)
+
+def test_full_queue_drops_datagrams_and_counts_failures():
+    async def run():
+        gate = asyncio.Event()
+
+        async def ingest(alerts):
+            await gate.wait()
+            return 1
+
+        listener = make_listener(ingest, queue_size=2, batch_size=1)
+        await listener.start()
+        # The worker holds one message; two more fill the queue
+        listener.submit_nowait(b"<13>app: one", "127.0.0.1")
+        await asyncio.sleep(0.01)
+        for n in range(5):
+            listener.submit_nowait(f"<13>app: {n}".encode(), "127.0.0.1")
+        assert (listener.qsize(), listener.dropped) == (2, 3)
+
+        gate.set()
+        await listener.stop()
+        return listener.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["stored"], stats["failed"], stats["batches"]) == (0, 3, 3)
+
+def test_full_queue_stops_reading_tcp():
+    async def run():
+        gate = asyncio.Event()
+        stored = []
+
+        async def ingest(alerts):
+            await gate.wait()
+            stored.extend(alerts)
+            return 0
+
+        listener = make_listener(ingest, tcp_port=free_port(socket.SOCK_STREAM), queue_size=2, batch_size=1)
+        await listener.start()
+        _, writer = await asyncio.open_connection("127.0.0.1", listener.ports["tcp"])
+        writer.write(b"".join(f"<13>app: {n}\n".encode() for n in range(10)))
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        # One message in the worker, two queued, one waiting to be queued; none dropped
+        assert (listener.qsize(), listener.received["tcp"], listener.dropped) == (2, 4, 0)
+
+        gate.set()
+        writer.close()
+        await writer.wait_closed()
+        for _ in range(100):
+            if len(stored) == 10:
+                break
+            await asyncio.sleep(0.01)
+        await listener.stop()
+        return [alert.message for alert in stored]
+
+    assert asyncio.run(run()) == [str(n) for n in range(10)]
+
+def test_disabled_listener_binds_nothing():
+    async def run():
+        listener = SyslogListener(enabled=False)
+        await listener.start()
+        await listener.stop()
+        return listener.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["enabled"], stats["ports"], stats["queued"]) == (False, {}, 0)
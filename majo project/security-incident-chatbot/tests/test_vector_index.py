@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+
+from app.services.embeddings import HashingEmbeddingProvider
+from app.services.similarity import SimilarAlertIndex
+from app.services.vector_index import IVFIndex, quantize
+
+def unit_vectors(count, dimensions=32, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def test_quantize_round_trip():
+    vectors = unit_vectors(50)
+    codes, factors = quantize(vectors)
+    assert codes.dtype == np.int8
+    np.testing.assert_allclose(codes * factors[:, None], vectors, atol=0.01)
+
+def test_flat_search_finds_exact_match():
+    vectors = unit_vectors(500)
+    index = IVFIndex(32)
+    index.build(np.arange(500), vectors)
+    assert index.nlist == 0
+    results = index.search(vectors[42], 3)
+    assert results[0][0] == 42
+    assert results[0][1] > 0.99
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+def test_ivf_search_with_all_lists_matches_flat():
+    vectors = unit_vectors(2000)
+    index = IVFIndex(32, train_threshold=1000)
+    index.build(np.arange(2000), vectors)
+    assert index.nlist == 44
+    flat = IVFIndex(32, train_threshold=10000)
+    flat.build(np.arange(2000), vectors)
+    query = unit_vectors(1, seed=1)[0]
+    assert index.search(query, 10, nprobe=index.nlist) == flat.search(query, 10)
+
+def test_exclude_and_pending_vectors():
+    vectors = unit_vectors(100)
+    index = IVFIndex(32)
+    index.build(np.arange(100), vectors)
+    index.add([1000], vectors[7:8])
+    assert len(index) == 101 and index.pending == 1
+    assert {alert_id for alert_id, _ in index.search(vectors[7], 2)} == {7, 1000}
+    assert index.search(vectors[7], 1, exclude=7)[0][0] == 1000
+
+def test_contents_and_added_since():
+    vectors = unit_vectors(20)
+    index = IVFIndex(32)
+    index.build(np.arange(10), vectors[:10])
+    index.add([10, 11], vectors[10:12])
+    index.add([12], vectors[12:13])
+    ids, _ = index.contents()
+    assert list(ids) == list(range(13))
+    added_ids, added = index.added_since(11)
+    assert list(added_ids) == [11, 12]
+    np.testing.assert_allclose(added, vectors[11:13], atol=0.01)
+
+def test_rebuild_keeps_newest_vectors():
+    provider = HashingEmbeddingProvider(dimensions=32)
+    similarity = SimilarAlertIndex(provider=provider, max_vectors=100)
+    similarity.index = IVFIndex(32, train_threshold=1000)
+    vectors = unit_vectors(150)
+    similarity.index.build(np.arange(100), vectors[:100])
+    similarity.index.add(np.arange(100, 150), vectors[100:])
+
+    async def rebuild():
+        similarity._maybe_rebuild()
+        await similarity._rebuild
+
+    asyncio.run(rebuild())
+    ids, _ = similarity.index.contents()
+    assert sorted(ids) == list(range(50, 150))